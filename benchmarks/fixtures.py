@@ -0,0 +1,338 @@
+# -- Import required libraries / modules:
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from threading import Thread
+
+import pandas as pd
+import random
+import time
+
+
+# -- The words that the text on the generated pages is made from:
+WORDS = ("alpha", "bravo", "charlie", "delta", "echo", "foxtrot", "golf", "hotel", "india", "juliet",
+         "kilo", "lima", "mike", "november", "oscar", "papa", "quebec", "romeo", "sierra", "tango")
+
+# -- The processor.py for the sites with table pages. It turns the table into
+# -- a dataframe and pushes it into the export buffer for the site:
+TABLE_PROCESSOR = '''# -- Generated by benchmarks/fixtures.py:
+from modules.export_sink import get_export_buffer
+from modules.tables import table_to_dataframe
+
+
+def process_soup(soup, row_details, site_name, site_output_folder):
+    table = soup.find("table", attrs = {"id": row_details.html_id_1, "class": row_details.html_class_1})
+
+    if table == None:
+        return
+
+    get_export_buffer(site_name = site_name).push(df = table_to_dataframe(table = table),
+                                                  nickname = row_details.nickname)
+'''
+
+# -- The processor.py for the sites with table pages that are streamed. It
+# -- yields the rows of the table to the export buffer for the site one at a
+# -- time:
+STREAM_PROCESSOR = '''# -- Generated by benchmarks/fixtures.py:
+from modules.tables import table_records
+
+
+def process_soup(soup, row_details, site_name, site_output_folder):
+    table = soup.find("table", attrs = {"id": row_details.html_id_1, "class": row_details.html_class_1})
+
+    if table == None:
+        return
+
+    return table_records(table = table)
+'''
+
+# -- The processor.py for the sites with product pages. It picks out the
+# -- details of the product and pushes them into the export buffer as one row:
+PRODUCT_PROCESSOR = '''# -- Generated by benchmarks/fixtures.py:
+from modules.export_sink import get_export_buffer
+
+import pandas as pd
+
+
+def process_soup(soup, row_details, site_name, site_output_folder):
+    product = {"title": soup.find("h1", attrs = {"class": "product-title"}).get_text(strip = True),
+               "price": float(soup.find("span", attrs = {"class": "price"}).get_text(strip = True).lstrip("£")),
+               "rating": float(soup.find("span", attrs = {"class": "rating"}).get_text(strip = True))}
+
+    for spec in soup.find("ul", attrs = {"class": "specs"}).find_all("li"):
+        name, value = spec.get_text(strip = True).split(":", 1)
+        product[name.strip()] = value.strip()
+
+    get_export_buffer(site_name = site_name).push(df = pd.DataFrame([product]),
+                                                  nickname = row_details.nickname)
+'''
+
+PROCESSORS = {"table": TABLE_PROCESSOR,
+              "table_stream": STREAM_PROCESSOR,
+              "product": PRODUCT_PROCESSOR}
+
+
+def words(generator: random.Random, count: int):
+    # -- Some words to fill the page with:
+    return " ".join(generator.choice(WORDS) for _ in range(count))
+
+
+def page_chrome(generator: random.Random, title: str, content: str):
+    # -- Wrap the content of a page in the header, navigation, scripts and
+    # -- footer that real pages have, so that parsing has to skip over them:
+    links = "".join(f'<li><a href="/category/{number}">{words(generator, 2)}</a></li>' for number in range(150))
+    scripts = "".join(f"<script>window.data{number} = {{\"id\": {number}, \"text\": \"{words(generator, 40)}\"}};</script>"
+                      for number in range(20))
+
+    return (f"<!DOCTYPE html><html><head><meta charset='utf-8'><title>{title}</title>"
+            f"<style>body {{ font-family: sans-serif; }} .price {{ color: red; }}</style>{scripts}</head>"
+            f"<body><header><nav><ul>{links}</ul></nav></header><main>{content}</main>"
+            f"<footer><p>{words(generator, 200)}</p></footer></body></html>")
+
+
+@lru_cache(maxsize = 256)
+def table_page(rows: int, number: int):
+    """
+    ### Summary:
+        This function will generate a page with a large table on it (with the
+        id bench and the class data). The same page is generated for the same
+        rows and number every time.
+
+    ### Args:
+        rows (int):
+            The number of rows in the table.
+        number (int):
+            The number of the page.
+
+    ### Returns:
+        bytes: The page.
+    """
+
+    generator = random.Random(f"table-{rows}-{number}")
+    table_rows = "".join(f"<tr><td>{words(generator, 3)}</td><td>SKU-{number}-{row}</td><td>{generator.randint(0, 5000)}</td>"
+                         f"<td>{generator.uniform(1, 500):.2f}</td><td>{generator.random():.4f}</td></tr>" for row in range(rows))
+    content = (f"<h1>Table {number}</h1><p>{words(generator, 100)}</p>"
+               f"<table id='bench' class='data'><thead><tr><th>Name</th><th>SKU</th><th>Quantity</th><th>Price</th><th>Ratio</th></tr></thead>"
+               f"<tbody>{table_rows}</tbody></table><p>{words(generator, 100)}</p>")
+
+    return page_chrome(generator = generator, title = f"Table {number}", content = content).encode("utf-8")
+
+
+@lru_cache(maxsize = 256)
+def product_page(number: int):
+    """
+    ### Summary:
+        This function will generate a big product page, with the product
+        details near the top and a lot of reviews, related products and
+        scripts around them. The same page is generated for the same number
+        every time.
+
+    ### Args:
+        number (int):
+            The number of the page.
+
+    ### Returns:
+        bytes: The page.
+    """
+
+    generator = random.Random(f"product-{number}")
+    specs = "".join(f"<li>spec_{spec}: {words(generator, 3)}</li>" for spec in range(40))
+    reviews = "".join(f"<div class='review'><h3>{words(generator, 4)}</h3><span class='stars'>{generator.randint(1, 5)}</span>"
+                      f"<p>{words(generator, 120)}</p></div>" for _ in range(250))
+    related = "".join(f"<div class='card'><a href='/product/{generator.randint(0, 10000)}'><img src='/img/{generator.randint(0, 10000)}.jpg' "
+                      f"alt='{words(generator, 3)}'></a><span>{words(generator, 5)}</span></div>" for _ in range(300))
+    content = (f"<div class='product'><h1 class='product-title'>Product {number} {words(generator, 4)}</h1>"
+               f"<span class='price'>£{generator.uniform(5, 900):.2f}</span><span class='rating'>{generator.uniform(1, 5):.1f}</span>"
+               f"<ul class='specs'>{specs}</ul><div class='description'><p>{words(generator, 400)}</p></div></div>"
+               f"<section class='reviews'>{reviews}</section><section class='related'>{related}</section>")
+
+    return page_chrome(generator = generator, title = f"Product {number}", content = content).encode("utf-8")
+
+
+@lru_cache(maxsize = 256)
+def catalogue_page(number: int):
+    """
+    ### Summary:
+        This function will generate a catalogue page for crawling, with a
+        small table on it (with the id bench and the class data), links to 
+        the five catalogue pages below it and navigation links to the first 
+        20 catalogue pages on every page, along with links to images and 
+        another site that shouldn't be followed.
+
+    ### Args:
+        number (int):
+            The number of the page.
+
+    ### Returns:
+        bytes: The page.
+    """
+
+    generator = random.Random(f"catalogue-{number}")
+    table_rows = "".join(f"<tr><td>{words(generator, 3)}</td><td>SKU-{number}-{row}</td><td>{generator.randint(0, 5000)}</td></tr>"
+                         for row in range(50))
+    children = "".join(f'<li><a href="/catalogue/{number * 5 + child}">{words(generator, 2)}</a></li>' for child in range(1, 6))
+    navigation = "".join(f'<a href="/catalogue/{page}#top">{page}</a>' for page in range(20))
+    content = (f"<h1>Catalogue {number}</h1><nav>{navigation}</nav><ul class='children'>{children}</ul>"
+               f"<table id='bench' class='data'><thead><tr><th>Name</th><th>SKU</th><th>Quantity</th></tr></thead>"
+               f"<tbody>{table_rows}</tbody></table><a href='/img/{number}.jpg'>Image</a>"
+               f"<a href='https://example.com/catalogue/{number}'>Elsewhere</a>")
+
+    return page_chrome(generator = generator, title = f"Catalogue {number}", content = content).encode("utf-8")
+
+
+def sitemap(base_url: str,
+            pages: int):
+    # -- A sitemap of the first catalogue pages:
+    urls = "".join(f"<url><loc>{base_url}/catalogue/{number}</loc></url>" for number in range(pages))
+
+    return (f'<?xml version="1.0" encoding="UTF-8"?><urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+            f"{urls}</urlset>").encode("utf-8")
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    """
+    ### Summary:
+        Serves the generated pages:
+        - /table/<rows>/<number>: A page with a table with that many rows.
+        - /product/<number>: A big product page.
+        - /slow/<milliseconds>/<number>: A page with a small table, sent after
+          waiting that many milliseconds.
+        - /error/<status>/<number>: An empty response with that status code.
+        - /catalogue/<number>: A catalogue page with links to crawl.
+        - /sitemap/<pages>.xml: A sitemap of the first catalogue pages.
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        parts = self.path.strip("/").split("/")
+        content_type = "text/html"
+
+        try:
+            if parts[0] == "table":
+                body = table_page(rows = int(parts[1]), number = int(parts[2]))
+            elif parts[0] == "product":
+                body = product_page(number = int(parts[1]))
+            elif parts[0] == "slow":
+                time.sleep(int(parts[1]) / 1000)
+                body = table_page(rows = 50, number = int(parts[2]))
+            elif parts[0] == "catalogue":
+                body = catalogue_page(number = int(parts[1]))
+            elif parts[0] == "sitemap":
+                host, port = self.server.server_address[:2]
+                body = sitemap(base_url = f"http://{host}:{port}", 
+                               pages = int(parts[1].removesuffix(".xml")))
+                content_type = "application/xml"
+            elif parts[0] == "error":
+                self.send_status(status = int(parts[1]))
+                return
+            else:
+                self.send_status(status = 404)
+                return
+        except (IndexError, ValueError):
+            self.send_status(status = 400)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_status(self, status: int):
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        # -- Don't print a line for every request:
+        return
+
+
+class FixtureServer:
+    """
+    ### Summary:
+        A local HTTP server that serves the generated pages (see
+        FixtureHandler) from a thread of its own. It can be used as a context
+        manager, which starts and stops it.
+
+    ### Args:
+        host (str, optional):
+            The address to listen on. Defaults to "127.0.0.1".
+        port (int, optional):
+            The port to listen on. Defaults to 0 (a free port).
+    """
+
+    def __init__(self,
+                 host: str = "127.0.0.1",
+                 port: int = 0):
+        self.server = ThreadingHTTPServer((host, port), FixtureHandler)
+        self.server.daemon_threads = True
+        self.thread = Thread(target = self.server.serve_forever, daemon = True)
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread.start()
+
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def write_site(sites_dir: str,
+               site_name: str,
+               urls: list,
+               kind: str,
+               site_settings: dict = None):
+    """
+    ### Summary:
+        This function will create a site folder with a pages.xlsx,
+        settings.xlsx and processor.py for the generated pages.
+
+    ### Args:
+        sites_dir (str):
+            The folder to create the site folder in.
+        site_name (str):
+            The name of the site folder.
+        urls (list):
+            The URLs of the pages for the site.
+        kind (str):
+            The kind of pages, table, table_stream or product, which sets the
+            processor that is used.
+        site_settings (dict, optional):
+            The settings for the site's settings.xlsx. Defaults to None (the
+            default settings).
+
+    ### Returns:
+        Path: The site folder.
+    """
+
+    site_folder = Path(sites_dir) / site_name
+    site_folder.mkdir(parents = True, exist_ok = True)
+
+    pd.DataFrame({"url": urls,
+                  "browser_to_use": "firefox",
+                  "nickname": [f"page_{number}" for number in range(len(urls))],
+                  "html_id_1": "bench",
+                  "html_class_1": "data"}).to_excel(site_folder / "pages.xlsx", index = False)
+
+    if site_settings:
+        pd.DataFrame({"setting": list(site_settings),
+                      "value": list(site_settings.values())}).to_excel(site_folder / "settings.xlsx", index = False)
+
+    (site_folder / "processor.py").write_text(PROCESSORS[kind], encoding = "utf-8")
+
+    return site_folder
@@ -0,0 +1,131 @@
+# -- Import required libraries / modules:
+from pathlib import Path
+
+from modules.log_setup import get_logger, log_context, logger, stop_logging
+
+import argparse
+import inspect
+import json
+import logging
+import os
+import statistics
+import tempfile
+import time
+
+
+# -- The number of log records made for each row, roughly what the processor,
+# -- url_scraper and an export make for a page:
+RECORDS_PER_ROW = 6
+
+
+def legacy_row(row_number: int):
+    # -- How each function used to get its logger, with inspect.stack and a
+    # -- new name for every call:
+    for _ in range(RECORDS_PER_ROW):
+        log = logging.getLogger(f"{os.getenv('SCRAPER_APP_NAME')}.{__name__}.{inspect.stack()[0][3]}.benchmark.row{row_number}")
+        log.info(f"Processing row {row_number}.")
+
+
+def queued_row(row_number: int):
+    # -- How each function gets its logger now:
+    with log_context(site = "benchmark", nickname = f"row{row_number}"):
+        for _ in range(RECORDS_PER_ROW):
+            log = get_logger(__name__, "queued_row", "benchmark", f"row{row_number}")
+            log.info(f"Processing row {row_number}.")
+
+
+def legacy_logging(log_file: str):
+    # -- Write straight to the log file from the thread that logs, as the
+    # -- logging set up in modules.config used to:
+    root_logger = logging.getLogger()
+
+    for handler in root_logger.handlers[:]:
+        root_logger.removeHandler(handler)
+        handler.close()
+
+    handler = logging.FileHandler(filename = log_file)
+    handler.setLevel(logging.INFO)
+    handler.setFormatter(logging.Formatter("%(levelname)s:%(asctime)s:%(name)s:%(message)s"))
+    root_logger.addHandler(handler)
+    root_logger.setLevel(logging.DEBUG)
+
+
+def time_rows(row_function,
+              rows: int):
+    """
+    ### Summary:
+        This function will time logging for a number of rows in the thread
+        that logs.
+
+    ### Args:
+        row_function (function):
+            The function that logs for one row.
+        rows (int):
+            The number of rows.
+
+    ### Returns:
+        float: The number of microseconds for each row.
+    """
+
+    start_time = time.perf_counter()
+
+    for row_number in range(rows):
+        row_function(row_number = row_number % 100)
+
+    return (time.perf_counter() - start_time) / rows * 1_000_000
+
+
+def main():
+    parser = argparse.ArgumentParser(description = "Compare the time that logging adds to each row with the old logging and the queue based logging.")
+    parser.add_argument("--rows", type = int, default = 2000,
+                        help = "The number of rows to log for in each run (default: 2000).")
+    parser.add_argument("--repeat", type = int, default = 5,
+                        help = "The number of runs for each mode (default: 5).")
+    parser.add_argument("--json",
+                        help = "A file to save the results to as JSON.")
+    args = parser.parse_args()
+
+    os.environ.setdefault("SCRAPER_APP_NAME", "scraper")
+    results = {"rows": args.rows, "records_per_row": RECORDS_PER_ROW}
+
+    with tempfile.TemporaryDirectory() as log_dir:
+        legacy_logging(log_file = f"{log_dir}/legacy.log")
+        timings = [time_rows(row_function = legacy_row, rows = args.rows) for _ in range(args.repeat)]
+        results["legacy"] = {"row_median_us": round(statistics.median(timings), 1)}
+
+        for log_format in ("text", "json"):
+            logger(name = __name__,
+                   log_folder = f"{log_dir}/queued-{log_format}.log",
+                   log_format = log_format)
+            timings = [time_rows(row_function = queued_row, rows = args.rows) for _ in range(args.repeat)]
+
+            # -- Time how long the listener takes to write what is left, which
+            # -- is not part of the time for each row:
+            drain_start_time = time.perf_counter()
+            stop_logging()
+            results[f"queued_{log_format}"] = {"row_median_us": round(statistics.median(timings), 1),
+                                               "drain_ms": round((time.perf_counter() - drain_start_time) * 1000, 1)}
+
+        for mode in ("legacy", "queued_text", "queued_json"):
+            log_file = Path(log_dir) / f"{mode.replace('_', '-')}.log"
+            results[mode]["log_lines"] = sum(1 for _ in open(log_file, encoding = "utf-8"))
+
+    results["text_speedup"] = round(results["legacy"]["row_median_us"] / results["queued_text"]["row_median_us"], 2)
+    results["json_speedup"] = round(results["legacy"]["row_median_us"] / results["queued_json"]["row_median_us"], 2)
+
+    print(f"Logged {RECORDS_PER_ROW} record(s) for each of {args.rows} row(s), median of {args.repeat} run(s):")
+    print(f"{'':<32} {'us per row':>10} {'drain ms':>10}")
+
+    for mode, name in (("legacy", "inspect.stack + FileHandler"), ("queued_text", "get_logger + queue (text)"), ("queued_json", "get_logger + queue (json)")):
+        print(f"{name:<32} {results[mode]['row_median_us']:>10.1f} {results[mode].get('drain_ms', 0.0):>10.1f}")
+
+    print(f"Logging adds {results['text_speedup']}x less time to each row with the queue "
+          f"({results['json_speedup']}x with JSON lines).")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent = 2), encoding = "utf-8")
+        print(f"Results saved to {args.json}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+# -- Import required libraries / modules:
+from pathlib import Path
+
+from modules.config import ALL_SITES_DIR, CONNECT_TIMEOUT, READ_TIMEOUT, SETTINGS_DIR
+from modules.http_session import get_session
+from modules.parsers import available_parsers, parse_html
+
+import argparse
+import json
+import pandas as pd
+import statistics
+import time
+
+
+def collect_pages(sites_dir: str, 
+                  html_files: list):
+    """
+    ### Summary:
+        This function will collect the pages to benchmark the parsers with. 
+        Each URL in the pages.xlsx file of every site folder is downloaded
+        once and any local HTML files are read.
+
+    ### Args:
+        sites_dir (str): 
+            The folder that holds the site folders.
+        html_files (list): 
+            A list of paths to local HTML files to include.
+
+    ### Returns:
+        dict: The HTML for each page, keyed by a name for the page.
+    """
+    
+    pages = {}
+    headers_df = pd.read_excel(io = f"{SETTINGS_DIR}headers.xlsx")
+    user_agents = dict(zip(headers_df.browser, headers_df.user_agent))
+    
+    for pages_file in sorted(Path(sites_dir).glob("*/pages.xlsx")):
+        for row in pd.read_excel(io = pages_file, engine = "openpyxl").itertuples():
+            name = f"{pages_file.parent.name}/{row.nickname}"
+            
+            try:
+                response = get_session().get(url = str(row.url),
+                                             headers = {"User-Agent": user_agents.get(row.browser_to_use, "")},
+                                             timeout = (CONNECT_TIMEOUT, READ_TIMEOUT))
+            except Exception as e:
+                print(f"Skipping {name}: {e!r}.")
+                continue
+            
+            if response.status_code != 200:
+                print(f"Skipping {name}: the response code was {response.status_code}.")
+                continue
+            
+            pages[name] = response.text
+    
+    for html_file in html_files:
+        pages[Path(html_file).name] = Path(html_file).read_text(encoding = "utf-8", errors = "replace")
+    
+    return pages
+
+
+def benchmark_parsers(pages: dict, 
+                      repeat: int):
+    """
+    ### Summary:
+        This function will time how long each parser that is installed takes
+        to parse each page.
+
+    ### Args:
+        pages (dict): 
+            The HTML for each page, keyed by a name for the page.
+        repeat (int): 
+            The number of times to parse each page with each parser.
+
+    ### Returns:
+        list: A dictionary of results for each page and parser.
+    """
+    
+    results = []
+    
+    for name, markup in pages.items():
+        for parser in available_parsers():
+            timings = []
+            
+            for _ in range(repeat):
+                start_time = time.perf_counter()
+                parse_html(markup = markup, parser = parser)
+                timings.append(time.perf_counter() - start_time)
+            
+            median_seconds = statistics.median(timings)
+            results.append({"page": name,
+                            "parser": parser,
+                            "bytes": len(markup.encode("utf-8")),
+                            "median_ms": round(median_seconds * 1000, 3),
+                            "mb_per_second": round(len(markup.encode("utf-8")) / median_seconds / 1_000_000, 2)})
+    
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description = "Compare the speed of the HTML parsers on the pages of the bundled sites.")
+    parser.add_argument("--sites-dir", default = ALL_SITES_DIR, 
+                        help = "The folder that holds the site folders (default: the sites folder).")
+    parser.add_argument("--html-file", action = "append", default = [], 
+                        help = "A local HTML file to include. Can be given more than once.")
+    parser.add_argument("--repeat", type = int, default = 5, 
+                        help = "The number of times to parse each page with each parser (default: 5).")
+    parser.add_argument("--json", 
+                        help = "A file to save the results to as JSON.")
+    args = parser.parse_args()
+    
+    pages = collect_pages(sites_dir = args.sites_dir, 
+                          html_files = args.html_file)
+    
+    if pages == {}:
+        print("There are no pages to benchmark.")
+        return
+    
+    results = benchmark_parsers(pages = pages, 
+                                repeat = args.repeat)
+    
+    print(f"{'page':<40} {'parser':<12} {'bytes':>10} {'median ms':>10} {'MB/s':>8}")
+    
+    for result in results:
+        print(f"{result['page']:<40} {result['parser']:<12} {result['bytes']:>10} "
+              f"{result['median_ms']:>10.2f} {result['mb_per_second']:>8.2f}")
+    
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent = 2), encoding = "utf-8")
+        print(f"Results saved to {args.json}.")
+
+
+if __name__ == "__main__":
+    main()
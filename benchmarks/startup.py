@@ -0,0 +1,133 @@
+# -- Import required libraries / modules:
+from pathlib import Path
+
+from modules.config import ALL_SITES_DIR, APP_DIR, SETTINGS_DIR, SITE_SETTINGS_FILE
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+
+
+# -- The code that is run in a new Python process to time importing the
+# -- modules needed and then loading the spreadsheets:
+LOAD_SPREADSHEETS = """
+import json, sys, time
+start_time = time.perf_counter()
+from modules.spreadsheets import read_spreadsheet
+import_time = time.perf_counter()
+for spreadsheet in json.loads(sys.argv[1]):
+    read_spreadsheet(io = spreadsheet, use_cache = sys.argv[2] == "cached", cache_dir = sys.argv[3])
+print(import_time - start_time, time.perf_counter() - import_time)
+"""
+
+
+def collect_spreadsheets(sites_dir: str):
+    """
+    ### Summary:
+        This function will collect the spreadsheets that are read when the
+        application starts: the ones in the settings folder and the pages.xlsx
+        and settings.xlsx files for each site.
+
+    ### Args:
+        sites_dir (str):
+            The folder that holds the site folders.
+
+    ### Returns:
+        list: The paths to the spreadsheets.
+    """
+
+    spreadsheets = [f"{SETTINGS_DIR}allowed-http-responses.xlsx", f"{SETTINGS_DIR}headers.xlsx"]
+
+    for site_folder in sorted(Path(sites_dir).iterdir()):
+        for file_name in ("pages.xlsx", SITE_SETTINGS_FILE):
+            if (site_folder / file_name).is_file():
+                spreadsheets.append(str(site_folder / file_name))
+
+    return spreadsheets
+
+
+def time_startup(spreadsheets: list,
+                 mode: str,
+                 cache_dir: str):
+    """
+    ### Summary:
+        This function will time loading the spreadsheets in a new Python
+        process.
+
+    ### Args:
+        spreadsheets (list):
+            The paths to the spreadsheets.
+        mode (str):
+            excel to read the spreadsheets with pd.read_excel or cached to use
+            the spreadsheet cache.
+        cache_dir (str):
+            The folder for the spreadsheet cache.
+
+    ### Returns:
+        tuple: The number of seconds it took to import the modules and to
+        load the spreadsheets.
+    """
+
+    result = subprocess.run([sys.executable, "-c", LOAD_SPREADSHEETS, json.dumps(spreadsheets), mode, cache_dir],
+                            cwd = APP_DIR,
+                            capture_output = True,
+                            text = True,
+                            check = True)
+
+    import_seconds, load_seconds = result.stdout.strip().splitlines()[-1].split()
+
+    return float(import_seconds), float(load_seconds)
+
+
+def main():
+    parser = argparse.ArgumentParser(description = "Compare the time it takes to load the spreadsheets at startup with and without the spreadsheet cache.")
+    parser.add_argument("--sites-dir", default = ALL_SITES_DIR,
+                        help = "The folder that holds the site folders (default: the sites folder).")
+    parser.add_argument("--repeat", type = int, default = 5,
+                        help = "The number of times to start a process for each mode (default: 5).")
+    parser.add_argument("--json",
+                        help = "A file to save the results to as JSON.")
+    args = parser.parse_args()
+
+    spreadsheets = collect_spreadsheets(sites_dir = args.sites_dir)
+
+    # -- Use an empty cache so that the results are the same on every run:
+    with tempfile.TemporaryDirectory() as cache_dir:
+        # -- Fill the cache before timing it:
+        time_startup(spreadsheets = spreadsheets,
+                     mode = "cached",
+                     cache_dir = cache_dir)
+
+        results = {"spreadsheets": len(spreadsheets)}
+
+        for mode in ("excel", "cached"):
+            timings = [time_startup(spreadsheets = spreadsheets,
+                                    mode = mode,
+                                    cache_dir = cache_dir) for _ in range(args.repeat)]
+            results[mode] = {"import_median_ms": round(statistics.median([timing[0] for timing in timings]) * 1000, 1),
+                             "load_median_ms": round(statistics.median([timing[1] for timing in timings]) * 1000, 1),
+                             "total_median_ms": round(statistics.median([sum(timing) for timing in timings]) * 1000, 1)}
+
+    results["load_speedup"] = round(results["excel"]["load_median_ms"] / max(results["cached"]["load_median_ms"], 0.1), 2)
+    results["total_speedup"] = round(results["excel"]["total_median_ms"] / results["cached"]["total_median_ms"], 2)
+
+    print(f"Loaded {results['spreadsheets']} spreadsheet(s) in a new process, median of {args.repeat} run(s):")
+    print(f"{'':<20} {'import ms':>10} {'load ms':>10} {'total ms':>10}")
+
+    for mode, name in (("excel", "pd.read_excel"), ("cached", "spreadsheet cache")):
+        print(f"{name:<20} {results[mode]['import_median_ms']:>10.1f} {results[mode]['load_median_ms']:>10.1f} "
+              f"{results[mode]['total_median_ms']:>10.1f}")
+
+    print(f"Loading the spreadsheets is {results['load_speedup']}x faster with the cache "
+          f"({results['total_speedup']}x including the imports).")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent = 2), encoding = "utf-8")
+        print(f"Results saved to {args.json}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,298 @@
+# -- Import required libraries / modules:
+from datetime import datetime
+from pathlib import Path
+
+from benchmarks.fixtures import FixtureServer, write_site
+from modules.config import APP_DIR
+
+import argparse
+import importlib.util
+import json
+import os
+import pandas as pd
+import platform
+import subprocess
+import sys
+import tempfile
+
+
+# -- The scenarios that are run, each with the kind of pages and the paths on
+# -- the fixture server that the pages are taken from in turn. A crawl starts
+# -- from the paths and crawls the number of pages for each site:
+SCENARIOS = {
+    "large_tables": {"kind": "table",
+                     "paths": ["/table/2000/{number}"],
+                     "description": "Pages with a 2,000 row table, turned into dataframes."},
+    "streamed_tables": {"kind": "table_stream",
+                        "paths": ["/table/2000/{number}"],
+                        "description": "Pages with a 2,000 row table, streamed to the export buffer a row at a time."},
+    "crawl": {"kind": "table",
+              "paths": ["/catalogue/0"],
+              "crawl": True,
+              "description": "A crawl from one catalogue page, following links to other catalogue pages."},
+    "product_pages": {"kind": "product",
+                      "paths": ["/product/{number}"],
+                      "description": "Big product pages with the details picked out of them."},
+    "slow_and_errors": {"kind": "table",
+                        "paths": ["/slow/250/{number}", "/table/200/{number}", "/error/404/{number}", "/slow/50/{number}"],
+                        "description": "Slow pages, small pages and pages that return 404."},
+}
+
+# -- The folder that the results are saved to by default:
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+# -- The code that is run in a new Python process to run main.main for a
+# -- scenario and report the summaries, timings and peak memory use:
+RUN_MAIN = """
+import json, resource, sys, time
+from modules.metrics import MetricsRecorder
+import main
+settings = json.loads(sys.argv[1])
+start_time = time.perf_counter()
+site_summaries = main.main(**settings)
+run_seconds = time.perf_counter() - start_time
+run_metrics = MetricsRecorder()
+for site_summary in site_summaries:
+    run_metrics.merge(site_name = "scenario", site_metrics = site_summary.pop("metrics", {}))
+print(json.dumps({"summaries": site_summaries,
+                  "run_seconds": run_seconds,
+                  "metrics": run_metrics.report().get("scenario", {"stages": {}, "counters": {}, "samples": {}}),
+                  "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                  "children_max_rss_kb": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss}))
+"""
+
+
+def git_commit():
+    # -- The commit that was benchmarked, if the application is in a git repo:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd = APP_DIR, capture_output = True,
+                              text = True, check = True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def exported_rows(output_dir: Path):
+    """
+    ### Summary:
+        This function will count the rows and bytes in the files that the
+        export buffers wrote.
+
+    ### Args:
+        output_dir (Path):
+            The output folder for the run.
+
+    ### Returns:
+        tuple: The number of rows and bytes.
+    """
+
+    rows = 0
+    size = 0
+
+    for export_file in list(output_dir.glob("*/*/*/*/*.csv")) + list(output_dir.glob("*/*/*/*/*.parquet")):
+        if export_file.name == "dead-letter.csv":
+            continue
+
+        rows += len(pd.read_parquet(export_file) if export_file.suffix == ".parquet" else pd.read_csv(export_file))
+        size += export_file.stat().st_size
+
+    return rows, size
+
+
+def run_scenario(name: str,
+                 scenario: dict,
+                 base_url: str,
+                 work_dir: Path,
+                 pages: int,
+                 sites: int,
+                 fetch_workers: int,
+                 site_workers: int,
+                 parser: str,
+                 export_format: str):
+    """
+    ### Summary:
+        This function will create the site folders for a scenario and run
+        main.main for them in a new Python process, with the logs, output and
+        cache in a folder of their own.
+
+    ### Args:
+        name (str):
+            The name of the scenario.
+        scenario (dict):
+            The scenario from SCENARIOS.
+        base_url (str):
+            The URL of the fixture server.
+        work_dir (Path):
+            The folder for the sites, logs, output and cache of the run.
+        pages (int):
+            The number of pages for each site.
+        sites (int):
+            The number of sites (each a copy of the same pages).
+        fetch_workers (int):
+            The number of pages to fetch at the same time for each site.
+        site_workers (int):
+            The number of sites to process at the same time.
+        parser (str):
+            The parser to use.
+        export_format (str):
+            The format the export buffers write, csv or parquet.
+
+    ### Returns:
+        dict: The results for the scenario.
+    """
+
+    sites_dir = work_dir / "sites"
+    data_dir = work_dir / "data"
+
+    for site_number in range(sites):
+        write_site(sites_dir = sites_dir,
+                   site_name = f"{name}_{site_number}",
+                   urls = [base_url + scenario["paths"][number % len(scenario["paths"])].format(number = number) 
+                           for number in range(len(scenario["paths"]) if scenario.get("crawl") else pages)],
+                   kind = scenario["kind"],
+                   site_settings = {"requests_per_second": 0,
+                                    "parser": parser,
+                                    "export_buffer_format": export_format,
+                                    **({"crawl": True, "crawl_include": "/catalogue/", "crawl_max_depth": 10, "crawl_max_pages": pages} if scenario.get("crawl") else {})})
+
+    settings = {"fetch_workers": fetch_workers,
+                "site_workers": site_workers,
+                "use_http_cache": False,
+                "metrics_file": str(data_dir / "metrics.json"),
+                "sites_dir": str(sites_dir)}
+
+    result = subprocess.run([sys.executable, "-c", RUN_MAIN, json.dumps(settings)],
+                            cwd = APP_DIR,
+                            env = {**os.environ, "SCRAPER_DATA_DIR": str(data_dir)},
+                            capture_output = True,
+                            text = True)
+
+    if result.returncode != 0:
+        raise RuntimeError(f"The {name} scenario failed:\n{result.stderr[-2000:]}")
+
+    run = json.loads(result.stdout.strip().splitlines()[-1])
+    stages = run["metrics"]["stages"]
+    # -- The time taken to process the sites, which is the time for the whole
+    # -- run when they are processed at the same time:
+    seconds = run["run_seconds"] if site_workers > 1 else sum(site_summary["seconds"] for site_summary in run["summaries"])
+    rows, size = exported_rows(output_dir = data_dir / "output")
+    export_seconds = stages.get("export_buffer_flush", {}).get("total", 0.0)
+
+    return {"description": scenario["description"],
+            "pages": sum(site_summary["rows"] for site_summary in run["summaries"]),
+            "succeeded": sum(site_summary["succeeded"] for site_summary in run["summaries"]),
+            "failed": sum(site_summary["failed"] for site_summary in run["summaries"]),
+            "seconds": round(seconds, 3),
+            "pages_per_second": round(sum(site_summary["rows"] for site_summary in run["summaries"]) / max(seconds, 0.001), 2),
+            "fetch_p50_ms": round(stages.get("fetch", {}).get("p50", 0.0) * 1000, 1),
+            "fetch_p95_ms": round(stages.get("fetch", {}).get("p95", 0.0) * 1000, 1),
+            "parse_p95_ms": round(stages.get("parse", {}).get("p95", 0.0) * 1000, 1),
+            "process_soup_p95_ms": round(stages.get("process_soup", {}).get("p95", 0.0) * 1000, 1),
+            "peak_rss_mb": round(max(run["max_rss_kb"], run["children_max_rss_kb"]) / 1024, 1),
+            "page_rss_p95_mb": run["metrics"]["samples"].get("page_rss_mb", {}).get("p95"),
+            "page_rss_max_mb": run["metrics"]["samples"].get("page_rss_mb", {}).get("max"),
+            "bytes_downloaded": run["metrics"]["counters"].get("bytes_downloaded", 0),
+            "export_rows": rows,
+            "export_bytes": size,
+            "export_seconds": round(export_seconds, 3),
+            "export_rows_per_second": round(rows / export_seconds, 1) if export_seconds > 0 else None}
+
+
+def compare(results: dict, baseline_file: str):
+    """
+    ### Summary:
+        This function will print how the results compare to the results of an
+        earlier run.
+
+    ### Args:
+        results (dict):
+            The results of this run.
+        baseline_file (str):
+            The JSON file with the results of the earlier run.
+
+    ### Returns:
+        None
+    """
+
+    baseline = json.loads(Path(baseline_file).read_text(encoding = "utf-8"))
+    print(f"Compared with {baseline_file} (commit {baseline.get('git_commit')}):")
+
+    for name, scenario in results["scenarios"].items():
+        if name not in baseline["scenarios"]:
+            continue
+
+        changes = []
+
+        for metric in ("pages_per_second", "fetch_p95_ms", "peak_rss_mb", "page_rss_p95_mb", "export_rows_per_second"):
+            before = baseline["scenarios"][name].get(metric)
+            after = scenario.get(metric)
+
+            if before and after:
+                changes.append(f"{metric} {before} -> {after} ({(after - before) / before * 100:+.1f}%)")
+
+        print(f"  {name}: {', '.join(changes)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description = "Run main.main against generated sites served by a local HTTP server and report pages/sec, p95 latency, peak memory and export throughput.")
+    parser.add_argument("--scenarios", nargs = "+", choices = list(SCENARIOS), default = list(SCENARIOS),
+                        help = "The scenarios to run (default: all of them).")
+    parser.add_argument("--pages", type = int, default = 30,
+                        help = "The number of pages for each site (default: 30).")
+    parser.add_argument("--sites", type = int, default = 1,
+                        help = "The number of sites for each scenario (default: 1).")
+    parser.add_argument("--fetch-workers", type = int, default = 4,
+                        help = "The number of pages to fetch at the same time for each site (default: 4).")
+    parser.add_argument("--site-workers", type = int, default = 1,
+                        help = "The number of sites to process at the same time (default: 1).")
+    parser.add_argument("--parser", default = "html.parser",
+                        help = "The parser to use (default: html.parser).")
+    parser.add_argument("--json",
+                        help = "The file to save the results to (default: a new file in benchmarks/results).")
+    parser.add_argument("--compare",
+                        help = "A results file from an earlier run to compare with.")
+    args = parser.parse_args()
+
+    export_format = "parquet" if importlib.util.find_spec("pyarrow") != None else "csv"
+    results = {"created_at": datetime.now().isoformat(timespec = "seconds"),
+               "git_commit": git_commit(),
+               "python": platform.python_version(),
+               "platform": platform.platform(),
+               "cpu_count": os.cpu_count(),
+               "settings": {"pages": args.pages, "sites": args.sites, "fetch_workers": args.fetch_workers,
+                            "site_workers": args.site_workers, "parser": args.parser, "export_format": export_format},
+               "scenarios": {}}
+
+    with FixtureServer() as server:
+        for name in args.scenarios:
+            print(f"Running {name} ({args.sites} site(s) of {args.pages} page(s))...")
+
+            with tempfile.TemporaryDirectory() as work_dir:
+                results["scenarios"][name] = run_scenario(name = name,
+                                                          scenario = SCENARIOS[name],
+                                                          base_url = server.base_url,
+                                                          work_dir = Path(work_dir),
+                                                          pages = args.pages,
+                                                          sites = args.sites,
+                                                          fetch_workers = args.fetch_workers,
+                                                          site_workers = args.site_workers,
+                                                          parser = args.parser,
+                                                          export_format = export_format)
+
+    print(f"{'scenario':<18} {'pages/s':>8} {'fetch p95 ms':>13} {'peak MB':>8} {'page p95 MB':>12} {'export rows/s':>14}")
+
+    for name, scenario in results["scenarios"].items():
+        print(f"{name:<18} {scenario['pages_per_second']:>8.2f} {scenario['fetch_p95_ms']:>13.1f} "
+              f"{scenario['peak_rss_mb']:>8.1f} {scenario['page_rss_p95_mb'] or 0:>12.1f} {scenario['export_rows_per_second'] or 0:>14.1f}")
+
+    json_file = Path(args.json) if args.json else RESULTS_DIR / f"suite-{datetime.now():%Y%m%d-%H%M%S}.json"
+    json_file.parent.mkdir(parents = True, exist_ok = True)
+    json_file.write_text(json.dumps(results, indent = 2), encoding = "utf-8")
+    print(f"Results saved to {json_file}.")
+
+    if args.compare:
+        compare(results = results,
+                baseline_file = args.compare)
+
+
+if __name__ == "__main__":
+    main()
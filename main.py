@@ -1,17 +1,175 @@
 # -- Import required libraries / modules:
-from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date, datetime
 from pathlib import Path
 
-from modules.config import ALL_SITES_DIR, LOGS_DIR, OUTPUT_DIR, SETTINGS_DIR, logger
+from modules.checkpoint import clear_checkpoints, finish_checkpoints
+from modules.config import ALL_SITES_DIR, ARCHIVE_DIR, FETCH_WORKERS, HTTP_CACHE_ENABLED, LOG_FORMAT, LOG_FORMATS, LOGS_DIR, OUTPUT_DIR, SETTINGS_DIR, SITE_WORKERS, WORK_QUEUE_FILE
 from modules.get_os_details import get_os_summary
-from modules.scraper import processor
+from modules.http_session import close_session
+from modules.log_setup import logger
+from modules.metrics import MetricsRecorder, write_metrics_json, write_metrics_prometheus
+from modules.request_settings import compile_allowed_http_responses, compile_browser_headers
+from modules.scraper import load_all_site_processors, run_site
+from modules.spreadsheets import read_spreadsheet
+from modules.work_queue import WorkQueue, enqueue_sites, merge_site_summaries, run_worker
 
-import inspect
+import argparse
+import logging
 import os
-import pandas as pd
+import signal
+import sys
+import time
 
 
-def main():
+def parse_args():
+    """
+    ### Summary:
+        This will parse the command line arguments that the program has been
+        run with.
+    
+    ### Args:
+        None.
+    
+    ### Returns:
+        argparse.Namespace: The parsed command line arguments.
+    """
+    
+    parser = argparse.ArgumentParser(description = "Scrape the pages for each site in the sites folder.")
+    
+    parser.add_argument("--sites-dir",
+                        default = ALL_SITES_DIR,
+                        help = f"The folder that holds the site folders (default: {ALL_SITES_DIR}).")
+    
+    parser.add_argument("--fetch-workers",
+                        type = int,
+                        default = FETCH_WORKERS,
+                        help = f"The number of pages to fetch at the same time for each site (default: {FETCH_WORKERS}).")
+    
+    parser.add_argument("--site-workers",
+                        type = int,
+                        default = SITE_WORKERS,
+                        help = f"The number of site folders to process at the same time, each in its own process (default: {SITE_WORKERS}).")
+    
+    parser.add_argument("--no-http-cache",
+                        dest = "use_http_cache",
+                        action = "store_false",
+                        default = HTTP_CACHE_ENABLED,
+                        help = "Download every page in full instead of only the pages that have changed since they were cached.")
+    
+    parser.add_argument("--process-unchanged",
+                        dest = "skip_unchanged",
+                        action = "store_false",
+                        default = True,
+                        help = "Process every page, even for sites with a dedupe_mode whose pages haven't changed since they were last processed.")
+    
+    parser.add_argument("--resume",
+                        action = "store_true",
+                        default = False,
+                        help = "Carry on from where the last run stopped, skipping the rows that it had already done.")
+    
+    archive_mode = parser.add_mutually_exclusive_group()
+    
+    archive_mode.add_argument("--record",
+                              dest = "archive_mode",
+                              action = "store_const",
+                              const = "record",
+                              help = f"Save the responses for each site to an archive in {ARCHIVE_DIR} as they are downloaded.")
+    
+    archive_mode.add_argument("--replay",
+                              dest = "archive_date",
+                              nargs = "?",
+                              const = date.today().isoformat(),
+                              default = None,
+                              metavar = "YYYY-MM-DD",
+                              help = "Process the pages saved to the archive for each site on the day given (default: today) instead of downloading them.")
+    
+    queue_mode = parser.add_mutually_exclusive_group()
+    
+    queue_mode.add_argument("--enqueue",
+                            dest = "queue_mode",
+                            action = "store_const",
+                            const = "enqueue",
+                            help = "Add the rows in the pages.xlsx file of each site to the work queue and exit.")
+    
+    queue_mode.add_argument("--worker",
+                            dest = "queue_mode",
+                            action = "store_const",
+                            const = "worker",
+                            help = "Process rows from the work queue until it is empty. --site-workers starts that many workers.")
+    
+    parser.add_argument("--log-format",
+                        choices = LOG_FORMATS,
+                        default = LOG_FORMAT,
+                        help = f"The format of the log files, text or json (one JSON object for each record, with the site, page and URL being processed) (default: {LOG_FORMAT}).")
+    
+    parser.add_argument("--metrics-file",
+                        default = None,
+                        help = "The file to save the timings report for the run to as JSON (default: metrics-<time>.json in today's logs folder).")
+    
+    parser.add_argument("--prometheus-file",
+                        default = None,
+                        help = "A file to also save the timings report to in the Prometheus text format, e.g. for the node exporter textfile collector.")
+    
+    parser.add_argument("--queue-file",
+                        default = WORK_QUEUE_FILE,
+                        help = f"The work queue database, which can be on a shared drive for workers on other hosts (default: {WORK_QUEUE_FILE}).")
+    
+    return parser.parse_args()
+
+
+def print_run_summary(site_summaries: list, 
+                      run_seconds: float,
+                      log: logging.Logger):
+    """
+    ### Summary:
+        This will print and log a summary of how each site got on during the
+        run.
+    
+    ### Args:
+        site_summaries (list): 
+            A list of the dictionaries returned by run_site.
+        run_seconds (float): 
+            How long the whole run took.
+        log (logging.Logger): 
+            The logger to write the summary to.
+    
+    ### Returns:
+        None.
+    """
+    
+    summary_lines = [f"{'site':<30} {'status':<10} {'rows':>6} {'ok':>6} {'failed':>6} {'same':>6} {'resumed':>7} {'seconds':>9}"]
+    
+    for site_summary in sorted(site_summaries, key = lambda item: item["site_name"]):
+        summary_lines.append(f"{site_summary['site_name']:<30} {site_summary['status']:<10} "
+                             f"{site_summary['rows']:>6} {site_summary['succeeded']:>6} "
+                             f"{site_summary['failed']:>6} {site_summary.get('unchanged', 0):>6} "
+                             f"{site_summary.get('resumed', 0):>7} "
+                             f"{site_summary['seconds']:>9.2f}")
+    
+    summary_lines.append(f"Processed {len(site_summaries)} site(s) in {run_seconds:.2f} seconds.")
+    
+    print("\n".join(summary_lines))
+    
+    for line in summary_lines:
+        log.info(line)
+    
+    return
+
+
+def main(fetch_workers: int = FETCH_WORKERS,
+         site_workers: int = SITE_WORKERS,
+         use_http_cache: bool = HTTP_CACHE_ENABLED,
+         skip_unchanged: bool = True,
+         resume: bool = False,
+         queue_mode: str = None,
+         queue_file: str = WORK_QUEUE_FILE,
+         metrics_file: str = None,
+         prometheus_file: str = None,
+         log_format: str = LOG_FORMAT,
+         archive_mode: str = None,
+         archive_date: str = None,
+         sites_dir: str = ALL_SITES_DIR):
     """
     ### Summary:
         This is the main entry point into the program. It will:
@@ -20,13 +178,53 @@ def main():
         - Gather the operating system information. This is used for filtering 
           which web browser and settings to use for scraping later on.
         - Cycle through the sites folder and run actions against each folders
-          contents.
+          contents, either one after another or in parallel processes.
+        - Print a summary of how each site got on.
     
     ### Args:
-        None.
+        fetch_workers (int, optional): 
+            The number of pages to fetch at the same time for each site.
+            Defaults to FETCH_WORKERS.
+        site_workers (int, optional): 
+            The number of site folders to process at the same time, each in
+            its own process. Defaults to SITE_WORKERS.
+        use_http_cache (bool, optional): 
+            Whether to use the HTTP cache so that pages are only downloaded
+            again if they have changed. Defaults to HTTP_CACHE_ENABLED.
+        skip_unchanged (bool, optional): 
+            Whether to skip pages that haven't changed since they were last
+            processed, for sites with a dedupe_mode. Defaults to True.
+        resume (bool, optional): 
+            Whether to carry on from where the last run stopped, using the
+            checkpoint journal for each site. Defaults to False.
+        queue_mode (str, optional): 
+            enqueue to add the rows for each site to the work queue, worker to
+            process rows from the work queue or None to process each site
+            directly. Defaults to None.
+        queue_file (str, optional): 
+            The work queue database. Defaults to WORK_QUEUE_FILE.
+        metrics_file (str, optional): 
+            The file to save the timings report for the run to as JSON.
+            Defaults to None (metrics-<time>.json in today's logs folder).
+        prometheus_file (str, optional): 
+            A file to also save the timings report to in the Prometheus text
+            format. Defaults to None (not saved).
+        log_format (str, optional): 
+            The format of the log files, text or json. Defaults to LOG_FORMAT.
+        archive_mode (str, optional): 
+            record to save the responses for each site to an archive or replay
+            to process the pages in the archive instead of downloading them.
+            Defaults to None (neither).
+        archive_date (str, optional): 
+            The day to replay the archive for, as YYYY-MM-DD.
+            Defaults to None (today).
+        sites_dir (str, optional): 
+            The folder that holds the site folders. Defaults to ALL_SITES_DIR.
     
     ### Returns:
-        None.
+        list: The summary from run_site for each site that was processed, 
+        or None if the program stopped before processing any sites (e.g. 
+        with the enqueue queue_mode).
     """
     
     # -- Create logging folder:
@@ -44,10 +242,12 @@ def main():
     os.environ['SCRAPER_APP_NAME'] = str("scraper")
     
     # -- Initialise logging:
-    log_main = logger(name = f"{os.getenv('SCRAPER_APP_NAME')}.main.{inspect.stack()[0][3]}", 
-                      log_folder = f"{os.getenv('TODAYS_LOGS_DIR')}/main.log")
+    log_main = logger(name = f"{os.getenv('SCRAPER_APP_NAME')}.main.main", 
+                      log_folder = f"{os.getenv('TODAYS_LOGS_DIR')}/main.log",
+                      log_format = log_format)
             
     log_main.info("===== Starting program =====")
+    run_start_time = time.perf_counter()
     
     # -- Set the name of the folder to save files to:
     output_folder = Path(f"{OUTPUT_DIR}")
@@ -63,11 +263,11 @@ def main():
     # -- Folders for various settings:
     SITE_FILES = ["pages.xlsx", "processor.py"]
     
-    # -- Create a list of all the sub-folders in ALL_SITES_DIR.
-    log_main.info(f"Collecting sites list from {ALL_SITES_DIR}.")
+    # -- Create a list of all the sub-folders in sites_dir.
+    log_main.info(f"Collecting sites list from {sites_dir}.")
     
     SITE_FOLDER_CONTENTS = [folder_name for folder_name in \
-                            Path(ALL_SITES_DIR).iterdir() \
+                            Path(sites_dir).iterdir() \
                             if not folder_name.name.startswith(".") \
                             if folder_name.is_dir()]
 
@@ -77,7 +277,7 @@ def main():
     log_main.info(f"Loading allowed-http-responses.xlsx in {SETTINGS_DIR}.")
     
     try:
-        allowed_http_responses_df = pd.read_excel(io = allowed_http_responses_file)
+        allowed_http_responses_df = read_spreadsheet(io = allowed_http_responses_file)
     except (FileNotFoundError, IOError) as e:
         log_main.error(f"Could not find allowed-http-responses.xlsx file in {SETTINGS_DIR}. Exiting the program.")
         print(f"Error: Could not find allowed-http-responses.xlsx file in {SETTINGS_DIR}. Exiting the program.")
@@ -90,7 +290,7 @@ def main():
     log_main.info(f"Loading headers.xlsx in {SETTINGS_DIR}.")
     
     try:
-        browser_headers_df = pd.read_excel(io = browser_headers_file)
+        browser_headers_df = read_spreadsheet(io = browser_headers_file)
     except (FileNotFoundError, IOError) as e:
         log_main.error(f"Could not find headers.xlsx file in {SETTINGS_DIR}. Exiting the program.")
         print(f"Error: Could not find headers.xlsx file in {SETTINGS_DIR}. Exiting the program.")
@@ -103,7 +303,10 @@ def main():
     log_main.info("Collecting Operating System Information.")
     OS_INFO = get_os_summary()
 
-    # -- Cycle through the folders in SITE_FOLDER_CONTENTS:
+    # -- Cycle through the folders in SITE_FOLDER_CONTENTS and collect the ones
+    # -- that can be processed:
+    folders_to_process = []
+    
     for folder in SITE_FOLDER_CONTENTS:
         # -- Check if pages and processor files are files (True or False):
         pages_file = Path(f"{folder}/{SITE_FILES[0]}").is_file()
@@ -114,13 +317,7 @@ def main():
         # -- Check if pages and processor files are present or not:
         if pages_file == True and processor_file == True:
             log_main.info(f"{SITE_FILES[0]} and {SITE_FILES[1]} are present in {folder}.")
-            log_main.info(f"Executing scraping and processing of sites in {folder}/{SITE_FILES[0]}.")            
-            
-            # -- Execute the processor:
-            processor(browser_headers_os = browser_headers_df.loc[\
-                                (browser_headers_df.os == OS_INFO["os_type"])],
-                      allowed_http_responses = allowed_http_responses_df.values,
-                      site_folder = folder)
+            folders_to_process.append(folder)
 
         else:
             if pages_file == False:
@@ -130,12 +327,163 @@ def main():
             
             log_main.warning(f"Check that {SITE_FILES[0]} and {SITE_FILES[1]} are present in {folder}.")
             log_main.warning(f"Skipping processing {folder}.")
+    
+    # -- Add the rows for each site to the work queue for the workers to do:
+    if queue_mode == "enqueue":
+        queue = WorkQueue(db_path = queue_file)
+        added = enqueue_sites(queue = queue, 
+                              site_folders = folders_to_process)
+        queue_counts = queue.counts()
+        queue.close()
+        
+        print(f"Added {sum(added.values())} row(s) for {len(added)} site(s) to {queue_file}. Queue: {queue_counts}.")
+        log_main.info(f"Added {sum(added.values())} row(s) for {len(added)} site(s) to {queue_file}. Queue: {queue_counts}.")
+        log_main.info("===== Stopping program =====")
+        
+        return
+    
+    # -- Import the processor.py file for each site once, up front. When the
+    # -- sites are processed in their own processes, the processes start with
+    # -- these already imported:
+    log_main.info(f"Importing the processor.py files for {len(folders_to_process)} site(s).")
+    import_start_time = time.perf_counter()
+    load_all_site_processors(site_folders = folders_to_process)
+    log_main.info(f"Importing the processor.py files completed in {time.perf_counter() - import_start_time:.4f} seconds.")
+    
+    # -- Settings that are passed to the processor for each site:
+    site_settings = {"browser_headers": compile_browser_headers(browser_headers_df = browser_headers_df,
+                                                                os_type = OS_INFO["os_type"]),
+                     "allowed_http_responses": compile_allowed_http_responses(allowed_http_responses_df = allowed_http_responses_df),
+                     "fetch_workers": fetch_workers,
+                     "output_dir": str(output_folder),
+                     "use_http_cache": use_http_cache,
+                     "skip_unchanged": skip_unchanged,
+                     "resume": resume,
+                     "archive_mode": archive_mode,
+                     "archive_date": archive_date}
+    
+    # -- Start from the beginning unless the last run is being resumed. The
+    # -- work queue keeps track of the rows itself and replaying the archive
+    # -- doesn't use the checkpoints:
+    if queue_mode == "worker" or archive_mode == "replay":
+        pass
+    elif resume == True:
+        log_main.info("Resuming the last run.")
+    else:
+        clear_checkpoints()
+    
+    site_summaries = []
+    
+    if queue_mode == "worker":
+        # -- Process rows from the work queue, in site_workers processes:
+        log_main.info(f"Processing rows from the work queue {queue_file} using {site_workers} worker(s).")
+        
+        if site_workers <= 1:
+            site_summaries = run_worker(queue_file = queue_file, 
+                                        sites_dir = sites_dir,
+                                        **site_settings)
+        else:
+            with ProcessPoolExecutor(max_workers = site_workers,
+                                     initializer = logger,
+                                     initargs = (log_main.name, f"{TODAYS_LOGS_DIR}/main.log", log_format)) as executor:
+                futures = [executor.submit(run_worker, queue_file = queue_file, sites_dir = sites_dir, **site_settings) 
+                           for _ in range(site_workers)]
+                
+                for future in as_completed(futures):
+                    try:
+                        site_summaries.extend(future.result())
+                    except Exception as e:
+                        # -- The rows the worker had leased are done again once
+                        # -- their leases expire:
+                        log_main.error(f"A work queue worker crashed: {e!r}.")
+            
+            # -- Each worker can have done rows for the same site:
+            site_summaries = merge_site_summaries(site_summaries = site_summaries)
+    elif site_workers <= 1:
+        # -- Execute the processor for each site, one after another:
+        for folder in folders_to_process:
+            log_main.info(f"Executing scraping and processing of sites in {folder}/{SITE_FILES[0]}.")
+            site_summaries.append(run_site(site_folder = folder, **site_settings))
+    else:
+        # -- Execute the processor for each site in its own process. Each
+        # -- process sets up logging again so that it writes to main.log too:
+        log_main.info(f"Processing {len(folders_to_process)} site(s) using {site_workers} processes.")
+        
+        with ProcessPoolExecutor(max_workers = site_workers,
+                                 initializer = logger,
+                                 initargs = (log_main.name, f"{TODAYS_LOGS_DIR}/main.log", log_format)) as executor:
+            futures = {}
+            
+            for folder in folders_to_process:
+                log_main.info(f"Executing scraping and processing of sites in {folder}/{SITE_FILES[0]}.")
+                futures[executor.submit(run_site, site_folder = folder, **site_settings)] = folder
+            
+            for future in as_completed(futures):
+                try:
+                    site_summaries.append(future.result())
+                except Exception as e:
+                    # -- The process for the site died before it could 
+                    # -- return a summary:
+                    log_main.error(f"The process for {futures[future]} crashed: {e!r}.")
+                    site_summaries.append({"site_name": Path(futures[future]).name, "status": "crashed", 
+                                           "rows": 0, "succeeded": 0, "failed": 0, "unchanged": 0, "resumed": 0, "seconds": 0.0, 
+                                           "error": repr(e)})
+    
+    run_seconds = time.perf_counter() - run_start_time
+    
+    print_run_summary(site_summaries = site_summaries,
+                      run_seconds = run_seconds,
+                      log = log_main)
+    
+    # -- Save the timings for each site, which may have come from other 
+    # -- processes:
+    run_metrics = MetricsRecorder()
+    
+    for site_summary in site_summaries:
+        run_metrics.merge(site_name = site_summary["site_name"],
+                          site_metrics = site_summary.get("metrics", {}))
+    
+    metrics_report = run_metrics.report()
+    metrics_file = metrics_file or f"{TODAYS_LOGS_DIR}/metrics-{datetime.now():%H%M%S}.json"
+    write_metrics_json(report = metrics_report,
+                       metrics_file = metrics_file,
+                       run_seconds = run_seconds)
+    log_main.info(f"Timings report saved to {metrics_file}.")
+    
+    if prometheus_file != None:
+        write_metrics_prometheus(report = metrics_report,
+                                 prometheus_file = prometheus_file)
+        log_main.info(f"Timings report saved to {prometheus_file} in the Prometheus format.")
 
+    # -- The journals are only removed if no site crashed, so that --resume 
+    # -- doesn't do the sites that completed again:
+    if queue_mode == None and archive_mode != "replay":
+        finish_checkpoints(site_summaries = site_summaries)
+
+    # -- Close any connections that are still open:
+    close_session()
+    
     # -- Complete the program:
     log_main.info("===== Stopping program =====")
     
-    return
+    return site_summaries
 
 # Run the program:
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    # -- Exit cleanly when asked to stop so that any buffered output is saved:
+    signal.signal(signal.SIGTERM, lambda signal_number, frame: sys.exit(128 + signal_number))
+    
+    args = parse_args()
+    main(fetch_workers = args.fetch_workers,
+         site_workers = args.site_workers,
+         use_http_cache = args.use_http_cache,
+         skip_unchanged = args.skip_unchanged,
+         resume = args.resume,
+         queue_mode = args.queue_mode,
+         queue_file = args.queue_file,
+         metrics_file = args.metrics_file,
+         prometheus_file = args.prometheus_file,
+         log_format = args.log_format,
+         archive_mode = "replay" if args.archive_date != None else args.archive_mode,
+         archive_date = args.archive_date,
+         sites_dir = args.sites_dir)
\ No newline at end of file
@@ -0,0 +1,335 @@
+# -- Import required libraries / modules:
+from datetime import date, datetime, timezone
+from pathlib import Path
+from threading import Lock
+
+from modules.config import ARCHIVE_COMPRESS_LEVEL, ARCHIVE_DIR
+from modules.log_setup import get_logger
+
+import gzip
+import json
+import uuid
+
+
+# -- The headers that are not saved with a response, as the body is saved
+# -- after it has been decompressed and put back together:
+SKIPPED_HEADERS = ("content-encoding", "content-length", "transfer-encoding")
+
+
+def archive_file(site_name: str,
+                 archive_date: str = None,
+                 file_tag: str = None,
+                 archive_dir: str = ARCHIVE_DIR):
+    """
+    ### Summary:
+        This function will work out the path to the archive for a site on a
+        given day. The index for the archive is saved next to it, with
+        .index.jsonl in place of .warc.gz.
+
+    ### Args:
+        site_name (str):
+            The name of the site folder that is used.
+        archive_date (str, optional):
+            The day as YYYY-MM-DD. Defaults to None (today).
+        file_tag (str, optional):
+            Added to the name of the file, e.g. so that each work queue worker
+            has its own archive. Defaults to None.
+        archive_dir (str, optional):
+            The folder for the archives. Defaults to ARCHIVE_DIR.
+
+    ### Returns:
+        Path: The path to the archive.
+    """
+
+    archive_date = archive_date or date.today().isoformat()
+    file_name = f"{archive_date}-{file_tag}" if file_tag != None else archive_date
+
+    return Path(archive_dir) / site_name / f"{file_name}.warc.gz"
+
+
+def index_file(archive_path: Path):
+    # -- The index that goes with an archive:
+    return Path(archive_path).with_name(Path(archive_path).name.replace(".warc.gz", ".index.jsonl"))
+
+
+def archive_files(site_name: str,
+                  archive_date: str = None,
+                  archive_dir: str = ARCHIVE_DIR):
+    """
+    ### Summary:
+        This function will find the archives for a site on a given day,
+        including the ones written by work queue workers.
+
+    ### Args:
+        site_name (str):
+            The name of the site folder that is used.
+        archive_date (str, optional):
+            The day as YYYY-MM-DD. Defaults to None (today).
+        archive_dir (str, optional):
+            The folder for the archives. Defaults to ARCHIVE_DIR.
+
+    ### Returns:
+        list: The paths to the archives, oldest first.
+    """
+
+    archive_date = archive_date or date.today().isoformat()
+
+    return sorted(Path(archive_dir, site_name).glob(f"{archive_date}*.warc.gz"), key = lambda path: path.stat().st_mtime)
+
+
+class ArchiveWriter:
+    """
+    ### Summary:
+        An append-only archive of the responses for a site, in the style of a
+        WARC file. Each response is saved as a WARC response record (the WARC
+        headers, then the status line, headers and body of the response) in
+        its own gzip member, so the archive can be read with WARC tools and a
+        record can be read without decompressing the ones before it. Each
+        record is added to an index, with one JSON line for each record that
+        holds the URL, where the record is in the archive and how it was
+        downloaded.
+
+        The body is saved as it was used, after it has been decompressed, so
+        the Content-Encoding and Content-Length headers are not saved. A
+        record whose download was stopped once its parse target was found has
+        a WARC-Truncated header.
+
+    ### Args:
+        archive_path (str):
+            The path to the archive, from archive_file.
+        site_name (str):
+            The name of the site folder that is used.
+        compress_level (int, optional):
+            The gzip level to compress each record with.
+            Defaults to ARCHIVE_COMPRESS_LEVEL.
+    """
+
+    def __init__(self,
+                 archive_path: str,
+                 site_name: str,
+                 compress_level: int = ARCHIVE_COMPRESS_LEVEL):
+        self.archive_path = Path(archive_path)
+        self.site_name = site_name
+        self.compress_level = compress_level
+        self.lock = Lock()
+        self.records = 0
+
+        # -- Initialise logging:
+        self.log = get_logger(__name__, "ArchiveWriter", site_name)
+
+        self.archive_path.parent.mkdir(parents = True, exist_ok = True)
+        self.file = open(self.archive_path, "ab")
+        self.index = open(index_file(archive_path = self.archive_path), "a", encoding = "utf-8")
+
+        self.log.info(f"Recording responses to {self.archive_path}.")
+
+    def record(self,
+               url: str,
+               nickname: str,
+               status_code: int,
+               reason: str,
+               headers: dict,
+               body: bytes,
+               encoding: str = None,
+               truncated: bool = False,
+               from_cache: bool = False):
+        """
+        ### Summary:
+            This will add a response to the archive and its index.
+
+        ### Args:
+            url (str):
+                The URL of the page.
+            nickname (str):
+                The nickname of the page.
+            status_code (int):
+                The status code of the response.
+            reason (str):
+                The reason that goes with the status code, e.g. OK.
+            headers (dict):
+                The headers of the response.
+            body (bytes):
+                The body of the response.
+            encoding (str, optional):
+                The encoding that was used to turn the body into text.
+                Defaults to None.
+            truncated (bool, optional):
+                Whether the download was stopped before the end of the page.
+                Defaults to False.
+            from_cache (bool, optional):
+                Whether the body came from the HTTP cache after a 304 (Not
+                Modified) response. Defaults to False.
+
+        ### Returns:
+            None
+        """
+
+        recorded_at = datetime.now(timezone.utc)
+        http_block = f"HTTP/1.1 {status_code} {reason or ''}".rstrip() + "\r\n"
+        http_block += "".join(f"{name}: {value}\r\n" for name, value in headers.items() if name.lower() not in SKIPPED_HEADERS)
+        http_block = http_block.encode("latin-1", errors = "replace") + b"\r\n" + body
+
+        warc_headers = {"WARC-Type": "response",
+                        "WARC-Record-ID": f"<urn:uuid:{uuid.uuid4()}>",
+                        "WARC-Date": recorded_at.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                        "WARC-Target-URI": url,
+                        "Content-Type": "application/http; msgtype=response",
+                        "Content-Length": str(len(http_block))}
+
+        if truncated == True:
+            warc_headers["WARC-Truncated"] = "length"
+
+        warc_record = ("WARC/1.1\r\n" + "".join(f"{name}: {value}\r\n" for name, value in warc_headers.items()) + "\r\n").encode("utf-8")
+        member = gzip.compress(warc_record + http_block + b"\r\n\r\n", compresslevel = self.compress_level)
+
+        with self.lock:
+            offset = self.file.tell()
+            self.file.write(member)
+            self.file.flush()
+
+            # -- The record is only added to the index once it has been
+            # -- written, so a record that was only partly written is never
+            # -- read:
+            self.index.write(json.dumps({"url": url,
+                                         "nickname": nickname,
+                                         "status": status_code,
+                                         "encoding": encoding,
+                                         "truncated": truncated,
+                                         "from_cache": from_cache,
+                                         "recorded_at": recorded_at.isoformat(timespec = "seconds"),
+                                         "offset": offset,
+                                         "length": len(member)}) + "\n")
+            self.index.flush()
+            self.records += 1
+
+        return
+
+    def close(self):
+        """
+        ### Summary:
+            This will close the archive and its index. It is safe to call more
+            than once.
+
+        ### Args:
+            None.
+
+        ### Returns:
+            None
+        """
+
+        with self.lock:
+            if self.file.closed == False:
+                self.file.close()
+                self.index.close()
+                self.log.info(f"Recorded {self.records} response(s) to {self.archive_path}.")
+
+        return
+
+
+class ArchiveReader:
+    """
+    ### Summary:
+        Reads the responses back from one or more archives written by
+        ArchiveWriter, by URL. If a URL was recorded more than once, the
+        latest record is used. Each record is read (seek and read) while a
+        lock is held, so any number of threads can read from the archives, and
+        is decompressed after the lock has been released.
+
+    ### Args:
+        archive_paths (list):
+            The paths to the archives, oldest first (see archive_files).
+        site_name (str):
+            The name of the site folder that is used.
+    """
+
+    def __init__(self,
+                 archive_paths: list,
+                 site_name: str):
+        self.site_name = site_name
+        self.files = {}
+        self.entries = {}
+        self.lock = Lock()
+
+        # -- Initialise logging:
+        self.log = get_logger(__name__, "ArchiveReader", site_name)
+
+        for archive_path in archive_paths:
+            self.files[str(archive_path)] = open(archive_path, "rb")
+
+            for entry in self._read_index(archive_path = archive_path):
+                entry["archive"] = str(archive_path)
+                self.entries[entry["url"]] = entry
+
+        self.log.info(f"Loaded {len(self.entries)} URL(s) from {len(self.files)} archive(s).")
+
+    def _read_index(self, archive_path: Path):
+        # -- Read the index for an archive, skipping any line that was only
+        # -- partly written:
+        entries = []
+
+        with open(index_file(archive_path = archive_path), encoding = "utf-8") as file:
+            for line in file:
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    continue
+
+        return entries
+
+    def __len__(self):
+        return len(self.entries)
+
+    def read(self, url: str):
+        """
+        ### Summary:
+            This will read the latest response for a URL.
+
+        ### Args:
+            url (str):
+                The URL of the page.
+
+        ### Returns:
+            dict: The status_code, headers, body, encoding and whether the
+            record is truncated, or None if the URL is not in the archives.
+        """
+
+        entry = self.entries.get(url)
+
+        if entry == None:
+            return None
+
+        with self.lock:
+            file = self.files[entry["archive"]]
+            file.seek(entry["offset"])
+            record = file.read(entry["length"])
+
+        record = gzip.decompress(record)
+        _, http_block = record.split(b"\r\n\r\n", 1)
+        http_headers, body = http_block.split(b"\r\n\r\n", 1)
+        status_line, *header_lines = http_headers.decode("latin-1").split("\r\n")
+
+        return {"status_code": int(status_line.split(" ")[1]),
+                "headers": dict(header_line.split(": ", 1) for header_line in header_lines if ": " in header_line),
+                "body": body[:-len(b"\r\n\r\n")],
+                "encoding": entry["encoding"],
+                "truncated": entry["truncated"]}
+
+    def close(self):
+        """
+        ### Summary:
+            This will close the archives.
+
+        ### Args:
+            None.
+
+        ### Returns:
+            None
+        """
+
+        with self.lock:
+            for file in self.files.values():
+                file.close()
+
+            self.files = {}
+
+        return
@@ -0,0 +1,284 @@
+# -- Import required libraries / modules:
+from datetime import datetime
+from pathlib import Path
+from threading import Lock
+
+from modules.config import CHECKPOINT_DIR, CHECKPOINT_FSYNC_EVERY, CHECKPOINT_FSYNC_SECONDS
+from modules.log_setup import get_logger
+
+import json
+import os
+import time
+
+
+# -- The statuses of the rows that don't need to be done again when a run is
+# -- resumed. Rows that failed are tried again:
+DONE_STATUSES = ("succeeded", "unchanged")
+
+
+def checkpoint_file(site_name: str,
+                    checkpoint_dir: str = CHECKPOINT_DIR):
+    """
+    ### Summary:
+        This function will work out the path to the checkpoint journal for a
+        site.
+
+    ### Args:
+        site_name (str):
+            The name of the site folder that is used.
+        checkpoint_dir (str, optional):
+            The folder for the journals. Defaults to CHECKPOINT_DIR.
+
+    ### Returns:
+        Path: The path to the journal.
+    """
+
+    return Path(checkpoint_dir) / f"{site_name}.jsonl"
+
+
+class CheckpointJournal:
+    """
+    ### Summary:
+        An append-only journal of the rows from a pages.xlsx file that have
+        been done during a run, with one JSON line for each row. It is used to
+        carry on from where a run stopped if it was interrupted.
+
+        Each line is handed to the operating system as soon as it is recorded,
+        so nothing is lost if the program is killed, but it is only forced to
+        disk (fsync) in batches, once there are fsync_every lines or
+        fsync_seconds have passed. If the machine itself goes down, at most
+        one batch of rows is lost and they are simply done again. A line that
+        was only partly written is ignored when the journal is read.
+
+    ### Args:
+        journal_file (str):
+            The path to the journal.
+        site_name (str):
+            The name of the site folder that is used.
+        resume (bool, optional):
+            Whether to carry on from the rows already in the journal. If not,
+            the journal is emptied. Defaults to False.
+        fsync_every (int, optional):
+            The number of rows to save to disk in one go.
+            Defaults to CHECKPOINT_FSYNC_EVERY.
+        fsync_seconds (float, optional):
+            The most time between saving rows to disk.
+            Defaults to CHECKPOINT_FSYNC_SECONDS.
+    """
+
+    def __init__(self,
+                 journal_file: str,
+                 site_name: str,
+                 resume: bool = False,
+                 fsync_every: int = CHECKPOINT_FSYNC_EVERY,
+                 fsync_seconds: float = CHECKPOINT_FSYNC_SECONDS):
+        self.journal_file = Path(journal_file)
+        self.site_name = site_name
+        self.fsync_every = fsync_every
+        self.fsync_seconds = fsync_seconds
+        self.lock = Lock()
+        self.unsynced = 0
+        self.last_sync = time.monotonic()
+        self.done = self._read() if resume == True else set()
+
+        # -- Initialise logging:
+        self.log = get_logger(__name__, "CheckpointJournal", site_name)
+
+        self.journal_file.parent.mkdir(parents = True, exist_ok = True)
+        self.file = open(self.journal_file, "a" if resume == True else "w", encoding = "utf-8")
+
+        if resume == True:
+            self.log.info(f"Resuming from {self.journal_file}, which has {len(self.done)} row(s) that are done.")
+
+    def _read(self):
+        # -- Read the rows that are done from the journal, skipping any line
+        # -- that was only partly written:
+        done = set()
+
+        if self.journal_file.is_file() == False:
+            return done
+
+        with open(self.journal_file, encoding = "utf-8") as file:
+            for line in file:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+
+                if entry.get("status") in DONE_STATUSES:
+                    done.add((entry["nickname"], entry["url"]))
+                else:
+                    done.discard((entry["nickname"], entry["url"]))
+
+        return done
+
+    def is_done(self,
+                nickname: str,
+                url: str):
+        """
+        ### Summary:
+            This will check if a row was done before the run was resumed.
+
+        ### Args:
+            nickname (str):
+                The nickname of the page.
+            url (str):
+                The URL of the page.
+
+        ### Returns:
+            bool: True if the row has been done, otherwise False.
+        """
+
+        return (nickname, url) in self.done
+
+    def record(self,
+               nickname: str,
+               url: str,
+               status: str):
+        """
+        ### Summary:
+            This will add a row to the journal.
+
+        ### Args:
+            nickname (str):
+                The nickname of the page.
+            url (str):
+                The URL of the page.
+            status (str):
+                How the row got on, succeeded, unchanged or failed.
+
+        ### Returns:
+            None
+        """
+
+        line = json.dumps({"site": self.site_name,
+                           "nickname": nickname,
+                           "url": url,
+                           "status": status,
+                           "at": datetime.now().isoformat(timespec = "seconds")})
+
+        with self.lock:
+            self.file.write(line + "\n")
+            self.file.flush()
+            self.unsynced += 1
+
+            if self.unsynced >= self.fsync_every or time.monotonic() - self.last_sync >= self.fsync_seconds:
+                self._sync()
+
+        return
+
+    def _sync(self):
+        if self.unsynced == 0:
+            return
+
+        os.fsync(self.file.fileno())
+        self.unsynced = 0
+        self.last_sync = time.monotonic()
+
+    def close(self):
+        """
+        ### Summary:
+            This will save any rows that are left to disk and close the
+            journal. It is safe to call more than once.
+
+        ### Args:
+            None.
+
+        ### Returns:
+            None
+        """
+
+        with self.lock:
+            if self.file.closed == False:
+                self._sync()
+                self.file.close()
+
+        return
+
+
+def remove_checkpoint(site_name: str,
+                      checkpoint_dir: str = CHECKPOINT_DIR):
+    """
+    ### Summary:
+        This function will remove the checkpoint journal for a site once the
+        site has been done, so that the next run starts from the beginning.
+
+    ### Args:
+        site_name (str):
+            The name of the site folder that is used.
+        checkpoint_dir (str, optional):
+            The folder for the journals. Defaults to CHECKPOINT_DIR.
+
+    ### Returns:
+        None
+    """
+
+    checkpoint_file(site_name = site_name,
+                    checkpoint_dir = checkpoint_dir).unlink(missing_ok = True)
+
+    return
+
+
+def clear_checkpoints(checkpoint_dir: str = CHECKPOINT_DIR):
+    """
+    ### Summary:
+        This function will remove every checkpoint journal, for a run that is
+        not being resumed.
+
+    ### Args:
+        checkpoint_dir (str, optional):
+            The folder for the journals. Defaults to CHECKPOINT_DIR.
+
+    ### Returns:
+        int: The number of journals that were removed.
+    """
+
+    # -- Initialise logging:
+    log = get_logger(__name__, "clear_checkpoints")
+
+    journal_files = list(Path(checkpoint_dir).glob("*.jsonl"))
+
+    for journal_file in journal_files:
+        journal_file.unlink(missing_ok = True)
+
+    if journal_files != []:
+        log.info(f"Removed {len(journal_files)} checkpoint journal(s) from an earlier run.")
+
+    return len(journal_files)
+
+
+def finish_checkpoints(site_summaries: list,
+                       checkpoint_dir: str = CHECKPOINT_DIR):
+    """
+    ### Summary:
+        This function will remove the checkpoint journals for the sites in a
+        run once the run has finished, but only if none of the sites crashed.
+        If one did, every journal is kept (including those for the sites that
+        completed), so that --resume carries on with the site that crashed 
+        without doing the other sites again. The journals are then removed at
+        the start of the next run that is not resumed.
+
+    ### Args:
+        site_summaries (list):
+            The summary of each site in the run.
+        checkpoint_dir (str, optional):
+            The folder for the journals. Defaults to CHECKPOINT_DIR.
+
+    ### Returns:
+        bool: True if the journals were removed, otherwise False.
+    """
+
+    # -- Initialise logging:
+    log = get_logger(__name__, "finish_checkpoints")
+
+    crashed_sites = [site_summary["site_name"] for site_summary in site_summaries if site_summary["status"] == "crashed"]
+
+    if crashed_sites != []:
+        log.info(f"Keeping the checkpoint journals as {', '.join(crashed_sites)} crashed. Use --resume to carry on.")
+        return False
+
+    for site_summary in site_summaries:
+        remove_checkpoint(site_name = site_summary["site_name"],
+                          checkpoint_dir = checkpoint_dir)
+
+    return True
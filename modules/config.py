@@ -1,53 +1,196 @@
 # -- Import required libraries / modules:
 from pathlib import Path
 
-import logging
-import logging.config
+import os
 
 
 # -- Define general constants and variables:
 # -- Folders for various settings:
 APP_DIR = Path(__file__).resolve().parent.parent
-LOGS_DIR = f"{APP_DIR}/logs/"
-OUTPUT_DIR = f"{APP_DIR}/output/"
 SETTINGS_DIR = f"{APP_DIR}/settings/"
+# -- The logs, output and cache folders are created in DATA_DIR, which can be
+# -- moved with the SCRAPER_DATA_DIR environment variable (e.g. so that a 
+# -- benchmark doesn't write to the real folders):
+DATA_DIR = os.getenv("SCRAPER_DATA_DIR", str(APP_DIR))
+LOGS_DIR = f"{DATA_DIR}/logs/"
+OUTPUT_DIR = f"{DATA_DIR}/output/"
+CACHE_DIR = f"{DATA_DIR}/cache/"
 
 ALL_SITES_DIR = f"{APP_DIR}/sites/"
 SITE_FILES = ["pages.xlsx", "processor.py"]
+SITE_SETTINGS_FILE = "settings.xlsx"
 
+# -- The settings that can be changed for each site in the optional 
+# -- settings.xlsx file in its folder and their default values:
+SITE_SETTINGS_DEFAULTS = {
+    # -- The number of requests per second that can be made to each host and
+    # -- how many requests can be made in a burst before that rate applies.
+    # -- A rate of 0 means there is no limit:
+    "requests_per_second": 2.0,
+    "burst": 5,
+    # -- The parser used to turn pages into soups (html.parser, lxml or
+    # -- selectolax). It can be changed for a single page with a parser column
+    # -- in pages.xlsx:
+    "parser": "html.parser",
+    # -- Only parse the part of each page that the site needs. Either a tag
+    # -- (e.g. table) that is matched using the html_id_1 and html_class_1
+    # -- columns in pages.xlsx or a CSS selector (e.g. table#myTable.chart).
+    # -- They can be changed for a single page with parse_only_tag and
+    # -- parse_only_selector columns in pages.xlsx. Empty means the whole page
+    # -- is parsed:
+    "parse_only_tag": "",
+    "parse_only_selector": "",
+    # -- The format of the file that the export buffer for the site writes 
+    # -- to (csv or parquet):
+    "export_buffer_format": "csv",
+    # -- Skip pages that haven't changed since they were last processed, by
+    # -- comparing a hash of the page with the one from the last run. The hash
+    # -- is of the whole page (html), of the part of the page that is parsed
+    # -- (region) or pages are always processed (off):
+    "dedupe_mode": "off",
+    # -- The most pages that can be fetched ahead of the one being processed
+    # -- (0 is two for each fetch worker) and the most bytes those pages can
+    # -- take up before fetching waits for them to be processed (0 is no
+    # -- limit):
+    "max_in_flight_pages": 0,
+    "max_in_flight_bytes": 64 * 1024 * 1024,
+    # -- Crawl the site rather than only scraping the pages in pages.xlsx. The
+    # -- crawl starts from the pages in pages.xlsx and the pages in the 
+    # -- crawl_sitemap (the URL of a sitemap.xml, if there is one) and follows
+    # -- the links on each page that match crawl_include and don't match
+    # -- crawl_exclude (regular expressions), up to crawl_max_depth links 
+    # -- from the start. Only links to the hosts of the starting pages are
+    # -- followed unless crawl_same_host is off. crawl_max_pages is the most
+    # -- pages to crawl (0 is no limit):
+    "crawl": False,
+    "crawl_sitemap": "",
+    "crawl_include": "",
+    "crawl_exclude": "",
+    "crawl_max_depth": 2,
+    "crawl_max_pages": 0,
+    "crawl_same_host": True,
+}
 
-# -- Setup logging settings:
-def logger(name: str, log_folder: str):
-    logging.config.dictConfig({
-        'version': 1,
-        'disable_existing_loggers': False,
-        'formatters': {
-            'console': {
-                'format': '%(levelname)s:%(asctime)s:%(name)s:%(message)s'
-            },
-            'file': {
-                'format': '%(levelname)s:%(asctime)s:%(name)s:%(message)s'
-            }
-        },
-        'handlers': {
-            'console': {
-                'class': 'logging.StreamHandler',
-                'formatter': 'console'
-            },
-            'file': {
-                'level': 'INFO',
-                'class': 'logging.FileHandler',
-                'formatter': 'file',
-                'filename': log_folder
-            }
-        },
-        'loggers': {
-            '': {
-                'level': 'DEBUG',
-                'handlers': ['file'],
-                'propagate': True,
-            }
-        }
-    })
-
-    return logging.getLogger(name)
\ No newline at end of file
+# -- Concurrency settings:
+# -- The number of pages fetched at the same time for each site. A value of 1
+# -- fetches the pages one after another:
+FETCH_WORKERS = 1
+
+# -- The number of site folders processed at the same time, each in its own
+# -- process. A value of 1 processes the site folders one after another:
+SITE_WORKERS = 1
+
+# -- HTTP connection settings:
+# -- The number of seconds to wait for a connection to be made to a site and
+# -- for the site to send data once connected:
+CONNECT_TIMEOUT = 10
+READ_TIMEOUT = 30
+# -- The number of hosts to keep a pool of open (keep-alive) connections for
+# -- and the most connections that can be open to a single host at once:
+POOL_HOSTS = 20
+POOL_CONNECTIONS_PER_HOST = 8
+
+# -- Download settings:
+# -- Pages are downloaded a chunk at a time and the download is stopped if a
+# -- page is bigger than MAX_BODY_BYTES. Pages with a content type that is
+# -- not in ALLOWED_CONTENT_TYPES are not downloaded:
+MAX_BODY_BYTES = 25 * 1024 * 1024
+DOWNLOAD_CHUNK_BYTES = 64 * 1024
+ALLOWED_CONTENT_TYPES = ("text/html", "application/xhtml+xml", "application/xml", "text/xml", "text/plain")
+
+# -- Retry settings:
+# -- How failed requests are retried, for a status code (e.g. "429"), a class
+# -- of status codes (e.g. "5xx") or a request that failed to connect or timed
+# -- out ("connection"). A status code is matched before its class and any
+# -- failure that does not have a policy is not retried. Each retry waits for
+# -- a random time of up to base_delay * 2 ^ (attempt - 1) seconds, capped at
+# -- max_delay:
+RETRY_POLICIES = {
+    "429": {"max_attempts": 5, "base_delay": 2.0, "max_delay": 60.0},
+    "5xx": {"max_attempts": 4, "base_delay": 1.0, "max_delay": 30.0},
+    "connection": {"max_attempts": 3, "base_delay": 1.0, "max_delay": 15.0},
+}
+# -- The file in the output folder for a site that pages which still fail
+# -- after being retried are recorded in:
+DEAD_LETTER_FILE = "dead-letter.csv"
+
+# -- Export buffer settings:
+# -- Site processors can push their dataframes into an export buffer, which
+# -- writes them to one file per site per run. The rows are written once
+# -- there are EXPORT_BUFFER_MAX_ROWS of them, they take up
+# -- EXPORT_BUFFER_MAX_BYTES of memory or EXPORT_BUFFER_MAX_SECONDS have
+# -- passed since they were last written:
+EXPORT_BUFFER_MAX_ROWS = 50_000
+EXPORT_BUFFER_MAX_BYTES = 64 * 1024 * 1024
+EXPORT_BUFFER_MAX_SECONDS = 60.0
+
+# -- HTTP cache settings:
+# -- Pages are saved to the cache along with their ETag / Last-Modified 
+# -- headers so that they are only downloaded again if they have changed. 
+# -- Once the cache is bigger than HTTP_CACHE_MAX_BYTES, the pages that were
+# -- used least recently are removed:
+HTTP_CACHE_ENABLED = True
+HTTP_CACHE_DIR = f"{CACHE_DIR}http/"
+HTTP_CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+# -- Deduplication settings:
+# -- The hash of each page that has been processed is saved in
+# -- FINGERPRINT_DB_FILE so that sites with a dedupe_mode can skip pages that
+# -- haven't changed:
+DEDUPE_MODES = ("off", "html", "region")
+FINGERPRINT_DB_FILE = f"{CACHE_DIR}fingerprints.sqlite"
+
+# -- Spreadsheet cache settings:
+# -- A copy of each spreadsheet that is read (e.g. pages.xlsx) is saved in
+# -- SPREADSHEET_CACHE_DIR and used instead of the spreadsheet until it
+# -- changes, as reading a spreadsheet is slow:
+SPREADSHEET_CACHE_ENABLED = True
+SPREADSHEET_CACHE_DIR = f"{CACHE_DIR}settings/"
+
+# -- Checkpoint settings:
+# -- The rows that have been done for each site are recorded in a journal in
+# -- CHECKPOINT_DIR so that an interrupted run can be resumed. The journal is
+# -- saved to disk every CHECKPOINT_FSYNC_EVERY rows or CHECKPOINT_FSYNC_SECONDS:
+CHECKPOINT_DIR = f"{CACHE_DIR}checkpoints/"
+CHECKPOINT_FSYNC_EVERY = 50
+CHECKPOINT_FSYNC_SECONDS = 5.0
+
+# -- Work queue settings:
+# -- The rows in the pages.xlsx files can be added to a queue in 
+# -- WORK_QUEUE_FILE and done by any number of workers. A leased row is given
+# -- back to the queue if it isn't done within WORK_QUEUE_VISIBILITY_TIMEOUT
+# -- seconds and is tried at most WORK_QUEUE_MAX_ATTEMPTS times. Workers check
+# -- the queue every WORK_QUEUE_POLL_SECONDS while other workers have rows:
+WORK_QUEUE_FILE = f"{CACHE_DIR}work-queue.sqlite"
+WORK_QUEUE_VISIBILITY_TIMEOUT = 300.0
+WORK_QUEUE_MAX_ATTEMPTS = 3
+WORK_QUEUE_POLL_SECONDS = 5.0
+
+# -- Crawl settings:
+# -- The pages that a site crawl has found and still has to do (its frontier)
+# -- are kept in a database for each site in CRAWL_DIR, so that a crawl of
+# -- millions of pages doesn't have to be held in memory and can be resumed.
+# -- The URLs that have been seen are held in a Bloom filter sized for
+# -- CRAWL_SEEN_CAPACITY URLs, of which about CRAWL_SEEN_ERROR_RATE are wrongly
+# -- taken to have been seen already. At most CRAWL_SITEMAP_MAX_FILES sitemaps
+# -- are read for a site (a sitemap can be an index of other sitemaps):
+CRAWL_DIR = f"{CACHE_DIR}crawl/"
+CRAWL_SEEN_CAPACITY = 1_000_000
+CRAWL_SEEN_ERROR_RATE = 0.001
+CRAWL_SITEMAP_MAX_FILES = 50
+
+# -- Archive settings:
+# -- With --record, the responses for each site are saved to an archive in
+# -- ARCHIVE_DIR as they are downloaded, compressed with gzip at 
+# -- ARCHIVE_COMPRESS_LEVEL. With --replay, the pages are read from the archive
+# -- instead of being downloaded:
+ARCHIVE_MODES = ("record", "replay")
+ARCHIVE_DIR = f"{OUTPUT_DIR}archive/"
+ARCHIVE_COMPRESS_LEVEL = 6
+
+# -- Logging settings:
+# -- The format of the log files, text (one line for each record) or json 
+# -- (one JSON object for each record, with the site, page and URL that was
+# -- being processed):
+LOG_FORMATS = ("text", "json")
+LOG_FORMAT = "text"
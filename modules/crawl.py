@@ -0,0 +1,776 @@
+# -- Import required libraries / modules:
+from collections import namedtuple
+from datetime import datetime
+from html.parser import HTMLParser
+from io import BytesIO
+from pathlib import Path
+from threading import Lock
+from urllib.parse import urldefrag, urljoin, urlsplit, urlunsplit
+from xml.etree.ElementTree import ParseError, iterparse
+
+from modules.config import CONNECT_TIMEOUT, CRAWL_DIR, CRAWL_SEEN_CAPACITY, CRAWL_SEEN_ERROR_RATE, CRAWL_SITEMAP_MAX_FILES, READ_TIMEOUT
+from modules.http_session import get_session
+from modules.log_setup import get_logger
+from modules.metrics import timer
+
+import gzip
+import hashlib
+import json
+import math
+import pandas as pd
+import re
+import sqlite3
+
+
+# -- Yielded by a generator of rows when it has no rows to give right now, but
+# -- may have more once the pages that are being fetched have been done:
+ROWS_PENDING = object()
+
+# -- Links to files with these extensions are not followed, as they aren't
+# -- pages:
+SKIPPED_EXTENSIONS = (".7z", ".avi", ".bmp", ".css", ".csv", ".doc", ".docx", ".exe", ".gif", ".gz", ".ico", ".jpeg",
+                      ".jpg", ".js", ".json", ".mp3", ".mp4", ".pdf", ".png", ".ppt", ".pptx", ".rar", ".svg", ".tar",
+                      ".tif", ".tiff", ".wav", ".webm", ".webp", ".woff", ".woff2", ".xls", ".xlsx", ".zip")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS templates (
+    id INTEGER PRIMARY KEY,
+    row_data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS pages (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL UNIQUE,
+    nickname TEXT NOT NULL,
+    depth INTEGER NOT NULL,
+    template_id INTEGER NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    found_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_pages_status ON pages (status, depth, id);
+"""
+
+
+def crawl_file(site_name: str,
+               crawl_dir: str = CRAWL_DIR,
+               replay: bool = False):
+    """
+    ### Summary:
+        This function will work out the path to the crawl frontier database
+        for a site. Crawls that are replayed from an archive use a database of
+        their own, so that they never reset the frontier of a live crawl that
+        may still be resumed.
+
+    ### Args:
+        site_name (str):
+            The name of the site folder that is used.
+        crawl_dir (str, optional):
+            The folder for the databases. Defaults to CRAWL_DIR.
+        replay (bool, optional):
+            True for the database of a replayed crawl. Defaults to False.
+
+    ### Returns:
+        Path: The path to the database.
+    """
+
+    return Path(crawl_dir) / (f"{site_name}-replay.sqlite" if replay == True else f"{site_name}.sqlite")
+
+
+def normalize_url(url: str,
+                  base_url: str = None):
+    """
+    ### Summary:
+        This function will turn a link into the form that is used to check if
+        it has been seen: made absolute using the base URL, without its
+        #fragment, with a lower case scheme and host, without a default port
+        and with a path of at least /.
+
+    ### Args:
+        url (str):
+            The link.
+        base_url (str, optional):
+            The URL of the page the link is on. Defaults to None.
+
+    ### Returns:
+        str: The URL, or None if it isn't an http(s) URL.
+    """
+
+    url = urldefrag(urljoin(base_url, url.strip()) if base_url != None else url.strip())[0]
+
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError:
+        return None
+
+    scheme = parts.scheme.lower()
+
+    if scheme not in ("http", "https") or parts.hostname == None:
+        return None
+
+    netloc = parts.hostname.lower()
+
+    if port != None and (scheme, port) not in (("http", 80), ("https", 443)):
+        netloc = f"{netloc}:{port}"
+
+    return urlunsplit((scheme, netloc, parts.path or "/", parts.query, ""))
+
+
+def url_nickname(url: str):
+    """
+    ### Summary:
+        This function will create a nickname for a page that was found by a
+        crawl, from the path of its URL and a short hash of the whole URL so
+        that it is unique.
+
+    ### Args:
+        url (str):
+            The URL of the page.
+
+    ### Returns:
+        str: The nickname.
+    """
+
+    parts = urlsplit(url)
+    path = re.sub(r"[^A-Za-z0-9]+", "_", parts.path).strip("_")[-60:] or "home"
+
+    return f"crawl_{path}_{hashlib.blake2b(url.encode('utf-8'), digest_size = 4).hexdigest()}"
+
+
+class LinkExtractor(HTMLParser):
+    # -- Collects the href of each link (and the base URL, if the page has
+    # -- one) without building a tree of the page:
+    def __init__(self):
+        super().__init__(convert_charrefs = True)
+        self.base_url = None
+        self.links = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "a" or tag == "area":
+            href = dict(attrs).get("href")
+
+            if href:
+                self.links.append(href)
+        elif tag == "base" and self.base_url == None:
+            self.base_url = dict(attrs).get("href")
+
+
+def extract_links(markup: str,
+                  base_url: str):
+    """
+    ### Summary:
+        This function will find the links on a page. It reads the HTML of the
+        page rather than its soup, as the soup may only be part of the page
+        (see parse_only_tag). Links that aren't http(s) URLs or that are to
+        files that aren't pages (e.g. images) are skipped.
+
+    ### Args:
+        markup (str):
+            The HTML of the page.
+        base_url (str):
+            The URL of the page.
+
+    ### Returns:
+        list: The normalised URLs of the links, each once, in the order they
+        are on the page.
+    """
+
+    extractor = LinkExtractor()
+
+    try:
+        extractor.feed(markup)
+        extractor.close()
+    except (AssertionError, ValueError):
+        # -- Keep the links found before the HTML became unreadable:
+        pass
+
+    if extractor.base_url:
+        base_url = urljoin(base_url, extractor.base_url)
+
+    links = {}
+
+    for href in extractor.links:
+        url = normalize_url(url = href,
+                            base_url = base_url)
+
+        if url != None and urlsplit(url).path.lower().endswith(SKIPPED_EXTENSIONS) == False:
+            links[url] = None
+
+    return list(links)
+
+
+def sitemap_urls(sitemap_url: str,
+                 headers: dict,
+                 site_name: str,
+                 max_files: int = CRAWL_SITEMAP_MAX_FILES,
+                 timeout: tuple = (CONNECT_TIMEOUT, READ_TIMEOUT)):
+    """
+    ### Summary:
+        This generator will read the URLs of the pages in a sitemap. A sitemap
+        that is an index of other sitemaps has each of them read in turn, up to
+        max_files sitemaps in all. Sitemaps that are compressed with gzip are
+        decompressed. Sitemaps that can't be downloaded or read are logged and
+        skipped.
+
+    ### Args:
+        sitemap_url (str):
+            The URL of the sitemap.
+        headers (dict):
+            The headers to send with the requests.
+        site_name (str):
+            The name of the site folder that is used.
+        max_files (int, optional):
+            The most sitemaps to read. Defaults to CRAWL_SITEMAP_MAX_FILES.
+        timeout (tuple, optional):
+            The number of seconds to wait to connect to the site and to wait
+            for the site to send data.
+            Defaults to (CONNECT_TIMEOUT, READ_TIMEOUT).
+
+    ### Yields:
+        str: The URL of each page.
+    """
+
+    # -- Initialise logging:
+    log = get_logger(__name__, "sitemap_urls", site_name)
+
+    sitemaps = [sitemap_url]
+    files_read = 0
+
+    while sitemaps != [] and files_read < max_files:
+        url = sitemaps.pop(0)
+        files_read += 1
+        log.info(f"Reading the sitemap {url}.")
+
+        try:
+            response = get_session().get(url = url,
+                                         headers = headers,
+                                         timeout = timeout)
+            response.raise_for_status()
+        except Exception as e:
+            log.error(f"Could not download the sitemap {url}: {e!r}. Skipping it.")
+            print(f"Error: Could not download the sitemap {url}: {e!r}. Skipping it.")
+            continue
+
+        content = response.content
+
+        # -- A .xml.gz file is sent as it is, rather than with a
+        # -- Content-Encoding that requests would decompress:
+        if content[:2] == b"\x1f\x8b":
+            content = gzip.decompress(content)
+
+        pages = 0
+
+        try:
+            for _, element in iterparse(BytesIO(content)):
+                # -- Drop the namespace from the name of the tag:
+                tag = element.tag.rsplit("}", 1)[-1]
+
+                if tag in ("url", "sitemap"):
+                    loc = next((child.text for child in element if child.tag.rsplit("}", 1)[-1] == "loc"), None)
+
+                    if loc:
+                        if tag == "sitemap":
+                            sitemaps.append(loc.strip())
+                        else:
+                            pages += 1
+                            yield loc.strip()
+
+                    element.clear()
+        except ParseError as e:
+            log.error(f"Could not read the sitemap {url}: {e!r}. Skipping the rest of it.")
+            print(f"Error: Could not read the sitemap {url}: {e!r}. Skipping the rest of it.")
+
+        log.info(f"Read {pages} page(s) from the sitemap {url}.")
+
+    if sitemaps != []:
+        log.warning(f"Only {max_files} sitemap(s) were read. {len(sitemaps)} were skipped.")
+
+
+class BloomFilter:
+    """
+    ### Summary:
+        A compact set of strings that can say if a string has definitely not
+        been added, or has probably been added. It takes about 1.8 MB for a
+        million strings with an error rate of 0.1%, rather than the hundreds
+        of MB a set of the strings would take. Once more than capacity strings
+        have been added, the error rate goes up.
+
+    ### Args:
+        capacity (int, optional):
+            The number of strings it is sized for.
+            Defaults to CRAWL_SEEN_CAPACITY.
+        error_rate (float, optional):
+            The share of strings that are wrongly said to have been added.
+            Defaults to CRAWL_SEEN_ERROR_RATE.
+    """
+
+    def __init__(self,
+                 capacity: int = CRAWL_SEEN_CAPACITY,
+                 error_rate: float = CRAWL_SEEN_ERROR_RATE):
+        self.capacity = capacity
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, value: str):
+        # -- Work out the bits for a string from two hashes of it:
+        digest = hashlib.blake2b(value.encode("utf-8"), digest_size = 16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+
+        return [(first + number * second) % self.size for number in range(self.hashes)]
+
+    def __contains__(self, value: str):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
+
+    def __len__(self):
+        return self.count
+
+    def add(self, value: str):
+        """
+        ### Summary:
+            This will add a string.
+
+        ### Args:
+            value (str):
+                The string to add.
+
+        ### Returns:
+            bool: True if the string had not been added before, otherwise
+            False (it has probably been added).
+        """
+
+        added = False
+
+        for position in self._positions(value):
+            if self.bits[position >> 3] & (1 << (position & 7)) == 0:
+                self.bits[position >> 3] |= 1 << (position & 7)
+                added = True
+
+        if added == True:
+            self.count += 1
+
+        return added
+
+
+class CrawlFrontier:
+    """
+    ### Summary:
+        The pages that a crawl of a site has found, kept in a SQLite database
+        so that a crawl of millions of pages doesn't need to be held in
+        memory. Each page is queued when it is found, leased when it is given
+        to the processor and then marked as done or failed. Pages are given
+        out in order of depth (the number of links from a starting page), so
+        the site is crawled a level at a time.
+
+        The URLs that have been queued are also held in a Bloom filter, so
+        that the links on each page can be checked without going to the
+        database. A link that the filter wrongly says has been seen is not
+        crawled.
+
+        Each page that is found takes its columns (e.g. browser_to_use and
+        html_id_1) from the row in pages.xlsx that the crawl found it from.
+        The rows that are given to the processor have crawl_id and
+        crawl_depth columns added.
+
+        When a crawl is resumed, the pages that had been leased or had failed
+        are queued again. Otherwise the database is emptied when it is opened.
+
+    ### Args:
+        db_path (str):
+            The path to the database, from crawl_file.
+        site_name (str):
+            The name of the site folder that is used.
+        allowed_hosts (set, optional):
+            The hosts that links can be followed to. Defaults to None (any
+            host).
+        include (str, optional):
+            A regular expression that the URL of a link has to match to be
+            followed. Defaults to "" (every link).
+        exclude (str, optional):
+            A regular expression that the URL of a link can't match to be
+            followed. Defaults to "" (no link).
+        max_depth (int, optional):
+            The most links from a starting page to follow. Defaults to 2.
+        max_pages (int, optional):
+            The most pages to give out. Defaults to 0 (no limit).
+        resume (bool, optional):
+            Whether to carry on with the pages that are in the database.
+            Defaults to False.
+        seen_capacity (int, optional):
+            The number of URLs the Bloom filter is sized for.
+            Defaults to CRAWL_SEEN_CAPACITY.
+        seen_error_rate (float, optional):
+            The error rate of the Bloom filter.
+            Defaults to CRAWL_SEEN_ERROR_RATE.
+        lease_batch (int, optional):
+            The number of pages to lease from the database at once.
+            Defaults to 64.
+    """
+
+    def __init__(self,
+                 db_path: str,
+                 site_name: str,
+                 allowed_hosts: set = None,
+                 include: str = "",
+                 exclude: str = "",
+                 max_depth: int = 2,
+                 max_pages: int = 0,
+                 resume: bool = False,
+                 seen_capacity: int = CRAWL_SEEN_CAPACITY,
+                 seen_error_rate: float = CRAWL_SEEN_ERROR_RATE,
+                 lease_batch: int = 64):
+        Path(db_path).parent.mkdir(parents = True, exist_ok = True)
+
+        self.db_path = str(db_path)
+        self.site_name = site_name
+        self.allowed_hosts = allowed_hosts
+        self.include = re.compile(include) if include else None
+        self.exclude = re.compile(exclude) if exclude else None
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+        self.lease_batch = lease_batch
+        self.lock = Lock()
+        self.seen = BloomFilter(capacity = seen_capacity,
+                                error_rate = seen_error_rate)
+        self.templates = {}
+        self.row_types = {}
+        self.outstanding = 0
+        self.warned_full = False
+
+        # -- Initialise logging:
+        self.log = get_logger(__name__, "CrawlFrontier", site_name)
+
+        self.connection = sqlite3.connect(self.db_path,
+                                          timeout = 60,
+                                          isolation_level = None,
+                                          check_same_thread = False)
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        self.connection.execute("PRAGMA synchronous = NORMAL")
+
+        if resume == False:
+            self.connection.executescript("DROP TABLE IF EXISTS pages; DROP TABLE IF EXISTS templates;")
+
+        self.connection.executescript(SCHEMA)
+
+        # -- Pick up where the last crawl stopped, if there was one. Pages
+        # -- that failed are tried again:
+        self.connection.execute("UPDATE pages SET status = 'queued' WHERE status IN ('leased', 'failed')")
+
+        for template_id, row_data in self.connection.execute("SELECT id, row_data FROM templates"):
+            self.templates[template_id] = json.loads(row_data)
+
+        for (url,) in self.connection.execute("SELECT url FROM pages"):
+            self.seen.add(url)
+
+        self.resumed = self.counts()["done"]
+        self.given_out = self.resumed
+
+        if len(self.seen) > 0:
+            self.log.info(f"Resuming the crawl with {len(self.seen)} URL(s) found so far, of which {self.resumed} have been done.")
+
+    def close(self):
+        """
+        ### Summary:
+            This will close the connection to the database.
+
+        ### Args:
+            None.
+
+        ### Returns:
+            None
+        """
+
+        with self.lock:
+            self.connection.close()
+
+        return
+
+    def counts(self):
+        """
+        ### Summary:
+            This will count the pages by their status.
+
+        ### Args:
+            None.
+
+        ### Returns:
+            dict: The number of pages for each status.
+        """
+
+        counts = dict(self.connection.execute("SELECT status, COUNT(*) FROM pages GROUP BY status").fetchall())
+
+        return {status: counts.get(status, 0) for status in ("queued", "leased", "done", "failed")}
+
+    def follow(self, url: str):
+        """
+        ### Summary:
+            This will check if a link can be followed, using the allowed hosts
+            and the include and exclude patterns.
+
+        ### Args:
+            url (str):
+                The normalised URL of the link.
+
+        ### Returns:
+            bool: True if the link can be followed.
+        """
+
+        if self.allowed_hosts != None and urlsplit(url).hostname not in self.allowed_hosts:
+            return False
+
+        if self.include != None and self.include.search(url) == None:
+            return False
+
+        if self.exclude != None and self.exclude.search(url) != None:
+            return False
+
+        return True
+
+    def _add_pages(self, pages: list):
+        # -- Queue the pages that haven't been seen, each as (url, nickname,
+        # -- depth, template id). The lock is held by the caller:
+        found_at = datetime.now().isoformat(timespec = "seconds")
+        new_pages = [(url, nickname, depth, template_id, found_at) for url, nickname, depth, template_id in pages
+                     if self.seen.add(url) == True]
+
+        if len(self.seen) > self.seen.capacity and self.warned_full == False:
+            self.log.warning(f"More than {self.seen.capacity} URLs have been found, so more links will be wrongly skipped as seen. "
+                             f"Raise CRAWL_SEEN_CAPACITY for crawls this big.")
+            self.warned_full = True
+
+        if new_pages == []:
+            return 0
+
+        self.connection.execute("BEGIN IMMEDIATE")
+
+        try:
+            before = self.connection.total_changes
+            self.connection.executemany(
+                """INSERT OR IGNORE INTO pages (url, nickname, depth, template_id, found_at)
+                   VALUES (?, ?, ?, ?, ?)""",
+                new_pages)
+            added = self.connection.total_changes - before
+            self.connection.execute("COMMIT")
+        except BaseException:
+            self.connection.execute("ROLLBACK")
+            raise
+
+        return added
+
+    def seed_rows(self, rows: list):
+        """
+        ### Summary:
+            This will queue the rows from the pages.xlsx file as the starting
+            pages of the crawl, each as a template for the pages found from
+            it. The rows keep their own nicknames.
+
+        ### Args:
+            rows (list):
+                The rows from the pages.xlsx file (PageRow).
+
+        ### Returns:
+            int: The number of pages that were queued.
+        """
+
+        pages = []
+
+        with self.lock:
+            for row in rows:
+                # -- Empty cells are stored as null:
+                row_data = {field: None if not isinstance(value, str) and pd.isna(value) else value
+                            for field, value in row._asdict().items()}
+                template_id = self.connection.execute("INSERT INTO templates (row_data) VALUES (?)",
+                                                      (json.dumps(row_data, default = str),)).lastrowid
+                self.templates[template_id] = json.loads(json.dumps(row_data, default = str))
+                url = normalize_url(url = str(row.url))
+
+                if url != None:
+                    pages.append((url, str(row.nickname), 0, template_id))
+
+            added = self._add_pages(pages = pages)
+
+        self.log.info(f"Queued {added} starting page(s) from pages.xlsx.")
+
+        return added
+
+    def seed_urls(self, urls):
+        """
+        ### Summary:
+            This will queue URLs as starting pages of the crawl, e.g. from a
+            sitemap, using the first row of pages.xlsx as their template. URLs
+            that can't be followed are skipped.
+
+        ### Args:
+            urls (iterable):
+                The URLs to queue.
+
+        ### Returns:
+            int: The number of pages that were queued.
+        """
+
+        template_id = min(self.templates)
+        added = 0
+        batch = []
+
+        for url in urls:
+            url = normalize_url(url = url)
+
+            if url == None or self.follow(url = url) == False:
+                continue
+
+            batch.append((url, url_nickname(url = url), 0, template_id))
+
+            # -- Queue the URLs in batches, so a big sitemap isn't held in
+            # -- memory:
+            if len(batch) >= 1000:
+                with self.lock:
+                    added += self._add_pages(pages = batch)
+
+                batch = []
+
+        with self.lock:
+            added += self._add_pages(pages = batch)
+
+        self.log.info(f"Queued {added} starting page(s) from the sitemap.")
+
+        return added
+
+    def add_links(self,
+                  row: tuple,
+                  links: list):
+        """
+        ### Summary:
+            This will queue the links found on a page that can be followed
+            and haven't been seen, if the page isn't at the most depth. It
+            can be called from any thread.
+
+        ### Args:
+            row (PageRow):
+                The row for the page, from rows.
+            links (list):
+                The normalised URLs of the links on the page.
+
+        ### Returns:
+            int: The number of pages that were queued.
+        """
+
+        if row.crawl_depth >= self.max_depth:
+            return 0
+
+        links = [url for url in links if self.follow(url = url)]
+
+        with self.lock:
+            template_id = self.connection.execute("SELECT template_id FROM pages WHERE id = ?", (row.crawl_id,)).fetchone()[0]
+            added = self._add_pages(pages = [(url, url_nickname(url = url), row.crawl_depth + 1, template_id) for url in links])
+
+        self.log.info(f"Found {len(links)} link(s) to follow on {row.nickname}, of which {added} were new and queued.")
+
+        return added
+
+    def link_finder(self, row: tuple):
+        """
+        ### Summary:
+            This will create a function that finds the links in the HTML of a
+            row's page and queues them (see add_links). Pages at the most
+            depth don't need their links, so there is no function for them.
+
+        ### Args:
+            row (PageRow):
+                The row for the page, from rows.
+
+        ### Returns:
+            function: A function that takes the HTML of the page, or None.
+        """
+
+        if row.crawl_depth >= self.max_depth:
+            return None
+
+        def find_links(markup: str):
+            with timer(site_name = self.site_name, stage = "links"):
+                links = extract_links(markup = markup,
+                                      base_url = str(row.url))
+
+            self.add_links(row = row,
+                           links = links)
+
+        return find_links
+
+    def rows(self):
+        """
+        ### Summary:
+            This generator will give out the queued pages as rows, a level at
+            a time, leasing them from the database in batches. When there are
+            no queued pages but some pages that have been given out haven't
+            been finished (so more links may be found), it yields ROWS_PENDING.
+            It stops once every page has been done or max_pages have been
+            given out.
+
+        ### Args:
+            None.
+
+        ### Yields:
+            PageRow: The row for each page, with crawl_id and crawl_depth
+            columns added to the columns of its template.
+        """
+
+        while True:
+            leased = []
+
+            with self.lock:
+                if self.max_pages <= 0 or self.given_out < self.max_pages:
+                    limit = self.lease_batch if self.max_pages <= 0 else min(self.lease_batch, self.max_pages - self.given_out)
+                    leased = self.connection.execute(
+                        """SELECT id, url, nickname, depth, template_id FROM pages
+                           WHERE status = 'queued' ORDER BY depth, id LIMIT ?""",
+                        (limit,)).fetchall()
+                    self.connection.executemany("UPDATE pages SET status = 'leased' WHERE id = ?",
+                                                [(page_id,) for page_id, *_ in leased])
+                    self.given_out += len(leased)
+                    self.outstanding += len(leased)
+
+            if leased == []:
+                if self.outstanding > 0 and (self.max_pages <= 0 or self.given_out < self.max_pages):
+                    yield ROWS_PENDING
+                    continue
+
+                if self.max_pages > 0 and self.given_out >= self.max_pages:
+                    self.log.info(f"Stopping the crawl as {self.max_pages} page(s) have been crawled.")
+
+                return
+
+            for page_id, url, nickname, depth, template_id in leased:
+                row_data = dict(self.templates[template_id])
+                row_data.update({"url": url, "nickname": nickname, "crawl_id": page_id, "crawl_depth": depth})
+                fields = tuple(row_data)
+
+                # -- Only make a named tuple type once for each set of columns:
+                if fields not in self.row_types:
+                    self.row_types[fields] = namedtuple("PageRow", fields, rename = True)
+
+                yield self.row_types[fields](*row_data.values())
+
+    def finish(self,
+               row: tuple,
+               status: str):
+        """
+        ### Summary:
+            This will mark a page that was given out as done (or failed).
+
+        ### Args:
+            row (PageRow):
+                The row for the page, from rows.
+            status (str):
+                The status of the row from the processor (succeeded,
+                unchanged or failed).
+
+        ### Returns:
+            None
+        """
+
+        with self.lock:
+            self.connection.execute("UPDATE pages SET status = ? WHERE id = ?",
+                                    ("failed" if status == "failed" else "done", row.crawl_id))
+            self.outstanding -= 1
+
+        return
@@ -0,0 +1,221 @@
+# -- Import required libraries / modules:
+from charset_normalizer import from_bytes
+
+from modules.config import DOWNLOAD_CHUNK_BYTES, MAX_BODY_BYTES
+
+import re
+import time
+
+
+# -- Matches the attributes inside a start tag:
+ATTRIBUTE = re.compile(rb"""([^\s=/>]+)(?:\s*=\s*("[^"]*"|'[^']*'|[^\s>]+))?""")
+
+
+class TargetWatcher:
+    """
+    ### Summary:
+        Watches the body of a page as it is downloaded and spots when the tag
+        described by a parse target has been closed, so that the download can
+        be stopped early. Only the tags with the same name as the target are
+        looked at, which is much quicker than parsing the page. Targets that
+        use a CSS selector or don't have a tag name can't be watched.
+
+    ### Args:
+        target (dict):
+            The parse target from modules.parsers.parse_target.
+    """
+
+    def __init__(self, target: dict):
+        tag = re.escape(target["tag"].encode("utf-8"))
+        self.attrs = {name.lower(): value for name, value in target["attrs"].items()}
+        self.start_tag = re.compile(rb"<" + tag + rb"(?=[\s/>])[^>]*>", re.IGNORECASE)
+        self.any_tag = re.compile(rb"<(/?)" + tag + rb"(?=[\s/>])[^>]*>", re.IGNORECASE)
+        self.position = 0
+        self.depth = 0
+        self.found = False
+        self.done = False
+
+    @staticmethod
+    def can_watch(target: dict):
+        """
+        ### Summary:
+            This will check if a parse target can be watched.
+
+        ### Args:
+            target (dict):
+                The parse target.
+
+        ### Returns:
+            bool: True if the target can be watched, otherwise False.
+        """
+
+        return target != None and target["selector"] == None and bool(target["tag"])
+
+    def _matches(self, start_tag: bytes):
+        # -- Check that the start tag has the attributes the target needs:
+        attrs = {}
+
+        for name, value in ATTRIBUTE.findall(start_tag[1:-1]):
+            attrs[name.decode("utf-8", errors = "replace").lower()] = \
+                value.strip(b"\"'").decode("utf-8", errors = "replace")
+
+        for name, value in self.attrs.items():
+            if name == "class":
+                if value not in attrs.get("class", "").split():
+                    return False
+            elif attrs.get(name) != value:
+                return False
+
+        return True
+
+    def feed(self, body: bytes):
+        """
+        ### Summary:
+            This will look at the body that has been downloaded so far.
+
+        ### Args:
+            body (bytes or bytearray):
+                All of the body that has been downloaded so far.
+
+        ### Returns:
+            bool: True once the target has been closed, otherwise False.
+        """
+
+        while self.done == False:
+            if self.found == False:
+                match = self.start_tag.search(body, self.position)
+
+                if match == None:
+                    break
+
+                self.position = match.end()
+
+                if self._matches(start_tag = match.group(0)):
+                    self.found = True
+                    self.depth = 1
+            else:
+                match = self.any_tag.search(body, self.position)
+
+                if match == None:
+                    break
+
+                self.position = match.end()
+                self.depth += -1 if match.group(1) else 1
+
+                if self.depth == 0:
+                    self.done = True
+
+        return self.done
+
+
+def content_type(response):
+    """
+    ### Summary:
+        This function will get the content type of a response without any
+        parameters, such as the charset.
+
+    ### Args:
+        response (requests.Response):
+            The response to check.
+
+    ### Returns:
+        String (str): The content type in lowercase or an empty string if the
+        response does not have one.
+    """
+
+    return response.headers.get("Content-Type", "").split(";")[0].strip().lower()
+
+
+def download_body(response,
+                  max_bytes: int = MAX_BODY_BYTES,
+                  chunk_bytes: int = DOWNLOAD_CHUNK_BYTES,
+                  target: dict = None):
+    """
+    ### Summary:
+        This function will download the body of a response that was requested
+        with stream = True, a chunk at a time. The download is stopped if the
+        body is bigger than max_bytes or, if a parse target is given, once the
+        tag for the target has been closed as the rest of the page isn't
+        needed.
+
+    ### Args:
+        response (requests.Response):
+            The response to download the body for.
+        max_bytes (int, optional):
+            The most bytes to download. Defaults to MAX_BODY_BYTES.
+        chunk_bytes (int, optional):
+            The number of bytes to read at a time. Defaults to
+            DOWNLOAD_CHUNK_BYTES.
+        target (dict, optional):
+            The parse target for the page. Defaults to None.
+
+    ### Returns:
+        dict:
+            body (bytes):
+                The body that was downloaded.
+            too_large (bool):
+                True if the download was stopped because the body was bigger
+                than max_bytes.
+            stopped_early (bool):
+                True if the download was stopped once the target was closed.
+            expected_bytes (int):
+                The size of the body from the Content-Length header (or None).
+            seconds (float):
+                How long the download took.
+    """
+
+    start_time = time.perf_counter()
+    watcher = TargetWatcher(target = target) if TargetWatcher.can_watch(target = target) else None
+    body = bytearray()
+    too_large = False
+    stopped_early = False
+
+    # -- The Content-Length is only the size of the body that is sent if it
+    # -- has not been compressed:
+    expected_bytes = response.headers.get("Content-Length")
+    expected_bytes = int(expected_bytes) if expected_bytes and expected_bytes.isdigit() \
+        and "Content-Encoding" not in response.headers else None
+
+    for chunk in response.iter_content(chunk_size = chunk_bytes):
+        body.extend(chunk)
+
+        if len(body) > max_bytes:
+            too_large = True
+            break
+
+        if watcher != None and watcher.feed(body = body):
+            stopped_early = len(body) != expected_bytes
+            break
+
+    return {"body": bytes(body),
+            "too_large": too_large,
+            "stopped_early": stopped_early,
+            "expected_bytes": expected_bytes,
+            "seconds": time.perf_counter() - start_time}
+
+
+def decode_body(body: bytes,
+                encoding: str = None):
+    """
+    ### Summary:
+        This function will turn the body of a page into text. If the response
+        did not say what encoding it uses, it is detected from the body.
+
+    ### Args:
+        body (bytes):
+            The body of the page.
+        encoding (str, optional):
+            The encoding from the response. Defaults to None.
+
+    ### Returns:
+        tuple: The text and the encoding that was used.
+    """
+
+    if encoding == None:
+        best_match = from_bytes(body).best()
+        encoding = best_match.encoding if best_match != None else "utf-8"
+
+    try:
+        return body.decode(encoding, errors = "replace"), encoding
+    except LookupError:
+        return body.decode("utf-8", errors = "replace"), "utf-8"
@@ -1,10 +1,20 @@
 # -- Import required libraries / modules:
-import inspect
+from datetime import datetime
+from pathlib import Path
+from threading import Lock
+
+from modules.log_setup import get_logger
+from modules.metrics import timed_export
+from modules.results_store import get_results_store
+
 import logging
-import os
 import pandas as pd
+import sqlite3
+import time
+import uuid
 
 
+@timed_export
 def export_to_csv(df: pd.DataFrame, 
                   filepath:str, 
                   filename:str,
@@ -32,7 +42,7 @@ def export_to_csv(df: pd.DataFrame,
     """
     
     # -- Initialise logging:
-    log = logging.getLogger(f"{os.getenv('SCRAPER_APP_NAME')}.{__name__}.{inspect.stack()[0][3]}.{site_name}.{nickname}")
+    log = get_logger(__name__, "export_to_csv", site_name, nickname)
     
     log.info(f"Saving to {filename}.csv in {filepath}.")
     
@@ -50,6 +60,7 @@ def export_to_csv(df: pd.DataFrame,
     return
  
    
+@timed_export
 def export_to_excel(df: pd.DataFrame, 
                     filepath: str, 
                     filename: str,
@@ -76,7 +87,7 @@ def export_to_excel(df: pd.DataFrame,
     """
     
     # -- Initialise logging:
-    log = logging.getLogger(f"{os.getenv('SCRAPER_APP_NAME')}.{__name__}.{inspect.stack()[0][3]}.{site_name}.{nickname}")
+    log = get_logger(__name__, "export_to_excel", site_name, nickname)
     
     log.info(f"Saving to {filename}.xlsx in {filepath}.")
     
@@ -91,4 +102,437 @@ def export_to_excel(df: pd.DataFrame,
     
     log.info(f"File has been saved. The file can be found at {filepath}/{filename}.xlsx.")
     
-    return
\ No newline at end of file
+    return
+
+# -- The compression that can be used for each dataset format:
+DATASET_COMPRESSION = {
+    "parquet": ("snappy", "gzip", "brotli", "zstd", "lz4", "none"),
+    "feather": ("zstd", "lz4", "uncompressed"),
+}
+
+# -- The dataset files written by each site during this run, so that they can
+# -- be combined into one file per partition when the site finishes:
+_dataset_parts = {}
+_dataset_parts_lock = Lock()
+
+
+def dataset_folder(site_output_folder: str,
+                   file_format: str):
+    """
+    ### Summary:
+        This function will return the folder for a dataset. The dataset is 
+        shared by all of the sites, which are kept apart by partitioning the 
+        dataset by site, so it is saved next to the output folders for the 
+        sites.
+
+    ### Args:
+        site_output_folder (str):
+            The path to the output folder for the site.
+        file_format (str):
+            The format of the dataset, parquet or feather.
+
+    ### Returns:
+        Path: The folder for the dataset.
+    """
+    
+    return Path(site_output_folder).parent / "datasets" / file_format
+
+
+def _export_to_dataset(df: pd.DataFrame,
+                       dataset_dir: str,
+                       file_format: str,
+                       compression: str,
+                       nickname: str,
+                       site_name: str,
+                       log: logging.Logger):
+    # -- Check that pyarrow is installed as it is needed for both formats:
+    try:
+        import pyarrow as pa
+        import pyarrow.feather as feather
+        import pyarrow.parquet as pq
+    except ImportError:
+        log.error(f"Unable to save {nickname} to the {file_format} dataset as the pyarrow package is not installed.")
+        print(f"Unable to save {nickname} to the {file_format} dataset as the pyarrow package is not installed.")
+        return
+    
+    if compression not in DATASET_COMPRESSION[file_format]:
+        log.error(f"Unable to save {nickname} to the {file_format} dataset as {compression} compression is not supported.")
+        print(f"Unable to save {nickname} to the {file_format} dataset as {compression} compression is not supported.")
+        return
+    
+    # -- Add the details of the scrape to each row and turn text columns into
+    # -- strings so that every file has a consistent schema:
+    scraped_at = datetime.now()
+    df = df.copy()
+    df.columns = [str(column) for column in df.columns]
+    
+    for column in df.columns:
+        if df[column].dtype == object:
+            df[column] = df[column].astype("string")
+    
+    df["nickname"] = nickname
+    df["scraped_at"] = pd.Timestamp(scraped_at)
+    
+    # -- Each export is saved as a new file in the folder for the site and 
+    # -- day, so nothing is ever re-written. The files for the run are 
+    # -- combined by compact_dataset_parts when the site finishes:
+    partition_folder = Path(f"{dataset_dir}/site={site_name}/year={scraped_at.year}/"
+                            f"month={scraped_at.month:02d}/day={scraped_at.day:02d}")
+    filename = f"part-{scraped_at:%H%M%S%f}-{nickname}-{uuid.uuid4().hex[:8]}.{file_format}"
+    
+    log.info(f"Saving to {filename} in {partition_folder}.")
+    
+    try:
+        partition_folder.mkdir(parents = True, exist_ok = True)
+        table = pa.Table.from_pandas(df, preserve_index = False)
+        
+        if file_format == "parquet":
+            pq.write_table(table, 
+                           where = partition_folder / filename, 
+                           compression = compression)
+        else:
+            feather.write_feather(table, 
+                                  dest = str(partition_folder / filename), 
+                                  compression = compression)
+    except (FileNotFoundError, IOError) as e:
+        log.error(f"Unable to save {filename} in {partition_folder}. Please check that the location is valid.")
+        print(f"Unable to save {filename} in {partition_folder}. Please check that the location is valid.")
+        return
+    
+    with _dataset_parts_lock:
+        _dataset_parts.setdefault(site_name, {}).setdefault((str(partition_folder), file_format, compression), []) \
+            .append(partition_folder / filename)
+    
+    log.info(f"File has been saved. The file can be found at {partition_folder}/{filename}.")
+    
+    return
+
+
+def unify_dataset_schemas(schemas: list):
+    """
+    ### Summary:
+        This function will merge the schemas of the files in a dataset. A 
+        column that is in some of the files only is added. A column whose type
+        differs between files is given a type that can hold both (e.g. int64 
+        and double become double) or, if there isn't one (e.g. int64 and 
+        string, as a column can be numbers on one page and text on another),
+        is read as a string.
+
+    ### Args:
+        schemas (list):
+            The pyarrow schemas to merge.
+
+    ### Returns:
+        pyarrow.Schema: The merged schema.
+    """
+    
+    import pyarrow as pa
+    
+    field_types = {}
+    
+    for schema in schemas:
+        for field in schema:
+            field_types.setdefault(field.name, []).append(field.type)
+    
+    fields = []
+    
+    for name, types in field_types.items():
+        try:
+            fields.append(pa.unify_schemas([pa.schema([(name, field_type)]) for field_type in types],
+                                           promote_options = "permissive").field(name))
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            fields.append(pa.field(name, pa.string()))
+    
+    return pa.schema(fields)
+
+
+def compact_dataset_parts(site_name: str):
+    """
+    ### Summary:
+        This function will combine the dataset files that a site wrote during
+        the run (one for each page) into one file for each partition, so the
+        dataset doesn't fill up with small files. The column types of the 
+        files are settled with unify_dataset_schemas first. The combined file
+        is written under a temporary name and renamed once it is complete, 
+        before the files for the pages are removed, so the rows are never 
+        missing from the dataset. If the files can't be combined, they are 
+        left as they are.
+
+    ### Args:
+        site_name (str):
+            The name of the site folder that is used.
+
+    ### Returns:
+        list: The paths of the combined files.
+    """
+    
+    # -- Initialise logging:
+    log = get_logger(__name__, "compact_dataset_parts", site_name)
+    
+    with _dataset_parts_lock:
+        partitions = _dataset_parts.pop(site_name, {})
+    
+    combined_files = []
+    
+    for (partition_folder, file_format, compression), part_files in partitions.items():
+        part_files = [part_file for part_file in part_files if part_file.is_file()]
+        
+        if len(part_files) < 2:
+            continue
+        
+        import pyarrow as pa
+        import pyarrow.feather as feather
+        import pyarrow.parquet as pq
+        
+        combined_file = Path(partition_folder) / f"run-{datetime.now():%H%M%S%f}-{uuid.uuid4().hex[:8]}.{file_format}"
+        temporary_file = combined_file.with_name(f".{combined_file.name}.tmp")
+        start_time = time.perf_counter()
+        
+        try:
+            tables = [pq.read_table(part_file) if file_format == "parquet" else feather.read_table(str(part_file)) 
+                      for part_file in part_files]
+            schema = unify_dataset_schemas(schemas = [table.schema for table in tables])
+            table = pa.concat_tables([table.select([name for name in schema.names if name in table.column_names])
+                                      .cast(pa.schema([schema.field(name) for name in schema.names if name in table.column_names]))
+                                      for table in tables],
+                                     promote_options = "default")
+            
+            if file_format == "parquet":
+                pq.write_table(table, 
+                               where = temporary_file, 
+                               compression = compression)
+            else:
+                feather.write_feather(table, 
+                                      dest = str(temporary_file), 
+                                      compression = compression)
+            
+            temporary_file.replace(combined_file)
+        except (pa.ArrowException, IOError) as e:
+            log.error(f"Unable to combine {len(part_files)} file(s) in {partition_folder}: {e!r}. They have been left as they are.")
+            print(f"Unable to combine {len(part_files)} file(s) in {partition_folder}: {e!r}. They have been left as they are.")
+            temporary_file.unlink(missing_ok = True)
+            continue
+        
+        for part_file in part_files:
+            part_file.unlink(missing_ok = True)
+        
+        combined_files.append(combined_file)
+        log.info(f"Combined {len(part_files)} file(s) with {table.num_rows} row(s) into {combined_file} "
+                 f"in {time.perf_counter() - start_time:.3f} seconds.")
+    
+    return combined_files
+
+
+@timed_export
+def export_to_parquet(df: pd.DataFrame,
+                      dataset_dir: str,
+                      nickname: str,
+                      site_name: str,
+                      compression: str = "snappy"):
+    """
+    ### Summary:
+        This function will add a pandas dataframe to a Parquet dataset. The 
+        dataset is partitioned by site, year, month and day 
+        (site=<site>/year=<yyyy>/month=<mm>/day=<dd>) and each export adds a 
+        new file to it, which are combined into one file for the run when the
+        site finishes (see compact_dataset_parts). A nickname and scraped_at 
+        column are added to the rows. Use read_dataset to read the whole 
+        dataset back.
+
+    ### Args:
+        df (pd.DataFrame):
+            The dataframe that needs to be exported.
+        dataset_dir (str):
+            The folder for the dataset.
+        nickname (str):
+            The nickname of the site that is being scraped.
+        site_name (str):
+            The name of the site folder that is used.
+        compression (str, optional):
+            The compression to use: snappy, gzip, brotli, zstd, lz4 or none.
+            Defaults to "snappy".
+
+    ### Returns:
+        None
+    """
+    
+    # -- Initialise logging:
+    log = get_logger(__name__, "export_to_parquet", site_name, nickname)
+    
+    _export_to_dataset(df = df,
+                       dataset_dir = dataset_dir,
+                       file_format = "parquet",
+                       compression = compression,
+                       nickname = nickname,
+                       site_name = site_name,
+                       log = log)
+    
+    return
+
+
+@timed_export
+def export_to_feather(df: pd.DataFrame,
+                      dataset_dir: str,
+                      nickname: str,
+                      site_name: str,
+                      compression: str = "zstd"):
+    """
+    ### Summary:
+        This function will add a pandas dataframe to an Arrow / Feather 
+        dataset. The dataset is partitioned by site, year, month and day 
+        (site=<site>/year=<yyyy>/month=<mm>/day=<dd>) and each export adds a 
+        new file to it, which are combined into one file for the run when the
+        site finishes (see compact_dataset_parts). A nickname and scraped_at 
+        column are added to the rows. Use read_dataset to read the whole 
+        dataset back.
+
+    ### Args:
+        df (pd.DataFrame):
+            The dataframe that needs to be exported.
+        dataset_dir (str):
+            The folder for the dataset.
+        nickname (str):
+            The nickname of the site that is being scraped.
+        site_name (str):
+            The name of the site folder that is used.
+        compression (str, optional):
+            The compression to use: zstd, lz4 or uncompressed.
+            Defaults to "zstd".
+
+    ### Returns:
+        None
+    """
+    
+    # -- Initialise logging:
+    log = get_logger(__name__, "export_to_feather", site_name, nickname)
+    
+    _export_to_dataset(df = df,
+                       dataset_dir = dataset_dir,
+                       file_format = "feather",
+                       compression = compression,
+                       nickname = nickname,
+                       site_name = site_name,
+                       log = log)
+    
+    return
+
+
+def read_dataset(dataset_dir: str,
+                 file_format: str = "parquet",
+                 filter = None):
+    """
+    ### Summary:
+        This function will read a dataset written by export_to_parquet or
+        export_to_feather. The schemas of all of the files are merged (see
+        unify_dataset_schemas), so files written before a column was added 
+        can be read together with the ones written after it (the column is 
+        empty for the older rows), as can files where a column has a 
+        different type.
+
+    ### Args:
+        dataset_dir (str):
+            The folder for the dataset.
+        file_format (str, optional):
+            The format of the dataset, parquet or feather.
+            Defaults to "parquet".
+        filter (pyarrow.dataset.Expression, optional):
+            Only read the rows that match this filter, e.g. 
+            pyarrow.dataset.field("site") == "generic_one_table". Filters on
+            site, year, month and day only open the files they need.
+            Defaults to None (every row).
+
+    ### Returns:
+        pd.DataFrame: The rows in the dataset.
+    """
+    
+    import pyarrow.dataset as ds
+    
+    dataset_format = "parquet" if file_format == "parquet" else "ipc"
+    dataset = ds.dataset(dataset_dir, 
+                         format = dataset_format, 
+                         partitioning = "hive")
+    
+    # -- Merge the schema of every file with the partition columns:
+    schema = unify_dataset_schemas(schemas = [dataset.schema] + 
+                                             [fragment.physical_schema for fragment in dataset.get_fragments()])
+    dataset = ds.dataset(dataset_dir, 
+                         format = dataset_format, 
+                         partitioning = "hive",
+                         schema = schema)
+    
+    return dataset.to_table(filter = filter).to_pandas()
+
+
+def results_db_file(site_output_folder: str):
+    """
+    ### Summary:
+        This function will return the path to the results database. The 
+        database is shared by all of the sites, so it is saved next to the
+        output folders for the sites.
+
+    ### Args:
+        site_output_folder (str):
+            The path to the output folder for the site.
+
+    ### Returns:
+        Path: The path to the results database.
+    """
+    
+    return Path(site_output_folder).parent / "results.sqlite"
+
+
+@timed_export
+def export_to_sqlite(df: pd.DataFrame,
+                     db_path: str,
+                     nickname: str,
+                     site_name: str,
+                     key_columns: list = None,
+                     change_detection: bool = True):
+    """
+    ### Summary:
+        This function will store a pandas dataframe in the SQLite results
+        database. Each row is stored under the site, nickname and a key made
+        from the key columns. With change detection on, only the rows that
+        are new or have changed since the last run are written. See
+        modules.results_store.ResultsStore for the details.
+
+    ### Args:
+        df (pd.DataFrame):
+            The dataframe that needs to be exported.
+        db_path (str):
+            The path to the database file.
+        nickname (str):
+            The nickname of the site that is being scraped.
+        site_name (str):
+            The name of the site folder that is used.
+        key_columns (list, optional):
+            The columns that identify a row, e.g. a product code.
+            Defaults to None (the position of the row in the dataframe).
+        change_detection (bool, optional):
+            Whether to only write rows that are new or have changed.
+            Defaults to True.
+
+    ### Returns:
+        None
+    """
+    
+    # -- Initialise logging:
+    log = get_logger(__name__, "export_to_sqlite", site_name, nickname)
+    
+    log.info(f"Saving {len(df)} row(s) to {db_path}.")
+    
+    # -- Attempt to save the rows:
+    try:
+        counts = get_results_store(db_path = db_path).upsert_dataframe(df = df,
+                                                                       site_name = site_name,
+                                                                       nickname = nickname,
+                                                                       key_columns = key_columns,
+                                                                       change_detection = change_detection)
+    except (sqlite3.Error, IOError) as e:
+        log.error(f"Unable to save to {db_path}: {e!r}. Please check that the location is valid.")
+        print(f"Unable to save to {db_path}: {e!r}. Please check that the location is valid.")
+        return
+    
+    log.info(f"Rows have been saved to {db_path}. {counts['changed']} row(s) were new or changed and {counts['unchanged']} were unchanged.")
+    
+    return
@@ -0,0 +1,419 @@
+# -- Import required libraries / modules:
+from datetime import datetime
+from pathlib import Path
+from threading import Lock
+
+from modules.config import EXPORT_BUFFER_MAX_BYTES, EXPORT_BUFFER_MAX_ROWS, EXPORT_BUFFER_MAX_SECONDS
+from modules.log_setup import get_logger
+from modules.metrics import metrics
+
+import atexit
+import pandas as pd
+import time
+
+
+class ExportBuffer:
+    """
+    ### Summary:
+        Collects the dataframes that a site processor creates during a run and
+        writes them to one file for the site, rather than one file per page.
+        The dataframes are held in memory and written (flushed) in batches
+        once there are max_rows rows, they take up max_bytes of memory or
+        max_seconds have passed since the last flush. Anything left is flushed
+        when the buffer is closed, which happens at the end of the site, if
+        the site crashes and when the program exits.
+
+        The file is saved in a folder for the day in the output folder for
+        the site and is named after the time the run started (and the file
+        tag, if there is one, e.g. for a queue worker). A nickname and
+        scraped_at column are added to the rows. If a batch has different
+        columns to the ones already in the file, or (for parquet) columns with
+        types that can't be cast to the types in the file, a new part file is
+        started. A dataframe is only removed from the buffer once it has been
+        written, so rows that couldn't be written are kept for the next flush.
+
+    ### Args:
+        site_name (str):
+            The name of the site folder that is used.
+        site_output_folder (str):
+            The path to the output folder for the site.
+        file_format (str, optional):
+            The format of the file, csv or parquet (needs the pyarrow package).
+            Defaults to "csv".
+        file_tag (str, optional):
+            Added to the name of the file so that several processes writing
+            for the same site don't write to the same file. Defaults to None.
+        max_rows (int, optional):
+            The number of rows to hold before flushing.
+            Defaults to EXPORT_BUFFER_MAX_ROWS.
+        max_bytes (int, optional):
+            The amount of memory the rows can take up before flushing.
+            Defaults to EXPORT_BUFFER_MAX_BYTES.
+        max_seconds (float, optional):
+            The most time between flushes. Defaults to EXPORT_BUFFER_MAX_SECONDS.
+    """
+
+    def __init__(self,
+                 site_name: str,
+                 site_output_folder: str,
+                 file_format: str = "csv",
+                 file_tag: str = None,
+                 max_rows: int = EXPORT_BUFFER_MAX_ROWS,
+                 max_bytes: int = EXPORT_BUFFER_MAX_BYTES,
+                 max_seconds: float = EXPORT_BUFFER_MAX_SECONDS):
+        if file_format not in ("csv", "parquet"):
+            raise ValueError(f"The export buffer format must be csv or parquet, not {file_format}.")
+
+        started_at = datetime.now()
+
+        self.site_name = site_name
+        self.file_format = file_format
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        self.max_seconds = max_seconds
+        self.folder = Path(f"{site_output_folder}/{started_at.year}/{started_at.month}/{started_at.day}")
+        self.file_stem = f"{started_at:%Y-%m-%d-%H%M%S}-{site_name}" + (f"-{file_tag}" if file_tag else "")
+        self.lock = Lock()
+        self.frames = []
+        self.rows = 0
+        self.bytes = 0
+        self.last_flush = time.monotonic()
+        self.columns = None
+        self.part = 0
+        self.parquet_writer = None
+        self.files = []
+        self.closed = False
+
+        # -- Initialise logging:
+        self.log = get_logger(__name__, "ExportBuffer", site_name)
+
+    def push(self,
+             df: pd.DataFrame,
+             nickname: str):
+        """
+        ### Summary:
+            This will add a dataframe to the buffer and flush the buffer if it
+            is full or it is time to.
+
+        ### Args:
+            df (pd.DataFrame):
+                The dataframe to add.
+            nickname (str):
+                The nickname of the page that the dataframe came from.
+
+        ### Returns:
+            None
+        """
+
+        df = df.copy()
+        df.columns = [str(column) for column in df.columns]
+        df["nickname"] = nickname
+        df["scraped_at"] = pd.Timestamp(datetime.now())
+
+        with self.lock:
+            if self.closed == True:
+                raise ValueError(f"The export buffer for {self.site_name} has been closed.")
+
+            nbytes = int(df.memory_usage(deep = True).sum())
+            self.frames.append((df, nbytes))
+            self.rows += len(df)
+            self.bytes += nbytes
+
+            if self.rows >= self.max_rows or self.bytes >= self.max_bytes \
+                    or time.monotonic() - self.last_flush >= self.max_seconds:
+                self._flush()
+
+        return
+
+    def push_records(self,
+                     records,
+                     nickname: str,
+                     batch_rows: int = 1000):
+        """
+        ### Summary:
+            This will add the records that a processor yields to the buffer,
+            batch_rows at a time, so that a page never has to be held as one
+            big dataframe. Each record can be a dict (one row) or a dataframe.
+
+        ### Args:
+            records (iterable):
+                The records to add, e.g. a generator from process_soup.
+            nickname (str):
+                The nickname of the page that the records came from.
+            batch_rows (int, optional):
+                The number of rows to turn into a dataframe at once.
+                Defaults to 1000.
+
+        ### Returns:
+            int: The number of rows that were added.
+        """
+
+        batch = []
+        rows = 0
+
+        for record in records:
+            if isinstance(record, pd.DataFrame):
+                self.push(df = record,
+                          nickname = nickname)
+                rows += len(record)
+                continue
+
+            batch.append(record)
+
+            if len(batch) >= batch_rows:
+                self.push(df = pd.DataFrame(batch),
+                          nickname = nickname)
+                rows += len(batch)
+                batch = []
+
+        if batch != []:
+            self.push(df = pd.DataFrame(batch),
+                      nickname = nickname)
+            rows += len(batch)
+
+        return rows
+
+    def flush(self):
+        """
+        ### Summary:
+            This will write the rows in the buffer to the file.
+
+        ### Args:
+            None.
+
+        ### Returns:
+            None
+        """
+
+        with self.lock:
+            self._flush()
+
+        return
+
+    def close(self):
+        """
+        ### Summary:
+            This will flush the buffer and close the file. It is safe to call
+            more than once.
+
+        ### Args:
+            None.
+
+        ### Returns:
+            list: The paths of the files that were written.
+        """
+
+        with self.lock:
+            if self.closed == False:
+                try:
+                    self._flush()
+                finally:
+                    if self.parquet_writer != None:
+                        self.parquet_writer.close()
+                        self.parquet_writer = None
+
+                    self.closed = True
+
+                    if self.files != []:
+                        self.log.info(f"Export buffer closed. Files written: {[str(file) for file in self.files]}.")
+
+        return list(self.files)
+
+    def _current_file(self):
+        suffix = "" if self.part <= 1 else f"-part{self.part}"
+
+        return self.folder / f"{self.file_stem}{suffix}.{self.file_format}"
+
+    def _flush(self):
+        self.last_flush = time.monotonic()
+
+        if self.frames == []:
+            return
+
+        start_time = time.perf_counter()
+        rows_written = 0
+
+        try:
+            while self.frames != []:
+                df, nbytes = self.frames[0]
+
+                # -- Start a new part file if the columns have changed:
+                if self.columns == None or set(df.columns) != set(self.columns):
+                    self._start_part(columns = list(df.columns))
+
+                self._write(df = df[self.columns])
+
+                # -- Only drop the dataframe once it has been written:
+                self.frames.pop(0)
+                self.rows -= len(df)
+                self.bytes -= nbytes
+                rows_written += len(df)
+        except Exception as e:
+            self.log.error(f"Unable to write {self.rows} row(s) to {self._current_file()}: {e!r}. "
+                           f"They are kept in the buffer.")
+            raise
+        finally:
+            seconds = time.perf_counter() - start_time
+            metrics.record(site_name = self.site_name, stage = "export", seconds = seconds)
+            metrics.record(site_name = self.site_name, stage = "export_buffer_flush", seconds = seconds)
+
+        self.log.info(f"Flushed {rows_written} row(s) to {self._current_file()} in {seconds:.3f} seconds.")
+
+    def _start_part(self, columns: list):
+        if self.parquet_writer != None:
+            self.parquet_writer.close()
+            self.parquet_writer = None
+
+        self.columns = columns
+        self.part += 1
+        self.files.append(self._current_file())
+
+    def _write(self, df: pd.DataFrame):
+        self.folder.mkdir(parents = True, exist_ok = True)
+        file = self._current_file()
+
+        if self.file_format == "csv":
+            df.to_csv(file,
+                      mode = "a",
+                      header = file.is_file() == False,
+                      index = False)
+            return
+
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        for column in df.columns:
+            if df[column].dtype == object:
+                df[column] = df[column].astype("string")
+
+        table = pa.Table.from_pandas(df, preserve_index = False)
+
+        # -- The types of a column can change from page to page (e.g. numbers
+        # -- on one page and text on the next). Cast the batch to the types in
+        # -- the file and if that can't be done, start a new part file:
+        if self.parquet_writer != None and table.schema != self.parquet_writer.schema:
+            try:
+                table = table.cast(self.parquet_writer.schema)
+            except (pa.ArrowInvalid, pa.ArrowNotImplementedError) as e:
+                self.log.warning(f"The column types have changed ({e}). Starting a new part file.")
+                self._start_part(columns = self.columns)
+                file = self._current_file()
+
+        if self.parquet_writer == None:
+            self.parquet_writer = pq.ParquetWriter(file, table.schema)
+
+        self.parquet_writer.write_table(table)
+
+
+# -- The export buffers that are open, keyed by site name:
+_export_buffers = {}
+_export_buffer_settings = {}
+_export_buffers_lock = Lock()
+
+
+def configure_export_buffer(site_name: str,
+                            site_output_folder: str,
+                            file_format: str = "csv",
+                            file_tag: str = None):
+    """
+    ### Summary:
+        This function will set up where the export buffer for a site is saved.
+        The buffer itself is only created the first time the site processor
+        asks for it, so sites that don't use it don't get an empty file.
+
+    ### Args:
+        site_name (str):
+            The name of the site folder that is used.
+        site_output_folder (str):
+            The path to the output folder for the site.
+        file_format (str, optional):
+            The format of the file, csv or parquet. Defaults to "csv".
+        file_tag (str, optional):
+            Added to the name of the file. Defaults to None.
+
+    ### Returns:
+        None
+    """
+
+    with _export_buffers_lock:
+        _export_buffer_settings[site_name] = {"site_output_folder": site_output_folder,
+                                              "file_format": file_format,
+                                              "file_tag": file_tag}
+
+    return
+
+
+def get_export_buffer(site_name: str):
+    """
+    ### Summary:
+        This function will return the export buffer for a site, for site
+        processors to push their dataframes into.
+
+    ### Args:
+        site_name (str):
+            The name of the site folder that is used.
+
+    ### Returns:
+        ExportBuffer: The export buffer for the site.
+    """
+
+    with _export_buffers_lock:
+        if site_name not in _export_buffers:
+            if site_name not in _export_buffer_settings:
+                raise KeyError(f"No export buffer has been configured for {site_name}.")
+
+            _export_buffers[site_name] = ExportBuffer(site_name = site_name,
+                                                      **_export_buffer_settings[site_name])
+
+        return _export_buffers[site_name]
+
+
+def close_export_buffer(site_name: str):
+    """
+    ### Summary:
+        This function will flush and close the export buffer for a site, if
+        it has one.
+
+    ### Args:
+        site_name (str):
+            The name of the site folder that is used.
+
+    ### Returns:
+        list: The paths of the files that were written.
+    """
+
+    with _export_buffers_lock:
+        export_buffer = _export_buffers.pop(site_name, None)
+        _export_buffer_settings.pop(site_name, None)
+
+    if export_buffer == None:
+        return []
+
+    return export_buffer.close()
+
+
+@atexit.register
+def close_all_export_buffers():
+    """
+    ### Summary:
+        This function will flush and close every export buffer that is still
+        open. It runs when the program exits so that rows are not lost if a
+        site is stopped part way through.
+
+    ### Args:
+        None.
+
+    ### Returns:
+        None
+    """
+
+    for site_name in list(_export_buffers):
+        try:
+            close_export_buffer(site_name = site_name)
+        except Exception as e:
+            # -- Initialise logging:
+            log = get_logger(__name__, "close_all_export_buffers")
+
+            log.error(f"Unable to close the export buffer for {site_name}: {e!r}.")
+
+    return
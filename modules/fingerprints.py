@@ -0,0 +1,225 @@
+# -- Import required libraries / modules:
+from datetime import datetime
+from pathlib import Path
+from threading import Lock
+from bs4.element import Tag
+
+from modules.config import FINGERPRINT_DB_FILE
+from modules.log_setup import get_logger
+
+import hashlib
+import re
+import sqlite3
+
+
+# -- The parts of a page that are removed before it is hashed, as they often
+# -- change on every request (e.g. tokens in scripts) without the content of
+# -- the page changing:
+NOISE = re.compile(r"<!--.*?-->|<script\b.*?</script\s*>|<style\b.*?</style\s*>|<noscript\b.*?</noscript\s*>",
+                   re.IGNORECASE | re.DOTALL)
+WHITESPACE = re.compile(r"\s+")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS fingerprints (
+    site TEXT NOT NULL,
+    url TEXT NOT NULL,
+    nickname TEXT NOT NULL,
+    mode TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    changed_at TEXT NOT NULL,
+    checked_at TEXT NOT NULL,
+    skip_count INTEGER NOT NULL DEFAULT 0,
+    last_skipped_at TEXT,
+    PRIMARY KEY (site, url)
+);
+CREATE INDEX IF NOT EXISTS idx_fingerprints_site ON fingerprints (site, nickname);
+"""
+
+
+def normalize_html(markup: str):
+    """
+    ### Summary:
+        This function will remove the comments, scripts and styles from a page
+        and collapse its whitespace, so that pages whose content is the same
+        have the same hash.
+
+    ### Args:
+        markup (str):
+            The HTML of the page.
+
+    ### Returns:
+        String (str): The normalised HTML.
+    """
+
+    return WHITESPACE.sub(" ", NOISE.sub("", markup)).strip()
+
+
+def content_hash(content: str):
+    """
+    ### Summary:
+        This function will create a hash of some content.
+
+    ### Args:
+        content (str):
+            The content to hash.
+
+    ### Returns:
+        String (str): The hash as hex.
+    """
+
+    return hashlib.blake2b(content.encode("utf-8", errors = "replace"), digest_size = 20).hexdigest()
+
+
+def soup_fingerprint(soup):
+    """
+    ### Summary:
+        This function will create a hash of the part of a page that was
+        parsed, for the region dedupe mode.
+
+    ### Args:
+        soup (BeautifulSoup or selectolax tree):
+            The parsed page.
+
+    ### Returns:
+        String (str): The hash as hex.
+    """
+
+    markup = str(soup) if isinstance(soup, Tag) else (soup.html or "")
+
+    return content_hash(content = normalize_html(markup = markup))
+
+
+class FingerprintIndex:
+    """
+    ### Summary:
+        A SQLite index of a hash (fingerprint) for each URL that has been
+        processed, used to skip pages that haven't changed since they were
+        last processed. A new hash is only saved once the page has been
+        processed successfully, so a page that failed is processed again on
+        the next run. The number of times a page has been skipped since it
+        last changed is counted. Fingerprints are kept for each site and URL,
+        so sites that share a URL don't overwrite each other's fingerprint.
+
+    ### Args:
+        db_path (str, optional):
+            The path to the database file. Defaults to FINGERPRINT_DB_FILE.
+    """
+
+    def __init__(self, db_path: str = FINGERPRINT_DB_FILE):
+        Path(db_path).parent.mkdir(parents = True, exist_ok = True)
+
+        self.lock = Lock()
+        self.pending = {}
+        self.connection = sqlite3.connect(str(db_path),
+                                          timeout = 60,
+                                          check_same_thread = False)
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        self.connection.executescript(SCHEMA)
+
+    def check(self,
+              url: str,
+              site_name: str,
+              nickname: str,
+              mode: str,
+              fingerprint: str):
+        """
+        ### Summary:
+            This will check if a page has the same fingerprint as when it was
+            last processed. If it has, the skip is recorded. If not, the new
+            fingerprint is held until commit is called.
+
+        ### Args:
+            url (str):
+                The URL of the page.
+            site_name (str):
+                The name of the site folder that is used.
+            nickname (str):
+                The nickname of the page.
+            mode (str):
+                What was hashed, html or region.
+            fingerprint (str):
+                The hash of the page.
+
+        ### Returns:
+            bool: True if the page has not changed, otherwise False.
+        """
+
+        now = datetime.now().isoformat(timespec = "seconds")
+
+        with self.lock, self.connection:
+            stored = self.connection.execute("SELECT content_hash, mode FROM fingerprints WHERE site = ? AND url = ?",
+                                             (site_name, url)).fetchone()
+
+            if stored == (fingerprint, mode):
+                self.connection.execute("""UPDATE fingerprints SET checked_at = ?, last_skipped_at = ?,
+                                           skip_count = skip_count + 1 WHERE site = ? AND url = ?""",
+                                        (now, now, site_name, url))
+                return True
+
+            self.pending[(site_name, url)] = (site_name, url, nickname, mode, fingerprint, now, now)
+
+        return False
+
+    def commit(self,
+               url: str,
+               site_name: str):
+        """
+        ### Summary:
+            This will save the fingerprint for a page once it has been
+            processed successfully.
+
+        ### Args:
+            url (str):
+                The URL of the page.
+            site_name (str):
+                The name of the site folder that is used.
+
+        ### Returns:
+            None
+        """
+
+        with self.lock, self.connection:
+            record = self.pending.pop((site_name, url), None)
+
+            if record != None:
+                self.connection.execute(
+                    """INSERT INTO fingerprints (site, url, nickname, mode, content_hash, changed_at, checked_at)
+                       VALUES (?, ?, ?, ?, ?, ?, ?)
+                       ON CONFLICT (site, url) DO UPDATE SET nickname = excluded.nickname,
+                           mode = excluded.mode, content_hash = excluded.content_hash,
+                           changed_at = excluded.changed_at, checked_at = excluded.checked_at,
+                           skip_count = 0""",
+                    record)
+
+        return
+
+
+# -- The fingerprint index that is shared by every site in this process:
+_fingerprint_index = None
+_fingerprint_index_lock = Lock()
+
+
+def get_fingerprint_index():
+    """
+    ### Summary:
+        This function will return the fingerprint index that is shared by the
+        whole run, opening it the first time it is needed.
+
+    ### Args:
+        None.
+
+    ### Returns:
+        FingerprintIndex: The shared fingerprint index.
+    """
+
+    global _fingerprint_index
+
+    with _fingerprint_index_lock:
+        if _fingerprint_index == None:
+            # -- Initialise logging:
+            log = get_logger(__name__, "get_fingerprint_index")
+
+            log.info(f"Opening the fingerprint index {FINGERPRINT_DB_FILE}.")
+            _fingerprint_index = FingerprintIndex()
+
+    return _fingerprint_index
@@ -1,7 +1,6 @@
 # -- Import required libraries / modules:
-import inspect
-import logging
-import os
+from modules.log_setup import get_logger
+
 import platform
 
 
@@ -28,7 +27,7 @@ def get_os_summary():
     """
     
     # -- Initialise logging:
-    log = logging.getLogger(f"{os.getenv('SCRAPER_APP_NAME')}.{__name__}.{inspect.stack()[0][3]}")
+    log = get_logger(__name__, "get_os_summary")
     
     log.info("Collecting operating system information.")
     
@@ -0,0 +1,267 @@
+# -- Import required libraries / modules:
+from pathlib import Path
+from threading import Lock
+
+from modules.config import HTTP_CACHE_DIR, HTTP_CACHE_MAX_BYTES
+from modules.log_setup import get_logger
+
+import hashlib
+import json
+import os
+import time
+
+
+class ResponseCache:
+    """
+    ### Summary:
+        An on-disk cache of the pages that have been scraped. For each URL, the
+        body of the page is saved along with its ETag and Last-Modified headers
+        so that the next request for the URL can ask the site to only send the
+        page if it has changed (a conditional GET). If the site replies with a 
+        304 (Not Modified), the body in the cache is used instead.
+
+        Each URL is saved as two files named after a hash of the URL: 
+        <hash>.body holds the body and <hash>.json holds the headers and when 
+        the page was last used. Once the total size of the bodies is more than
+        max_bytes, the pages that were used least recently are removed.
+
+    ### Args:
+        cache_dir (str, optional):
+            The folder to save the cache to. Defaults to HTTP_CACHE_DIR.
+        max_bytes (int, optional):
+            The most bytes that the bodies in the cache can take up.
+            Defaults to HTTP_CACHE_MAX_BYTES.
+    """
+    
+    def __init__(self, 
+                 cache_dir: str = HTTP_CACHE_DIR,
+                 max_bytes: int = HTTP_CACHE_MAX_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.lock = Lock()
+        self.index = None
+        self.total_bytes = 0
+        
+        self.cache_dir.mkdir(parents = True, exist_ok = True)
+        
+    def _key(self, url: str):
+        return hashlib.sha256(url.encode("utf-8")).hexdigest()
+    
+    def _load_index(self):
+        # -- Read the details of every page in the cache the first time they
+        # -- are needed:
+        if self.index != None:
+            return
+        
+        self.index = {}
+        
+        for meta_file in self.cache_dir.glob("*.json"):
+            try:
+                entry = json.loads(meta_file.read_text(encoding = "utf-8"))
+            except (OSError, ValueError):
+                continue
+            
+            self.index[meta_file.stem] = entry
+            self.total_bytes += entry["size"]
+    
+    def _write_meta(self, key: str, entry: dict):
+        # -- Write to a temporary file first so that a half written file is 
+        # -- never read:
+        temp_file = self.cache_dir / f"{key}.json.{os.getpid()}.tmp"
+        temp_file.write_text(json.dumps(entry), encoding = "utf-8")
+        os.replace(temp_file, self.cache_dir / f"{key}.json")
+    
+    def _remove(self, key: str):
+        entry = self.index.pop(key, None)
+        
+        if entry != None:
+            self.total_bytes -= entry["size"]
+        
+        for suffix in (".json", ".body"):
+            try:
+                (self.cache_dir / f"{key}{suffix}").unlink()
+            except FileNotFoundError:
+                pass
+    
+    def lookup(self, url: str):
+        """
+        ### Summary:
+            This will look up a URL in the cache.
+
+        ### Args:
+            url (str):
+                The URL to look up.
+
+        ### Returns:
+            dict: The details of the cached page (url, etag, last_modified,
+            encoding, size and last_used) with its body under the key body
+            or None if the URL is not in the cache.
+        """
+        
+        key = self._key(url)
+        
+        with self.lock:
+            self._load_index()
+            entry = self.index.get(key)
+            
+            if entry == None:
+                return
+            
+            try:
+                body = (self.cache_dir / f"{key}.body").read_bytes()
+            except OSError:
+                # -- The body has gone (e.g. removed by another process), so
+                # -- forget about the page:
+                self._remove(key)
+                return
+            
+        return dict(entry, body = body)
+    
+    def conditional_headers(self, entry: dict):
+        """
+        ### Summary:
+            This will create the headers that ask a site to only send a page
+            if it has changed since it was cached.
+
+        ### Args:
+            entry (dict):
+                The cached page returned by lookup.
+
+        ### Returns:
+            dict: The If-None-Match and / or If-Modified-Since headers.
+        """
+        
+        headers = {}
+        
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        
+        return headers
+    
+    def touch(self, url: str):
+        """
+        ### Summary:
+            This will mark a cached page as just used so that it is one of the
+            last to be removed from the cache.
+
+        ### Args:
+            url (str):
+                The URL of the page.
+
+        ### Returns:
+            None
+        """
+        
+        key = self._key(url)
+        
+        with self.lock:
+            self._load_index()
+            entry = self.index.get(key)
+            
+            if entry != None:
+                entry["last_used"] = time.time()
+                self._write_meta(key = key, entry = entry)
+        
+        return
+    
+    def store(self, 
+              url: str, 
+              body: bytes, 
+              etag: str, 
+              last_modified: str,
+              encoding: str):
+        """
+        ### Summary:
+            This will save a page to the cache and remove the least recently
+            used pages if the cache has become too big. Pages without an ETag
+            or Last-Modified header are not saved as they can't be checked
+            with a conditional GET.
+
+        ### Args:
+            url (str):
+                The URL of the page.
+            body (bytes):
+                The body of the page.
+            etag (str):
+                The ETag header sent with the page (or None).
+            last_modified (str):
+                The Last-Modified header sent with the page (or None).
+            encoding (str):
+                The text encoding of the body.
+
+        ### Returns:
+            None
+        """
+        
+        # -- Initialise logging:
+        log = get_logger(__name__, "store")
+        
+        if etag == None and last_modified == None:
+            return
+        
+        if len(body) > self.max_bytes:
+            log.info(f"Not caching {url} as its body is bigger than the cache.")
+            return
+        
+        key = self._key(url)
+        entry = {"url": url, 
+                 "etag": etag, 
+                 "last_modified": last_modified, 
+                 "encoding": encoding,
+                 "size": len(body), 
+                 "last_used": time.time()}
+        
+        with self.lock:
+            self._load_index()
+            self._remove(key)
+            
+            temp_file = self.cache_dir / f"{key}.body.{os.getpid()}.tmp"
+            temp_file.write_bytes(body)
+            os.replace(temp_file, self.cache_dir / f"{key}.body")
+            self._write_meta(key = key, entry = entry)
+            
+            self.index[key] = entry
+            self.total_bytes += entry["size"]
+            
+            # -- Remove the least recently used pages until the cache is small
+            # -- enough:
+            if self.total_bytes > self.max_bytes:
+                for old_key, old_entry in sorted(self.index.items(), 
+                                                 key = lambda item: item[1]["last_used"]):
+                    if self.total_bytes <= self.max_bytes:
+                        break
+                    
+                    log.info(f"Removing {old_entry['url']} from the cache.")
+                    self._remove(old_key)
+        
+        return
+
+
+# -- The cache that is shared by every request made in this process:
+_response_cache = None
+_response_cache_lock = Lock()
+
+
+def get_response_cache():
+    """
+    ### Summary:
+        This function will return the response cache that is shared by the
+        whole run, creating it the first time it is needed.
+
+    ### Args:
+        None.
+
+    ### Returns:
+        ResponseCache: The shared response cache.
+    """
+    
+    global _response_cache
+    
+    with _response_cache_lock:
+        if _response_cache == None:
+            _response_cache = ResponseCache()
+    
+    return _response_cache
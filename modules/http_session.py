@@ -0,0 +1,163 @@
+# -- Import required libraries / modules:
+from importlib import util
+from requests import Session
+from requests.adapters import HTTPAdapter
+from threading import Lock
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from modules.config import POOL_CONNECTIONS_PER_HOST, POOL_HOSTS
+from modules.log_setup import get_logger
+from modules.metrics import current_site, metrics
+
+import time
+
+
+# -- The session that is shared by every request made in this process:
+_session = None
+_session_lock = Lock()
+
+
+class TimedHTTPConnection(HTTPConnection):
+    """
+    ### Summary:
+        An HTTP connection that records how long it takes to connect (the DNS
+        lookup and TCP connect) for the site the thread is working on.
+    """
+
+    def _new_conn(self):
+        start_time = time.perf_counter()
+        sock = super()._new_conn()
+        self.connect_seconds = time.perf_counter() - start_time
+
+        metrics.record(site_name = current_site(), 
+                       stage = "connect", 
+                       seconds = self.connect_seconds)
+
+        return sock
+
+
+class TimedHTTPSConnection(TimedHTTPConnection, HTTPSConnection):
+    """
+    ### Summary:
+        An HTTPS connection that records how long it takes to connect and how
+        long the TLS handshake takes for the site the thread is working on.
+    """
+
+    def connect(self):
+        start_time = time.perf_counter()
+        self.connect_seconds = 0.0
+        super().connect()
+
+        metrics.record(site_name = current_site(), 
+                       stage = "tls", 
+                       seconds = time.perf_counter() - start_time - self.connect_seconds)
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+class TimedHTTPAdapter(HTTPAdapter):
+    """
+    ### Summary:
+        A transport adapter that uses the timed connections.
+    """
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {"http": TimedHTTPConnectionPool,
+                                                   "https": TimedHTTPSConnectionPool}
+
+
+def accepted_encodings():
+    """
+    ### Summary:
+        This will return the value to use for the Accept-Encoding header.
+        Brotli (br) is only included when the brotli (or brotlicffi) package
+        is installed, as it is needed to decode the responses. The packages
+        are only looked for here, not imported.
+
+    ### Args:
+        None.
+
+    ### Returns:
+        String (str): The encodings that can be accepted.
+    """
+    
+    if util.find_spec("brotli") == None and util.find_spec("brotlicffi") == None:
+        return "gzip, deflate"
+    
+    return "gzip, deflate, br"
+
+
+def get_session(connections_per_host: int = POOL_CONNECTIONS_PER_HOST,
+                pool_hosts: int = POOL_HOSTS):
+    """
+    ### Summary:
+        This function will return the requests session that is shared by the
+        whole run, creating it the first time it is needed. The session keeps
+        connections to each host open (keep-alive) so that they can be used 
+        again by later requests and limits the number of connections that can
+        be open to a single host. If every connection to a host is in use, a
+        request will wait for one to become free.
+
+    ### Args:
+        connections_per_host (int, optional):
+            The most connections that can be open to a single host at once.
+            Defaults to POOL_CONNECTIONS_PER_HOST.
+        pool_hosts (int, optional):
+            The number of hosts to keep a pool of connections for.
+            Defaults to POOL_HOSTS.
+
+    ### Returns:
+        requests.Session: The shared session.
+    """
+    
+    global _session
+    
+    with _session_lock:
+        if _session == None:
+            # -- Initialise logging:
+            log = get_logger(__name__, "get_session")
+            
+            log.info(f"Creating HTTP session with up to {connections_per_host} connection(s) per host.")
+            
+            adapter = TimedHTTPAdapter(pool_connections = pool_hosts,
+                                       pool_maxsize = connections_per_host,
+                                       pool_block = True)
+            
+            _session = Session()
+            _session.mount("http://", adapter)
+            _session.mount("https://", adapter)
+            _session.headers.update({"Accept-Encoding": accepted_encodings(),
+                                     "Connection": "keep-alive"})
+    
+    return _session
+
+
+def close_session():
+    """
+    ### Summary:
+        This function will close the shared session and any connections it 
+        has open.
+
+    ### Args:
+        None.
+
+    ### Returns:
+        None
+    """
+    
+    global _session
+    
+    with _session_lock:
+        if _session != None:
+            _session.close()
+            _session = None
+    
+    return
@@ -0,0 +1,332 @@
+# -- Import required libraries / modules:
+from contextlib import contextmanager
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener
+from threading import Lock
+
+from modules.config import LOG_FORMAT, LOG_FORMATS
+
+import atexit
+import functools
+import json
+import logging
+import multiprocessing
+import multiprocessing.util
+import os
+import queue
+
+
+# -- The format of each line in the log files when LOG_FORMAT is text:
+TEXT_LOG_FORMAT = "%(levelname)s:%(asctime)s:%(name)s:%(message)s"
+
+# -- The fields that are added to every log record made in the current
+# -- thread, e.g. the site and page that is being processed:
+_log_context = ContextVar("log_context", default = {})
+
+# -- The listener that writes the log records to the log files in a thread of
+# -- its own, and the process that started it:
+_listener = None
+_listener_pid = None
+_listener_lock = Lock()
+_log_format = LOG_FORMAT
+
+
+def get_logger(*name_parts):
+    """
+    ### Summary:
+        This function will return the logger named after the application and
+        the parts given, e.g. get_logger(__name__, "url_scraper", site_name)
+        returns the logger scraper.modules.scraper.url_scraper.<site_name>.
+        The loggers are cached, so it is cheap to call for every row.
+
+    ### Args:
+        *name_parts (str):
+            The parts of the name of the logger after the application name.
+
+    ### Returns:
+        logging.Logger: The logger.
+    """
+
+    return _cached_logger(os.getenv("SCRAPER_APP_NAME"), name_parts)
+
+
+@functools.lru_cache(maxsize = 4096)
+def _cached_logger(app_name: str,
+                   name_parts: tuple):
+    return logging.getLogger(".".join(str(part) for part in (app_name, *name_parts)))
+
+
+@contextmanager
+def log_context(**fields):
+    """
+    ### Summary:
+        This context manager will add the fields given to every log record
+        made inside it, in the current thread. They are written to the log
+        files when LOG_FORMAT is json.
+
+    ### Args:
+        **fields:
+            The fields to add, e.g. site = site_name, nickname = row.nickname.
+
+    ### Yields:
+        None
+    """
+
+    token = _log_context.set({**_log_context.get(), **fields})
+
+    try:
+        yield
+    finally:
+        _log_context.reset(token)
+
+
+class ContextFilter(logging.Filter):
+    """
+    ### Summary:
+        A logging filter that copies the fields from log_context onto each
+        log record. It is run in the thread that made the record, before the
+        record is put on the queue.
+    """
+
+    def filter(self, record: logging.LogRecord):
+        record.context = _log_context.get()
+
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    ### Summary:
+        A logging formatter that writes each record as a line of JSON with the
+        time, level, logger, process, thread and message, along with the fields
+        from log_context.
+    """
+
+    def format(self, record: logging.LogRecord):
+        entry = dict(getattr(record, "context", {}))
+        entry.update({"time": self.formatTime(record),
+                      "level": record.levelname,
+                      "logger": record.name,
+                      "process": record.process,
+                      "thread": record.threadName,
+                      "message": record.getMessage()})
+
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+
+        return json.dumps(entry, default = str)
+
+
+def make_formatter(log_format: str):
+    """
+    ### Summary:
+        This function will make the formatter for the log files.
+
+    ### Args:
+        log_format (str):
+            text or json.
+
+    ### Returns:
+        logging.Formatter: The formatter.
+    """
+
+    if log_format == "json":
+        return JsonFormatter()
+
+    return logging.Formatter(TEXT_LOG_FORMAT)
+
+
+def logger(name: str,
+           log_folder: str,
+           log_format: str = LOG_FORMAT):
+    """
+    ### Summary:
+        This function will set up logging for the process. Log records are
+        put on a queue by the thread that makes them and written to the log
+        file by a listener thread, so that writing to the log files doesn't
+        slow down scraping. It is called again in each process that is started
+        for a site, as the listener thread is not copied to new processes.
+
+    ### Args:
+        name (str):
+            The name of the logger to return.
+        log_folder (str):
+            The path to the log file for the whole run (main.log).
+        log_format (str, optional):
+            text or json. Defaults to LOG_FORMAT.
+
+    ### Returns:
+        logging.Logger: The logger.
+    """
+
+    global _listener, _listener_pid, _log_format
+
+    if log_format not in LOG_FORMATS:
+        print(f"Error: The log format {log_format!r} is not one of {LOG_FORMATS}. Using text.")
+        log_format = "text"
+
+    with _listener_lock:
+        # -- Stop the listener from an earlier call in this process. One that
+        # -- was copied from the parent process has no thread to stop:
+        if _listener != None and _listener_pid == os.getpid():
+            _stop_listener()
+
+        file_handler = logging.FileHandler(filename = log_folder)
+        file_handler.setLevel(logging.INFO)
+        file_handler.setFormatter(make_formatter(log_format = log_format))
+
+        # -- Every file handler only writes INFO and above, so lower levels are
+        # -- dropped before they are put on the queue:
+        log_queue = queue.Queue()
+        queue_handler = QueueHandler(log_queue)
+        queue_handler.setLevel(logging.INFO)
+        queue_handler.addFilter(ContextFilter())
+
+        root_logger = logging.getLogger()
+
+        for handler in root_logger.handlers[:]:
+            root_logger.removeHandler(handler)
+            handler.close()
+
+        root_logger.addHandler(queue_handler)
+        root_logger.setLevel(logging.INFO)
+
+        _listener = QueueListener(log_queue, file_handler, respect_handler_level = True)
+        _listener.start()
+        _listener_pid = os.getpid()
+        _log_format = log_format
+
+    # -- Write what is left on the queue when the process exits. Processes
+    # -- started by multiprocessing don't run atexit functions:
+    if multiprocessing.parent_process() != None:
+        multiprocessing.util.Finalize(None, stop_logging, exitpriority = 0)
+    else:
+        atexit.register(stop_logging)
+
+    return logging.getLogger(name)
+
+
+def _stop_listener():
+    # -- Write the records left on the queue and close the log files:
+    _listener.stop()
+
+    for handler in _listener.handlers:
+        handler.close()
+
+
+def stop_logging():
+    """
+    ### Summary:
+        This function will write any log records that are left on the queue
+        and close the log files. It is safe to call more than once.
+
+    ### Args:
+        None.
+
+    ### Returns:
+        None
+    """
+
+    global _listener
+
+    with _listener_lock:
+        if _listener != None and _listener_pid == os.getpid():
+            _stop_listener()
+            _listener = None
+
+    return
+
+
+def flush_logging():
+    """
+    ### Summary:
+        This function will wait until the listener has written every log
+        record that is on the queue.
+
+    ### Args:
+        None.
+
+    ### Returns:
+        None
+    """
+
+    if _listener != None and _listener_pid == os.getpid():
+        _listener.queue.join()
+
+    return
+
+
+class SiteLogFilter(logging.Filter):
+    """
+    ### Summary:
+        A logging filter that only lets through the records that have been
+        logged for a given site. The loggers for a site all have the site name
+        as one of the parts of their name.
+    """
+
+    def __init__(self, site_name: str):
+        super().__init__()
+        self.site_part = f".{site_name}."
+
+    def filter(self, record: logging.LogRecord):
+        return self.site_part in f"{record.name}."
+
+
+def add_site_log_handler(site_name: str, log_file: str):
+    """
+    ### Summary:
+        This will add a file handler that writes the log records for the given
+        site to its own log file. It is added to the listener, so the file is
+        written to by the listener thread.
+
+    ### Args:
+        site_name (str):
+            The name of the site folder that is used.
+        log_file (str):
+            The path to the log file for the site.
+
+    ### Returns:
+        logging.FileHandler: The handler that was added. Pass it to
+        remove_site_log_handler once the site has been processed.
+    """
+
+    handler = logging.FileHandler(filename = log_file)
+    handler.setLevel(logging.INFO)
+    handler.setFormatter(make_formatter(log_format = _log_format))
+    handler.addFilter(SiteLogFilter(site_name = site_name))
+
+    with _listener_lock:
+        # -- Logging hasn't been set up with logger, e.g. in a benchmark, so
+        # -- write to the file directly:
+        if _listener == None or _listener_pid != os.getpid():
+            logging.getLogger().addHandler(handler)
+        else:
+            _listener.handlers = _listener.handlers + (handler,)
+
+    return handler
+
+
+def remove_site_log_handler(handler: logging.Handler):
+    """
+    ### Summary:
+        This will remove and close a handler that was added with
+        add_site_log_handler, once the records on the queue have been written.
+
+    ### Args:
+        handler (logging.Handler):
+            The handler to remove.
+
+    ### Returns:
+        None
+    """
+
+    flush_logging()
+
+    with _listener_lock:
+        if _listener != None and handler in _listener.handlers:
+            _listener.handlers = tuple(listener_handler for listener_handler in _listener.handlers
+                                       if listener_handler is not handler)
+        else:
+            logging.getLogger().removeHandler(handler)
+
+    handler.close()
@@ -0,0 +1,153 @@
+# -- Import required libraries / modules:
+from threading import Condition
+
+from modules.log_setup import get_logger
+from modules.metrics import metrics
+
+import os
+import sys
+import time
+
+# -- The resource module is only on Unix:
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+def current_rss_bytes():
+    """
+    ### Summary:
+        This function will find how much memory the process is using right
+        now (its resident set size). On systems without /proc, the most memory
+        the process has used so far is returned instead, or 0 if that can't be
+        found either.
+
+    ### Args:
+        None.
+
+    ### Returns:
+        int: The memory used, in bytes.
+    """
+
+    try:
+        with open("/proc/self/statm", "rb") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return peak_rss_bytes()
+
+
+def peak_rss_bytes():
+    """
+    ### Summary:
+        This function will find the most memory the process has used so far.
+
+    ### Args:
+        None.
+
+    ### Returns:
+        int: The memory used, in bytes, or 0 if it can't be found (e.g. on
+        Windows).
+    """
+
+    if resource == None:
+        return 0
+
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # -- ru_maxrss is in bytes on macOS and in kilobytes everywhere else:
+    return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+class MemoryBudget:
+    """
+    ### Summary:
+        Limits the size of the pages that have been downloaded but not yet
+        processed for a site. A fetch worker acquires the size of a page
+        before it is parsed and the page is released once its soup has been
+        processed. If the pages that are held would go over max_bytes, the
+        worker waits until enough of them have been released, which holds back
+        the fetching of more pages. A page that is bigger than max_bytes on
+        its own is still let through once nothing else is held, so a site
+        never gets stuck.
+
+    ### Args:
+        site_name (str):
+            The name of the site folder that is used.
+        max_bytes (int):
+            The most bytes of pages to hold at once. 0 is no limit.
+    """
+
+    def __init__(self,
+                 site_name: str,
+                 max_bytes: int):
+        self.site_name = site_name
+        self.max_bytes = max_bytes
+        self.condition = Condition()
+        self.held = {}
+        self.in_use = 0
+        self.peak = 0
+        self.waits = 0
+
+        # -- Initialise logging:
+        self.log = get_logger(__name__, "MemoryBudget", site_name)
+
+    def acquire(self,
+                key,
+                nbytes: int):
+        """
+        ### Summary:
+            This will hold nbytes for a page, waiting until there is room for
+            them first.
+
+        ### Args:
+            key:
+                What the page is known by until it is released, e.g. its row.
+            nbytes (int):
+                The size of the page.
+
+        ### Returns:
+            None
+        """
+
+        with self.condition:
+            if self.max_bytes > 0 and self.in_use > 0 and self.in_use + nbytes > self.max_bytes:
+                self.log.info(f"Waiting for {self.in_use} bytes of pages to be processed before parsing {nbytes} more.")
+                self.waits += 1
+                start_time = time.perf_counter()
+
+                while self.in_use > 0 and self.in_use + nbytes > self.max_bytes:
+                    self.condition.wait()
+
+                metrics.record(site_name = self.site_name,
+                               stage = "memory_wait",
+                               seconds = time.perf_counter() - start_time)
+
+            self.held[key] = self.held.get(key, 0) + nbytes
+            self.in_use += nbytes
+            self.peak = max(self.peak, self.in_use)
+
+        return
+
+    def release(self, key):
+        """
+        ### Summary:
+            This will release the bytes held for a page, if there are any, and
+            wake up the workers that are waiting for room.
+
+        ### Args:
+            key:
+                What the page was acquired with.
+
+        ### Returns:
+            None
+        """
+
+        with self.condition:
+            nbytes = self.held.pop(key, 0)
+
+            if nbytes > 0:
+                self.in_use -= nbytes
+                self.condition.notify_all()
+
+        return
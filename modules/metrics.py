@@ -0,0 +1,437 @@
+# -- Import required libraries / modules:
+from contextlib import contextmanager
+from pathlib import Path
+from threading import Lock, local
+
+import functools
+import inspect
+import json
+import math
+import time
+
+
+# -- The stages that are timed, in the order they are reported:
+STAGES = ("fetch", "connect", "tls", "ttfb", "download", "memory_wait", "links", "parse", "process_soup", "export")
+
+# -- The site that the current thread is working on, so that timings made
+# -- deep inside a request (e.g. connecting) can be added to the right site:
+_context = local()
+
+
+def set_current_site(site_name: str):
+    """
+    ### Summary:
+        This function will set the site that the current thread is working
+        on.
+
+    ### Args:
+        site_name (str):
+            The name of the site folder that is used.
+
+    ### Returns:
+        None
+    """
+
+    _context.site_name = site_name
+
+    return
+
+
+def current_site():
+    """
+    ### Summary:
+        This function will return the site that the current thread is
+        working on.
+
+    ### Args:
+        None.
+
+    ### Returns:
+        String (str): The name of the site or None if it hasn't been set.
+    """
+
+    return getattr(_context, "site_name", None)
+
+
+class MetricsRecorder:
+    """
+    ### Summary:
+        Collects how long each stage of scraping a page takes (e.g. connect,
+        parse or process_soup), counters such as the bytes downloaded and 
+        other values measured for each page (samples, e.g. the memory used),
+        for each site. Every timing and sample is kept so that percentiles can
+        be worked out at the end of the run.
+
+    ### Args:
+        None.
+    """
+
+    def __init__(self):
+        self.lock = Lock()
+        self.timings = {}
+        self.counters = {}
+        self.samples = {}
+
+    def record(self,
+               site_name: str,
+               stage: str,
+               seconds: float):
+        """
+        ### Summary:
+            This will record how long a stage took.
+
+        ### Args:
+            site_name (str):
+                The name of the site folder that is used.
+            stage (str):
+                The name of the stage.
+            seconds (float):
+                How long the stage took.
+
+        ### Returns:
+            None
+        """
+
+        with self.lock:
+            self.timings.setdefault(site_name, {}).setdefault(stage, []).append(seconds)
+
+        return
+
+    def count(self,
+              site_name: str,
+              counter: str,
+              value: int = 1):
+        """
+        ### Summary:
+            This will add to a counter.
+
+        ### Args:
+            site_name (str):
+                The name of the site folder that is used.
+            counter (str):
+                The name of the counter, e.g. bytes_downloaded.
+            value (int, optional):
+                The amount to add. Defaults to 1.
+
+        ### Returns:
+            None
+        """
+
+        with self.lock:
+            site_counters = self.counters.setdefault(site_name, {})
+            site_counters[counter] = site_counters.get(counter, 0) + value
+
+        return
+
+    def sample(self,
+               site_name: str,
+               name: str,
+               value: float):
+        """
+        ### Summary:
+            This will record a value that was measured, e.g. the memory used
+            after a page was processed.
+
+        ### Args:
+            site_name (str):
+                The name of the site folder that is used.
+            name (str):
+                The name of the value, including its unit, e.g. page_rss_mb.
+            value (float):
+                The value.
+
+        ### Returns:
+            None
+        """
+
+        with self.lock:
+            self.samples.setdefault(site_name, {}).setdefault(name, []).append(value)
+
+        return
+
+    def take(self, site_name: str):
+        """
+        ### Summary:
+            This will remove and return everything recorded for a site, e.g.
+            to send it back from the process that ran the site.
+
+        ### Args:
+            site_name (str):
+                The name of the site folder that is used.
+
+        ### Returns:
+            dict: The timings, counters and samples for the site.
+        """
+
+        with self.lock:
+            return {"timings": self.timings.pop(site_name, {}),
+                    "counters": self.counters.pop(site_name, {}),
+                    "samples": self.samples.pop(site_name, {})}
+
+    def merge(self,
+              site_name: str,
+              site_metrics: dict):
+        """
+        ### Summary:
+            This will add the timings, counters and samples for a site from
+            take, e.g. from another process.
+
+        ### Args:
+            site_name (str):
+                The name of the site folder that is used.
+            site_metrics (dict):
+                The timings, counters and samples from take.
+
+        ### Returns:
+            None
+        """
+
+        with self.lock:
+            for stage, timings in site_metrics.get("timings", {}).items():
+                self.timings.setdefault(site_name, {}).setdefault(stage, []).extend(timings)
+
+            for counter, value in site_metrics.get("counters", {}).items():
+                site_counters = self.counters.setdefault(site_name, {})
+                site_counters[counter] = site_counters.get(counter, 0) + value
+
+            for name, values in site_metrics.get("samples", {}).items():
+                self.samples.setdefault(site_name, {}).setdefault(name, []).extend(values)
+
+        return
+
+    def report(self):
+        """
+        ### Summary:
+            This will summarise the timings for each site and stage as the
+            number of timings, total, p50, p95 and max in seconds, along
+            with the counters and the number, p50, p95 and max of each
+            sample.
+
+        ### Args:
+            None.
+
+        ### Returns:
+            dict: The summary for each site.
+        """
+
+        report = {}
+
+        with self.lock:
+            for site_name in sorted(set(self.timings) | set(self.counters) | set(self.samples)):
+                stages = {}
+                site_timings = self.timings.get(site_name, {})
+
+                for stage in sorted(site_timings, key = lambda name: (STAGES.index(name) if name in STAGES else len(STAGES), name)):
+                    timings = sorted(site_timings[stage])
+                    stages[stage] = {"count": len(timings),
+                                     "total": round(sum(timings), 6),
+                                     "p50": round(percentile(values = timings, fraction = 0.5), 6),
+                                     "p95": round(percentile(values = timings, fraction = 0.95), 6),
+                                     "max": round(timings[-1], 6)}
+
+                samples = {}
+
+                for name, values in sorted(self.samples.get(site_name, {}).items()):
+                    values = sorted(values)
+                    samples[name] = {"count": len(values),
+                                     "p50": round(percentile(values = values, fraction = 0.5), 3),
+                                     "p95": round(percentile(values = values, fraction = 0.95), 3),
+                                     "max": round(values[-1], 3)}
+
+                report[site_name] = {"stages": stages,
+                                     "counters": dict(self.counters.get(site_name, {})),
+                                     "samples": samples}
+
+        return report
+
+
+def percentile(values: list,
+               fraction: float):
+    """
+    ### Summary:
+        This function will work out a percentile of a sorted list of values
+        using the nearest rank.
+
+    ### Args:
+        values (list):
+            The values, sorted from smallest to largest.
+        fraction (float):
+            The percentile as a fraction, e.g. 0.95.
+
+    ### Returns:
+        float: The percentile or 0 if there are no values.
+    """
+
+    if values == []:
+        return 0.0
+
+    return values[min(len(values) - 1, max(0, math.ceil(fraction * len(values)) - 1))]
+
+
+# -- The recorder that is shared by everything in this process:
+metrics = MetricsRecorder()
+
+
+@contextmanager
+def timer(site_name: str,
+          stage: str):
+    """
+    ### Summary:
+        This context manager will record how long the code inside it takes,
+        even if it raises an error.
+
+    ### Args:
+        site_name (str):
+            The name of the site folder that is used.
+        stage (str):
+            The name of the stage.
+
+    ### Yields:
+        None
+    """
+
+    start_time = time.perf_counter()
+
+    try:
+        yield
+    finally:
+        metrics.record(site_name = site_name,
+                       stage = stage,
+                       seconds = time.perf_counter() - start_time)
+
+
+def timed_export(function):
+    """
+    ### Summary:
+        This decorator will record how long an export function takes, as the
+        export stage for the site_name it is called with and as its own stage
+        (e.g. export_to_csv).
+
+    ### Args:
+        function (function):
+            The export function, which must have a site_name argument.
+
+    ### Returns:
+        function: The timed function.
+    """
+
+    signature = inspect.signature(function)
+
+    @functools.wraps(function)
+    def timed_function(*args, **kwargs):
+        site_name = signature.bind_partial(*args, **kwargs).arguments.get("site_name", current_site())
+        start_time = time.perf_counter()
+
+        try:
+            return function(*args, **kwargs)
+        finally:
+            seconds = time.perf_counter() - start_time
+            metrics.record(site_name = site_name, stage = "export", seconds = seconds)
+            metrics.record(site_name = site_name, stage = function.__name__, seconds = seconds)
+
+    return timed_function
+
+
+def _escape_label(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def write_metrics_json(report: dict,
+                       metrics_file: str,
+                       run_seconds: float):
+    """
+    ### Summary:
+        This function will save the report from MetricsRecorder.report as
+        JSON.
+
+    ### Args:
+        report (dict):
+            The report for each site.
+        metrics_file (str):
+            The path to save the report to.
+        run_seconds (float):
+            How long the whole run took.
+
+    ### Returns:
+        None
+    """
+
+    Path(metrics_file).parent.mkdir(parents = True, exist_ok = True)
+    Path(metrics_file).write_text(json.dumps({"run_seconds": round(run_seconds, 3),
+                                              "sites": report}, indent = 2),
+                                  encoding = "utf-8")
+
+    return
+
+
+def write_metrics_prometheus(report: dict,
+                             prometheus_file: str,
+                             prefix: str = "scraper"):
+    """
+    ### Summary:
+        This function will save the report from MetricsRecorder.report in the
+        Prometheus text format, e.g. for the node exporter textfile collector.
+        The timings are saved as summaries with 0.5 and 0.95 quantiles along
+        with a max gauge, the counters as counters and the samples as gauges
+        for their p50, p95 and max.
+
+    ### Args:
+        report (dict):
+            The report for each site.
+        prometheus_file (str):
+            The path to save the report to.
+        prefix (str, optional):
+            The prefix for the metric names. Defaults to "scraper".
+
+    ### Returns:
+        None
+    """
+
+    lines = [f"# HELP {prefix}_stage_seconds The time taken by each stage of scraping a page.",
+             f"# TYPE {prefix}_stage_seconds summary"]
+
+    for site_name, site_report in report.items():
+        for stage, stats in site_report["stages"].items():
+            labels = f'site="{_escape_label(site_name)}",stage="{_escape_label(stage)}"'
+            lines.append(f'{prefix}_stage_seconds{{{labels},quantile="0.5"}} {stats["p50"]}')
+            lines.append(f'{prefix}_stage_seconds{{{labels},quantile="0.95"}} {stats["p95"]}')
+            lines.append(f"{prefix}_stage_seconds_sum{{{labels}}} {stats['total']}")
+            lines.append(f"{prefix}_stage_seconds_count{{{labels}}} {stats['count']}")
+
+    lines += [f"# HELP {prefix}_stage_seconds_max The longest time taken by each stage of scraping a page.",
+              f"# TYPE {prefix}_stage_seconds_max gauge"]
+
+    for site_name, site_report in report.items():
+        for stage, stats in site_report["stages"].items():
+            lines.append(f'{prefix}_stage_seconds_max{{site="{_escape_label(site_name)}",stage="{_escape_label(stage)}"}} {stats["max"]}')
+
+    counters = sorted({counter for site_report in report.values() for counter in site_report["counters"]})
+
+    for counter in counters:
+        lines += [f"# HELP {prefix}_{counter}_total The {counter.replace('_', ' ')} for each site.",
+                  f"# TYPE {prefix}_{counter}_total counter"]
+
+        for site_name, site_report in report.items():
+            if counter in site_report["counters"]:
+                lines.append(f'{prefix}_{counter}_total{{site="{_escape_label(site_name)}"}} {site_report["counters"][counter]}')
+
+    samples = sorted({name for site_report in report.values() for name in site_report.get("samples", {})})
+
+    for name in samples:
+        lines += [f"# HELP {prefix}_{name} The {name.replace('_', ' ')} measured for each page, as the p50, p95 and max for each site.",
+                  f"# TYPE {prefix}_{name} gauge"]
+
+        for site_name, site_report in report.items():
+            for stat in ("p50", "p95", "max"):
+                if name in site_report.get("samples", {}):
+                    lines.append(f'{prefix}_{name}{{site="{_escape_label(site_name)}",stat="{stat}"}} {site_report["samples"][name][stat]}')
+
+    Path(prometheus_file).parent.mkdir(parents = True, exist_ok = True)
+
+    # -- Write to a temporary file first, so that a collector never reads
+    # -- half of the file:
+    temporary_file = Path(f"{prometheus_file}.tmp")
+    temporary_file.write_text("\n".join(lines) + "\n", encoding = "utf-8")
+    temporary_file.replace(prometheus_file)
+
+    return
@@ -0,0 +1,246 @@
+# -- Import required libraries / modules:
+from bs4 import BeautifulSoup as bs
+from bs4 import SoupStrainer
+from bs4.element import Tag
+
+from modules.log_setup import get_logger
+
+import re
+
+
+# -- The parsers that can be used and the packages that they need:
+PARSER_PACKAGES = {
+    "html.parser": None,
+    "lxml": "lxml",
+    "selectolax": "selectolax",
+}
+
+# -- The parsers that have already been warned about as not being installed:
+_warned_parsers = set()
+
+# -- Matches a simple CSS selector that is a tag, an id and / or a single class
+# -- (e.g. table#myTable.chart), which can be parsed with a SoupStrainer:
+SIMPLE_SELECTOR = re.compile(r"^(?P<tag>[a-zA-Z][\w-]*)?(?:#(?P<id>[\w-]+))?(?:\.(?P<class>[\w-]+))?$")
+
+
+def parser_available(parser: str):
+    """
+    ### Summary:
+        This function will check if a parser can be used, i.e. that it is a
+        known parser and the package it needs is installed.
+
+    ### Args:
+        parser (str): 
+            The name of the parser.
+
+    ### Returns:
+        bool: True if the parser can be used, otherwise False.
+    """
+    
+    if parser not in PARSER_PACKAGES:
+        return False
+    
+    if PARSER_PACKAGES[parser] == None:
+        return True
+    
+    try:
+        __import__(PARSER_PACKAGES[parser])
+    except ImportError:
+        return False
+    
+    return True
+
+
+def available_parsers():
+    """
+    ### Summary:
+        This function will list the parsers that can be used.
+
+    ### Args:
+        None.
+
+    ### Returns:
+        list: The names of the parsers that can be used.
+    """
+    
+    return [parser for parser in PARSER_PACKAGES if parser_available(parser = parser)]
+
+
+def parse_target(tag: str = None,
+                 attrs: dict = None,
+                 selector: str = None):
+    """
+    ### Summary:
+        This function will describe the part of a page that a site needs, so
+        that only that part is parsed. The part is either a tag with some 
+        attributes or a CSS selector. A simple selector (a tag, an id and / or
+        a single class) is turned into a tag and attributes.
+
+    ### Args:
+        tag (str, optional): 
+            The name of the tag, e.g. table. Defaults to None.
+        attrs (dict, optional): 
+            The attributes that the tag must have, e.g. {"id": "myTable"}.
+            Defaults to None.
+        selector (str, optional): 
+            A CSS selector. Used instead of tag and attrs if given.
+            Defaults to None.
+
+    ### Returns:
+        dict: 
+            tag (str): 
+                The name of the tag (or None for any tag).
+            attrs (dict): 
+                The attributes that the tag must have.
+            selector (str): 
+                The CSS selector (or None if the tag and attrs describe it).
+        None is returned if nothing was given.
+    """
+    
+    if selector:
+        selector = selector.strip()
+        match = SIMPLE_SELECTOR.match(selector)
+        
+        if match == None or selector == "":
+            return {"tag": None, "attrs": {}, "selector": selector}
+        
+        tag = match.group("tag")
+        attrs = {name: match.group(name) for name in ("id", "class") if match.group(name)}
+    
+    if not tag and not attrs:
+        return
+    
+    return {"tag": tag or None, "attrs": dict(attrs or {}), "selector": None}
+
+
+def target_css(target: dict):
+    """
+    ### Summary:
+        This function will turn a parse target into a CSS selector.
+
+    ### Args:
+        target (dict): 
+            The parse target returned by parse_target.
+
+    ### Returns:
+        String (str): The CSS selector.
+    """
+    
+    if target["selector"]:
+        return target["selector"]
+    
+    css = target["tag"] or "*"
+    
+    for name, value in target["attrs"].items():
+        operator = "~=" if name == "class" else "="
+        css += f"[{name}{operator}\"{value}\"]"
+    
+    return css
+
+
+def parse_html(markup: str,
+               parser: str = "html.parser",
+               target: dict = None):
+    """
+    ### Summary:
+        This function will parse a page with the parser that has been chosen
+        for it:
+        - html.parser: BeautifulSoup with Python's built in parser.
+        - lxml: BeautifulSoup with the much faster lxml parser.
+        - selectolax: A selectolax (lexbor) tree, which is faster again but
+          is not a BeautifulSoup object. The process_soup function for a site
+          that uses it needs to use the selectolax API, e.g. css_first().
+        If the package for the parser is not installed, html.parser is used
+        instead and a warning is logged.
+        
+        If a target is given, only the part of the page that matches it is
+        kept. For html.parser and lxml, a target with a tag and attributes
+        is parsed with a SoupStrainer, so the rest of the page is never built
+        into a tree. A target with a CSS selector parses the whole page and 
+        then parses the first match again on its own, so that the full tree 
+        can be freed. For selectolax, the first match is parsed on its own.
+
+    ### Args:
+        markup (str): 
+            The HTML of the page.
+        parser (str, optional): 
+            The parser to use. Defaults to "html.parser".
+        target (dict, optional): 
+            The part of the page to keep, from parse_target. 
+            Defaults to None (the whole page).
+
+    ### Returns:
+        Object: The parsed page.
+    """
+    
+    if parser != "html.parser" and parser_available(parser = parser) == False:
+        if parser not in _warned_parsers:
+            # -- Initialise logging:
+            log = get_logger(__name__, "parse_html")
+            
+            log.warning(f"The parser {parser} is not known or its package is not installed. Using html.parser instead.")
+            print(f"Warning: The parser {parser} is not known or its package is not installed. Using html.parser instead.")
+            _warned_parsers.add(parser)
+        
+        parser = "html.parser"
+    
+    if parser == "selectolax":
+        from selectolax.lexbor import LexborHTMLParser
+        
+        tree = LexborHTMLParser(markup)
+        
+        if target == None:
+            return tree
+        
+        node = tree.css_first(target_css(target = target))
+        
+        return LexborHTMLParser(node.html if node != None else "")
+    
+    if target == None:
+        return bs(markup, parser)
+    
+    if target["selector"] == None:
+        return bs(markup, parser, parse_only = SoupStrainer(target["tag"], attrs = target["attrs"]))
+    
+    full_soup = bs(markup, parser)
+    node = full_soup.select_one(target["selector"])
+    soup = bs(str(node) if node != None else "", parser)
+    release_soup(soup = full_soup)
+    
+    return soup
+
+
+def release_soup(soup):
+    """
+    ### Summary:
+        This function will take apart a parsed page once it has been
+        processed. A BeautifulSoup tree is full of links from each tag to its
+        parent and the tags around it, so it is only freed when the garbage
+        collector next looks for reference cycles, which can leave several 
+        big trees in memory at once. Decomposing each of the top level tags
+        breaks those links so the memory is freed straight away (decomposing
+        the BeautifulSoup object on its own leaves the tags inside it linked
+        together). A selectolax tree is freed as soon as it is no longer used,
+        so it is left alone.
+
+    ### Args:
+        soup (Object): 
+            The parsed page, from parse_html. Anything that is not a 
+            BeautifulSoup object or tag is ignored.
+
+    ### Returns:
+        None
+    """
+    
+    if isinstance(soup, Tag) == False or soup.decomposed == True:
+        return
+    
+    for child in list(soup.contents):
+        if isinstance(child, Tag):
+            child.decompose()
+        else:
+            child.extract()
+    
+    soup.decompose()
+    
+    return
@@ -0,0 +1,270 @@
+# -- Import required libraries / modules:
+from email.utils import parsedate_to_datetime
+from itertools import zip_longest
+from threading import Lock
+from urllib.parse import urlsplit
+
+from modules.log_setup import get_logger
+
+import time
+
+
+class TokenBucket:
+    """
+    ### Summary:
+        A token bucket that limits how often requests can be made to a host.
+        The bucket holds up to burst tokens and is topped up at rate tokens
+        per second. Each request takes a token and if there are none left, it
+        has to wait until the bucket has been topped up. The bucket can also be
+        paused, for example when a host has sent a Retry-After header.
+
+    ### Args:
+        rate (float):
+            The number of tokens added to the bucket per second. A rate of 0
+            means there is no limit.
+        burst (int):
+            The most tokens that the bucket can hold.
+    """
+
+    def __init__(self,
+                 rate: float,
+                 burst: int):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = Lock()
+
+    def reserve(self):
+        """
+        ### Summary:
+            This will take a token from the bucket, even if there are none
+            left, and return how long to wait before the request can be made.
+            Taking the token straight away means that requests waiting on the
+            same bucket are made in the order that they reserved a token.
+
+        ### Args:
+            None.
+
+        ### Returns:
+            float: The number of seconds to wait.
+        """
+
+        with self.lock:
+            now = time.monotonic()
+            wait_seconds = max(0.0, self.paused_until - now)
+
+            if self.rate <= 0:
+                return wait_seconds
+
+            # -- Top up the bucket for the time since it was last used:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+
+            if self.tokens < 0:
+                wait_seconds = max(wait_seconds, -self.tokens / self.rate)
+
+        return wait_seconds
+
+    def pause(self, seconds: float):
+        """
+        ### Summary:
+            This will stop any more requests being made for a number of
+            seconds.
+
+        ### Args:
+            seconds (float):
+                The number of seconds to pause for.
+
+        ### Returns:
+            None
+        """
+
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+        return
+
+
+def parse_retry_after(value: str):
+    """
+    ### Summary:
+        This function will work out the number of seconds to wait from a
+        Retry-After header. The header can either be a number of seconds or
+        an HTTP date.
+
+    ### Args:
+        value (str):
+            The value of the Retry-After header.
+
+    ### Returns:
+        float: The number of seconds to wait or None if the value is not valid.
+    """
+
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        pass
+
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return
+
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+def url_host(url: str):
+    """
+    ### Summary:
+        This function will return the host (and port, if there is one) for a
+        URL.
+
+    ### Args:
+        url (str):
+            The URL to get the host for.
+
+    ### Returns:
+        String (str): The host for the URL in lowercase.
+    """
+
+    return urlsplit(url).netloc.lower()
+
+
+class HostScheduler:
+    """
+    ### Summary:
+        Limits the rate that requests are made to each host using a token
+        bucket for each one. Every host gets the same rate and burst, which
+        are set in the settings for the site.
+
+    ### Args:
+        rate (float):
+            The number of requests per second that can be made to each host.
+            A rate of 0 means there is no limit.
+        burst (int):
+            The number of requests that can be made to a host in a burst.
+        site_name (str):
+            The name of the site folder that is used.
+    """
+
+    def __init__(self,
+                 rate: float,
+                 burst: int,
+                 site_name: str):
+        self.rate = rate
+        self.burst = burst
+        self.site_name = site_name
+        self.buckets = {}
+        self.lock = Lock()
+
+    def bucket(self, host: str):
+        """
+        ### Summary:
+            This will return the token bucket for a host, creating it the
+            first time the host is seen.
+
+        ### Args:
+            host (str):
+                The host to get the bucket for.
+
+        ### Returns:
+            TokenBucket: The bucket for the host.
+        """
+
+        with self.lock:
+            if host not in self.buckets:
+                self.buckets[host] = TokenBucket(rate = self.rate,
+                                                 burst = self.burst)
+
+            return self.buckets[host]
+
+    def wait(self, url: str):
+        """
+        ### Summary:
+            This will wait until a request can be made to the host for a URL.
+
+        ### Args:
+            url (str):
+                The URL that is about to be requested.
+
+        ### Returns:
+            float: The number of seconds that were waited.
+        """
+
+        host = url_host(url = url)
+        wait_seconds = self.bucket(host = host).reserve()
+
+        if wait_seconds > 0:
+            # -- Initialise logging:
+            log = get_logger(__name__, "wait", self.site_name)
+
+            log.info(f"Waiting {wait_seconds:.2f} seconds before requesting {url}.")
+            time.sleep(wait_seconds)
+
+        return wait_seconds
+
+    def retry_after(self,
+                    url: str,
+                    value: str):
+        """
+        ### Summary:
+            This will pause the requests to the host for a URL for the time
+            given in a Retry-After header.
+
+        ### Args:
+            url (str):
+                The URL that the Retry-After header was sent for.
+            value (str):
+                The value of the Retry-After header.
+
+        ### Returns:
+            float: The number of seconds that the host was paused for or None
+            if the value is not valid.
+        """
+
+        # -- Initialise logging:
+        log = get_logger(__name__, "retry_after", self.site_name)
+
+        seconds = parse_retry_after(value = value)
+
+        if seconds == None:
+            log.warning(f"Ignoring the Retry-After header {value!r} sent for {url} as it is not valid.")
+            return
+
+        host = url_host(url = url)
+        log.info(f"Pausing requests to {host} for {seconds:.2f} seconds as asked by its Retry-After header.")
+        self.bucket(host = host).pause(seconds = seconds)
+
+        return seconds
+
+
+def interleave_by_host(rows: list):
+    """
+    ### Summary:
+        This function will change the order of the rows from a pages.xlsx file
+        so that the hosts take it in turns. The rows for each host stay in the
+        same order. This means that when pages are fetched at the same time,
+        requests to the other hosts can carry on while one host is being rate
+        limited.
+
+    ### Args:
+        rows (list):
+            A list of rows from the pages.xlsx file.
+
+    ### Returns:
+        list: The rows in their new order.
+    """
+
+    rows_by_host = {}
+
+    for row in rows:
+        rows_by_host.setdefault(url_host(url = str(row.url)), []).append(row)
+
+    if len(rows_by_host) <= 1:
+        return list(rows)
+
+    return [row for turn in zip_longest(*rows_by_host.values())
+            for row in turn if row is not None]
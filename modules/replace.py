@@ -1,7 +1,5 @@
 # -- Import required libraries / modules:
-import inspect
-import logging
-import os
+from modules.log_setup import get_logger
 
 
 def replace_chars(text_to_check: str):
@@ -22,7 +20,7 @@ def replace_chars(text_to_check: str):
     """
     
     # -- Initialise logging:
-    log = logging.getLogger(f"{os.getenv('SCRAPER_APP_NAME')}.{__name__}.{inspect.stack()[0][3]}")
+    log = get_logger(__name__, "replace_chars")
     
     log.info(f"Replacing characters in {text_to_check}.")
     
@@ -0,0 +1,90 @@
+# -- Import required libraries / modules:
+from modules.log_setup import get_logger
+
+import pandas as pd
+
+
+# -- The columns in headers.xlsx that are not headers:
+NON_HEADER_COLUMNS = ("os", "browser")
+
+# -- Header names that can't be made from the column name by capitalising
+# -- each word, e.g. user_agent becomes User-Agent:
+HEADER_NAMES = {"dnt": "DNT",
+                "sec_ch_ua": "Sec-CH-UA",
+                "sec_ch_ua_mobile": "Sec-CH-UA-Mobile",
+                "sec_ch_ua_platform": "Sec-CH-UA-Platform"}
+
+
+def header_name(column: str):
+    """
+    ### Summary:
+        This function will turn the name of a column in headers.xlsx into the
+        name of the header, e.g. accept_language becomes Accept-Language.
+
+    ### Args:
+        column (str):
+            The name of the column.
+
+    ### Returns:
+        String (str): The name of the header.
+    """
+
+    column = str(column).strip().lower()
+
+    return HEADER_NAMES.get(column, "-".join(part.capitalize() for part in column.split("_")))
+
+
+def compile_browser_headers(browser_headers_df: pd.DataFrame,
+                            os_type: str):
+    """
+    ### Summary:
+        This function will turn the rows in headers.xlsx for an operating
+        system into the full set of headers to send for each browser. Every
+        column other than os and browser is a header and empty cells are
+        left out. If a browser has more than one row, the first one is used.
+
+    ### Args:
+        browser_headers_df (pd.DataFrame):
+            The contents of headers.xlsx.
+        os_type (str):
+            The operating system the program is running on.
+
+    ### Returns:
+        dict: The headers for each browser, keyed by the browser name.
+    """
+
+    # -- Initialise logging:
+    log = get_logger(__name__, "compile_browser_headers")
+
+    header_columns = {column: header_name(column = column) for column in browser_headers_df.columns
+                      if column not in NON_HEADER_COLUMNS and not str(column).startswith("Unnamed")}
+    browser_headers = {}
+
+    for row in browser_headers_df.loc[browser_headers_df.os == os_type].to_dict(orient = "records"):
+        if pd.isna(row["browser"]) or row["browser"] in browser_headers:
+            continue
+
+        browser_headers[row["browser"]] = {header: str(row[column]).strip() for column, header in header_columns.items()
+                                           if not pd.isna(row[column]) and str(row[column]).strip() != ""}
+
+    log.info(f"Compiled the headers for {len(browser_headers)} browser(s) on {os_type}: {list(browser_headers)}.")
+
+    return browser_headers
+
+
+def compile_allowed_http_responses(allowed_http_responses_df: pd.DataFrame):
+    """
+    ### Summary:
+        This function will turn the contents of allowed-http-responses.xlsx
+        into a set of status codes, so that checking a status code is a
+        single lookup.
+
+    ### Args:
+        allowed_http_responses_df (pd.DataFrame):
+            The contents of allowed-http-responses.xlsx.
+
+    ### Returns:
+        frozenset: The status codes that are allowed.
+    """
+
+    return frozenset(int(code) for code in allowed_http_responses_df.values.ravel() if not pd.isna(code))
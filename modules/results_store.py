@@ -0,0 +1,271 @@
+# -- Import required libraries / modules:
+from datetime import datetime
+from pathlib import Path
+from threading import Lock
+
+from modules.log_setup import get_logger
+
+import hashlib
+import json
+import pandas as pd
+import sqlite3
+
+
+# -- The tables and indexes in the results database. results holds the latest
+# -- version of each row and results_history holds every version that has
+# -- been stored:
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    site TEXT NOT NULL,
+    nickname TEXT NOT NULL,
+    row_key TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    data TEXT NOT NULL,
+    first_seen TEXT NOT NULL,
+    changed_at TEXT NOT NULL,
+    scraped_at TEXT NOT NULL,
+    PRIMARY KEY (site, nickname, row_key)
+);
+CREATE INDEX IF NOT EXISTS idx_results_nickname ON results (nickname);
+CREATE INDEX IF NOT EXISTS idx_results_scraped_at ON results (scraped_at);
+CREATE INDEX IF NOT EXISTS idx_results_changed_at ON results (site, changed_at);
+
+CREATE TABLE IF NOT EXISTS results_history (
+    id INTEGER PRIMARY KEY,
+    site TEXT NOT NULL,
+    nickname TEXT NOT NULL,
+    row_key TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    data TEXT NOT NULL,
+    scraped_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_history_site_nickname ON results_history (site, nickname, row_key);
+CREATE INDEX IF NOT EXISTS idx_history_nickname ON results_history (nickname);
+CREATE INDEX IF NOT EXISTS idx_history_scraped_at ON results_history (site, scraped_at);
+"""
+
+
+class ResultsStore:
+    """
+    ### Summary:
+        A SQLite database of scraped results. Each row of a dataframe is
+        stored under its site, nickname and a row key, along with a hash of
+        its content.
+
+        With change detection on (the default), a row is only written if it
+        is new or its content has changed since it was last stored; rows that
+        have not changed only have their scraped_at time updated. Each new
+        version of a row is also added to results_history, so the history
+        only grows when something changes. With change detection off, every
+        row is written to the history on every run.
+
+        The database uses write-ahead logging so that it can be read while a
+        run is writing to it and several processes can write to it in turn.
+
+    ### Args:
+        db_path (str):
+            The path to the database file. It is created if it doesn't exist.
+    """
+
+    def __init__(self, db_path: str):
+        Path(db_path).parent.mkdir(parents = True, exist_ok = True)
+
+        self.db_path = str(db_path)
+        self.lock = Lock()
+        self.connection = sqlite3.connect(self.db_path,
+                                          timeout = 60,
+                                          check_same_thread = False)
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        self.connection.execute("PRAGMA synchronous = NORMAL")
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        """
+        ### Summary:
+            This will close the connection to the database.
+
+        ### Args:
+            None.
+
+        ### Returns:
+            None
+        """
+
+        with self.lock:
+            self.connection.close()
+
+        return
+
+    @staticmethod
+    def row_records(df: pd.DataFrame,
+                    key_columns: list = None):
+        """
+        ### Summary:
+            This will turn the rows of a dataframe into the key, content hash
+            and JSON data for each row. The key is made from the values of the
+            key columns, or the position of the row if there aren't any.
+
+        ### Args:
+            df (pd.DataFrame):
+                The dataframe to turn into records.
+            key_columns (list, optional):
+                The columns that identify a row. Defaults to None.
+
+        ### Returns:
+            list: A tuple of the row key, content hash and data for each row.
+        """
+
+        records = []
+        rows = json.loads(df.to_json(orient = "records", date_format = "iso"))
+
+        for position, row in enumerate(rows):
+            data = json.dumps(row, sort_keys = True, ensure_ascii = False)
+
+            if key_columns:
+                row_key = "|".join(str(row.get(str(column))) for column in key_columns)
+            else:
+                row_key = str(position)
+
+            records.append((row_key, hashlib.sha256(data.encode("utf-8")).hexdigest(), data))
+
+        return records
+
+    def upsert_dataframe(self,
+                         df: pd.DataFrame,
+                         site_name: str,
+                         nickname: str,
+                         key_columns: list = None,
+                         change_detection: bool = True):
+        """
+        ### Summary:
+            This will store the rows of a dataframe in one transaction.
+
+        ### Args:
+            df (pd.DataFrame):
+                The dataframe to store.
+            site_name (str):
+                The name of the site folder that is used.
+            nickname (str):
+                The nickname of the page that the dataframe came from.
+            key_columns (list, optional):
+                The columns that identify a row, e.g. a product code.
+                Defaults to None (the position of the row).
+            change_detection (bool, optional):
+                Whether to only write rows that are new or have changed.
+                Defaults to True.
+
+        ### Returns:
+            dict: The number of rows that were stored, changed and unchanged.
+        """
+
+        scraped_at = datetime.now().isoformat(timespec = "seconds")
+        records = self.row_records(df = df,
+                                   key_columns = key_columns)
+
+        with self.lock, self.connection:
+            # -- Get the hashes of the rows already stored for the page:
+            stored_hashes = dict(self.connection.execute(
+                "SELECT row_key, content_hash FROM results WHERE site = ? AND nickname = ?",
+                (site_name, nickname)))
+
+            changed = [(row_key, content_hash, data) for row_key, content_hash, data in records
+                       if change_detection == False or stored_hashes.get(row_key) != content_hash]
+            changed_keys = {row_key for row_key, _, _ in changed}
+            unchanged = [(scraped_at, site_name, nickname, row_key) for row_key, _, _ in records
+                         if row_key not in changed_keys]
+
+            self.connection.executemany(
+                """INSERT INTO results (site, nickname, row_key, content_hash, data, first_seen, changed_at, scraped_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                   ON CONFLICT (site, nickname, row_key) DO UPDATE SET
+                       content_hash = excluded.content_hash,
+                       data = excluded.data,
+                       changed_at = CASE WHEN results.content_hash = excluded.content_hash
+                                         THEN results.changed_at ELSE excluded.changed_at END,
+                       scraped_at = excluded.scraped_at""",
+                [(site_name, nickname, row_key, content_hash, data, scraped_at, scraped_at, scraped_at)
+                 for row_key, content_hash, data in changed])
+
+            self.connection.executemany(
+                "INSERT INTO results_history (site, nickname, row_key, content_hash, data, scraped_at) VALUES (?, ?, ?, ?, ?, ?)",
+                [(site_name, nickname, row_key, content_hash, data, scraped_at)
+                 for row_key, content_hash, data in changed])
+
+            self.connection.executemany(
+                "UPDATE results SET scraped_at = ? WHERE site = ? AND nickname = ? AND row_key = ?",
+                unchanged)
+
+        return {"rows": len(records), "changed": len(changed), "unchanged": len(unchanged)}
+
+    def changed_since(self,
+                      since: str,
+                      site_name: str = None,
+                      nickname: str = None):
+        """
+        ### Summary:
+            This will return every version of a row that has been stored since
+            a point in time, e.g. to see what has changed since yesterday.
+
+        ### Args:
+            since (str):
+                The time to look from, as an ISO date / time, e.g. 2023-10-18.
+            site_name (str, optional):
+                Only return rows for this site. Defaults to None (every site).
+            nickname (str, optional):
+                Only return rows for this page. Defaults to None (every page).
+
+        ### Returns:
+            pd.DataFrame: The site, nickname, row key and scraped_at time of
+            each version, with the data for the row in its own columns.
+        """
+
+        query = "SELECT site, nickname, row_key, scraped_at, data FROM results_history WHERE scraped_at >= ?"
+        parameters = [since]
+
+        if site_name != None:
+            query += " AND site = ?"
+            parameters.append(site_name)
+
+        if nickname != None:
+            query += " AND nickname = ?"
+            parameters.append(nickname)
+
+        with self.lock:
+            rows = self.connection.execute(query + " ORDER BY scraped_at, id", parameters).fetchall()
+
+        history = pd.DataFrame(rows, columns = ["site", "nickname", "row_key", "scraped_at", "data"])
+        data = pd.DataFrame([json.loads(row_data) for row_data in history.data], index = history.index)
+
+        return pd.concat([history.drop(columns = "data"), data], axis = 1)
+
+
+# -- The results stores that are open in this process, keyed by path:
+_results_stores = {}
+_results_stores_lock = Lock()
+
+
+def get_results_store(db_path: str):
+    """
+    ### Summary:
+        This function will return the results store for a database file,
+        opening it the first time it is needed.
+
+    ### Args:
+        db_path (str):
+            The path to the database file.
+
+    ### Returns:
+        ResultsStore: The results store.
+    """
+
+    db_path = str(Path(db_path).resolve())
+
+    with _results_stores_lock:
+        if db_path not in _results_stores:
+            # -- Initialise logging:
+            log = get_logger(__name__, "get_results_store")
+
+            log.info(f"Opening the results database {db_path}.")
+            _results_stores[db_path] = ResultsStore(db_path = db_path)
+
+        return _results_stores[db_path]
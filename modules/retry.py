@@ -0,0 +1,125 @@
+# -- Import required libraries / modules:
+from datetime import datetime
+from pathlib import Path
+from threading import Lock
+
+from modules.config import RETRY_POLICIES
+from modules.log_setup import get_logger
+
+import csv
+import random
+
+
+# -- Stops two threads writing to a dead letter file at the same time:
+_dead_letter_lock = Lock()
+
+
+def retry_policy(failure: str, 
+                 retry_policies: dict = RETRY_POLICIES):
+    """
+    ### Summary:
+        This function will find the retry policy to use for a failed request. 
+        A policy for the exact status code is used before a policy for its
+        class (e.g. 503 before 5xx).
+
+    ### Args:
+        failure (str): 
+            The status code of the response or "connection" if the request
+            failed to connect or timed out.
+        retry_policies (dict, optional): 
+            The retry policies to choose from. Defaults to RETRY_POLICIES.
+
+    ### Returns:
+        dict: The policy (max_attempts, base_delay and max_delay) or None if
+        the failure should not be retried.
+    """
+    
+    failure = str(failure)
+    
+    if failure in retry_policies:
+        return retry_policies[failure]
+    
+    if failure.isdigit():
+        return retry_policies.get(f"{failure[0]}xx")
+    
+    return
+
+
+def backoff_delay(attempt: int,
+                  base_delay: float,
+                  max_delay: float):
+    """
+    ### Summary:
+        This function will work out how long to wait before retrying a request
+        using exponential backoff with full jitter. The wait is a random time
+        between 0 and base_delay * 2 ^ (attempt - 1) seconds, capped at 
+        max_delay, so that requests that failed together are not all retried
+        at the same moment.
+
+    ### Args:
+        attempt (int): 
+            The number of the attempt that failed, starting at 1.
+        base_delay (float): 
+            The longest wait after the first attempt, in seconds.
+        max_delay (float): 
+            The longest wait after any attempt, in seconds.
+
+    ### Returns:
+        float: The number of seconds to wait.
+    """
+    
+    return random.uniform(0, min(max_delay, base_delay * 2 ** (attempt - 1)))
+
+
+def write_dead_letter(dead_letter_file: str,
+                      url: str,
+                      nickname: str,
+                      site_name: str,
+                      attempts: int,
+                      reason: str):
+    """
+    ### Summary:
+        This function will record a page that could not be scraped in the 
+        dead letter file for the site, so that it can be looked into or tried
+        again later. The file is a CSV file that is added to on every run.
+
+    ### Args:
+        dead_letter_file (str): 
+            The path to the dead letter file.
+        url (str): 
+            The URL of the page.
+        nickname (str):
+            The nickname of the page.
+        site_name (str):
+            The name of the site folder that is used.
+        attempts (int): 
+            The number of times the page was requested.
+        reason (str): 
+            Why the page could not be scraped.
+
+    ### Returns:
+        None
+    """
+    
+    # -- Initialise logging:
+    log = get_logger(__name__, "write_dead_letter", site_name, nickname)
+    
+    log.info(f"Recording {nickname} in {dead_letter_file}.")
+    
+    with _dead_letter_lock:
+        try:
+            new_file = Path(dead_letter_file).is_file() == False
+            
+            with open(dead_letter_file, "a", newline = "", encoding = "utf-8") as file:
+                writer = csv.writer(file)
+                
+                if new_file == True:
+                    writer.writerow(["failed_at", "site_name", "nickname", "url", "attempts", "reason"])
+                
+                writer.writerow([datetime.now().isoformat(timespec = "seconds"), 
+                                 site_name, nickname, url, attempts, reason])
+        except (FileNotFoundError, IOError) as e:
+            log.error(f"Unable to record {nickname} in {dead_letter_file}: {e!r}.")
+            print(f"Unable to record {nickname} in {dead_letter_file}: {e!r}.")
+    
+    return
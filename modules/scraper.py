@@ -1,35 +1,170 @@
 # -- Import required libraries / modules:
-from bs4 import BeautifulSoup as bs
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from importlib import util
-from requests import get
+from threading import Lock
+from requests.exceptions import RequestException
 from pathlib import Path
 from sys import modules
+from urllib.parse import urlsplit
 
 from modules.replace import replace_chars
-from modules.config import OUTPUT_DIR
+from modules.config import ALLOWED_CONTENT_TYPES, ARCHIVE_MODES, CONNECT_TIMEOUT, DEAD_LETTER_FILE, DEDUPE_MODES, FETCH_WORKERS, MAX_BODY_BYTES, HTTP_CACHE_ENABLED, OUTPUT_DIR, READ_TIMEOUT, RETRY_POLICIES
+from modules.download import content_type, decode_body, download_body
+from modules.archive import ArchiveReader, ArchiveWriter, archive_file, archive_files
+from modules.checkpoint import CheckpointJournal, checkpoint_file
+from modules.crawl import ROWS_PENDING, CrawlFrontier, crawl_file, sitemap_urls
+from modules.export_files import compact_dataset_parts
+from modules.export_sink import close_export_buffer, configure_export_buffer, get_export_buffer
+from modules.fingerprints import FingerprintIndex, content_hash, get_fingerprint_index, normalize_html, soup_fingerprint
+from modules.http_cache import ResponseCache, get_response_cache
+from modules.http_session import get_session
+from modules.log_setup import add_site_log_handler, get_logger, log_context, remove_site_log_handler
+from modules.memory import MemoryBudget, current_rss_bytes, peak_rss_bytes
+from modules.metrics import metrics, set_current_site, timer
+from modules.parsers import parse_html, parse_target, release_soup
+from modules.rate_limiter import HostScheduler, interleave_by_host, parse_retry_after
+from modules.retry import backoff_delay, retry_policy, write_dead_letter
+from modules.site_settings import load_site_settings
+from modules.spreadsheets import read_spreadsheet
 
 import inspect
 import logging
 import os
 import pandas as pd
+import time
+
+
+# -- Returned by url_scraper instead of a soup when a page hasn't changed since
+# -- it was last processed:
+PAGE_UNCHANGED = object()
+
+
+def parse_page(markup: str,
+               url: str,
+               nickname: str,
+               site_name: str,
+               log: logging.Logger,
+               parser: str = "html.parser",
+               target: dict = None,
+               fingerprints: FingerprintIndex = None,
+               dedupe_mode: str = "off",
+               markup_callback = None):
+    """
+    ### Summary:
+        This function will parse a page, unless it has the same fingerprint
+        as when it was last processed. In html mode the page is checked before
+        it is parsed and in region mode the part of the page that was parsed
+        is checked. If there is a markup callback, it is called with the HTML
+        of the page first, whether the page has changed or not (e.g. to find
+        the links on it for a crawl).
+
+    ### Args:
+        markup (str): 
+            The HTML of the page.
+        url (str): 
+            The URL of the page.
+        nickname (str):
+            The nickname of the page.
+        site_name (str):
+            The name of the site folder that is used.
+        log (logging.Logger): 
+            The logger for the page.
+        parser (str, optional): 
+            The parser that is used to render the web page.
+            Defaults to "html.parser".
+        target (dict, optional): 
+            The part of the page to parse. Defaults to None (the whole page).
+        fingerprints (FingerprintIndex, optional): 
+            The index of page fingerprints. Defaults to None (no checks).
+        dedupe_mode (str, optional): 
+            What to check, off, html or region. Defaults to "off".
+        markup_callback (function, optional): 
+            A function to call with the HTML of the page. Defaults to None.
+
+    ### Returns:
+        Object: The parsed page or PAGE_UNCHANGED if it hasn't changed.
+    """
+    
+    if markup_callback != None:
+        markup_callback(markup)
+    
+    if fingerprints != None and dedupe_mode == "html":
+        if fingerprints.check(url = url, 
+                              site_name = site_name, 
+                              nickname = nickname, 
+                              mode = dedupe_mode,
+                              fingerprint = content_hash(content = normalize_html(markup = markup))):
+            log.info(f"{nickname} has not changed since it was last processed. Skipping it.")
+            return PAGE_UNCHANGED
+    
+    with timer(site_name = site_name, stage = "parse"):
+        soup = parse_html(markup = markup, 
+                          parser = parser,
+                          target = target)
+    
+    if fingerprints != None and dedupe_mode == "region":
+        if fingerprints.check(url = url, 
+                              site_name = site_name, 
+                              nickname = nickname, 
+                              mode = dedupe_mode,
+                              fingerprint = soup_fingerprint(soup = soup)):
+            log.info(f"The parsed part of {nickname} has not changed since it was last processed. Skipping it.")
+            return PAGE_UNCHANGED
+    
+    return soup
 
 
 def url_scraper(url: str,
-                allowed_http_responses: pd.DataFrame, 
+                allowed_http_responses: frozenset, 
                 headers: dict,
                 nickname: str, 
                 site_name: str,
-                parser: str = "html.parser"):
+                parser: str = "html.parser",
+                timeout: tuple = (CONNECT_TIMEOUT, READ_TIMEOUT),
+                response_cache: ResponseCache = None,
+                scheduler: HostScheduler = None,
+                retry_policies: dict = RETRY_POLICIES,
+                dead_letter_file: str = None,
+                target: dict = None,
+                max_body_bytes: int = MAX_BODY_BYTES,
+                allowed_content_types: tuple = ALLOWED_CONTENT_TYPES,
+                fingerprints: FingerprintIndex = None,
+                dedupe_mode: str = "off",
+                archive: ArchiveWriter = None,
+                memory_budget: MemoryBudget = None,
+                budget_key = None,
+                markup_callback = None):
     """
     ### Summary:
         This function will scrape a web page and process it using
-        BeautifulSoup.
+        BeautifulSoup. The request is made with the session that is shared by 
+        the whole run so that connections to a host are reused. If a response
+        cache is given and the page is in it, the site is asked to only send
+        the page if it has changed. A 304 (Not Modified) response then uses the
+        page from the cache. If a scheduler is given, the request waits until
+        the rate limit for the host allows it and any Retry-After header sent
+        back pauses the requests to the host. Failed requests are retried
+        using the retry policies and if the page still can't be scraped, it
+        is recorded in the dead letter file.
+        
+        The page is downloaded a chunk at a time. Pages that are bigger than 
+        max_body_bytes or that have a content type that is not allowed are
+        not processed. If there is a target, the download is stopped as soon
+        as the tag for the target has been closed.
+        
+        If a fingerprint index is given, pages that haven't changed since they
+        were last processed are not returned (see parse_page). If an archive is
+        given, the response for each page that is used is saved to it, so that
+        the page can be processed again later without downloading it. If a
+        memory budget is given, the size of the page is acquired from it
+        before the page is parsed, which waits until the pages that are
+        already held leave room for it.
     
     ### Args:
         url (str): 
             The URL that needs to be scraped.
-        allowed_http_responses (dataframe): 
-            A dataframe with a list of HTTP responses.
+        allowed_http_responses (frozenset): 
+            The HTTP response codes that are allowed.
         headers (dict): 
             A dictionary containing the required headers.
         nickname (str):
@@ -38,60 +173,728 @@ def url_scraper(url: str,
             The name of the site folder that is used.
         parser (str, optional): 
             The parser that is used to render the web page. 
-            Options are 'html.parser' or 'xml.parser'.
+            Options are 'html.parser', 'lxml' or 'selectolax'.
             Defaults to "html.parser".
+        timeout (tuple, optional): 
+            The number of seconds to wait to connect to the site and to wait
+            for the site to send data.
+            Defaults to (CONNECT_TIMEOUT, READ_TIMEOUT).
+        response_cache (ResponseCache, optional): 
+            The cache to check for the page before it is downloaded and to
+            save the page to afterwards. Defaults to None (no caching).
+        scheduler (HostScheduler, optional): 
+            The scheduler that limits the rate of requests to each host.
+            Defaults to None (no limit).
+        retry_policies (dict, optional): 
+            How failed requests are retried for each status code or class of
+            status codes. Defaults to RETRY_POLICIES.
+        dead_letter_file (str, optional): 
+            The file to record the page in if it can't be scraped.
+            Defaults to None (not recorded).
+        target (dict, optional): 
+            The part of the page to parse, from parse_target.
+            Defaults to None (the whole page).
+        max_body_bytes (int, optional): 
+            The biggest page that can be downloaded, in bytes.
+            Defaults to MAX_BODY_BYTES.
+        allowed_content_types (tuple, optional): 
+            The content types that pages can have.
+            Defaults to ALLOWED_CONTENT_TYPES.
+        fingerprints (FingerprintIndex, optional): 
+            The index of page fingerprints. Defaults to None (no checks).
+        dedupe_mode (str, optional): 
+            What to check, off, html or region. Defaults to "off".
+        archive (ArchiveWriter, optional): 
+            The archive to save the responses to. Defaults to None (not 
+            saved).
+        memory_budget (MemoryBudget, optional): 
+            The budget for the pages held by the site. Defaults to None (no
+            limit).
+        budget_key (optional): 
+            What the page is held in the memory budget by, until it is
+            released by the caller. Defaults to None.
+        markup_callback (function, optional): 
+            A function to call with the HTML of the page before it is parsed
+            (see parse_page). Defaults to None.
         
     ### Returns:
-        Object: The processed web page as a BeautifulSoup object.
+        Object: The processed web page as a BeautifulSoup object (or a 
+        selectolax tree for the selectolax parser), PAGE_UNCHANGED if the page
+        hasn't changed since it was last processed or None if the page could
+        not be scraped.
     """
     
     # -- Initialise logging:
-    log = logging.getLogger(f"{os.getenv('SCRAPER_APP_NAME')}.{__name__}.{inspect.stack()[0][3]}.{site_name}.{nickname}")
+    log = get_logger(__name__, "url_scraper", site_name, nickname)
     #log = logging.getLogger(f"{os.getenv('SCRAPER_APP_NAME')}.{__name__}.{inspect.stack()[0][3]}.{nickname}")
     
+    # -- Timings made while connecting are recorded for this site:
+    set_current_site(site_name = site_name)
+    
     # -- Make a request to the site:
     log.info(f"Performing request.get for {nickname}.")
     log.info(f"URL for {nickname} is: {url}.")
     
-    request = get(url = url, headers = headers)
+    # -- Check the cache for the page and if it is there, only ask for it to
+    # -- be sent if it has changed:
+    cache_entry = None
+    request_headers = dict(headers)
     
-    # -- Check the status code or the response is ok:
-    log.info("Checking if the response code from the request is in the allowed list.")
-    if request.status_code in allowed_http_responses:
-        log.info(f"The response code for {nickname} is ok.")
-        # -- Process and return the response with bs: 
-        return bs(request.text, parser)
-    else:
-        print(f"Error: The response code {request.status_code} is not in the allowed list. Unable to continue processing {nickname}.")
-        log.error((f"Error: The response code {request.status_code} is not in the allowed list. Unable to continue processing {nickname}."))
+    if response_cache != None:
+        cache_entry = response_cache.lookup(url = url)
+        
+        if cache_entry != None:
+            log.info(f"{nickname} is in the cache. Sending a conditional request.")
+            request_headers.update(response_cache.conditional_headers(entry = cache_entry))
+    
+    attempt = 0
+    
+    while True:
+        attempt += 1
+        retry_after_seconds = None
+        
+        # -- Wait until the request is allowed by the rate limit for the host:
+        if scheduler != None:
+            scheduler.wait(url = url)
+        
+        try:
+            request = get_session().get(url = url, 
+                                        headers = request_headers,
+                                        timeout = timeout,
+                                        stream = True)
+        except RequestException as e:
+            failure = "connection"
+            reason = f"The request for {nickname} failed: {e!r}."
+            metrics.count(site_name = site_name, counter = "request_errors")
+        else:
+            # -- The time from sending the request to getting the headers back:
+            metrics.record(site_name = site_name, 
+                           stage = "ttfb", 
+                           seconds = request.elapsed.total_seconds())
+            metrics.count(site_name = site_name, counter = "requests")
+            
+            # -- Pause the requests to the host if it has asked for them to be
+            # -- slowed down:
+            if "Retry-After" in request.headers:
+                if scheduler != None:
+                    retry_after_seconds = scheduler.retry_after(url = url, 
+                                                                value = request.headers["Retry-After"])
+                else:
+                    retry_after_seconds = parse_retry_after(value = request.headers["Retry-After"])
+            
+            # -- Check the status code or the response is ok:
+            log.info("Checking if the response code from the request is in the allowed list.")
+            failure = request.status_code
+            reason = f"The response code {request.status_code} is not in the allowed list."
+            
+            try:
+                if request.status_code == 304 and cache_entry != None:
+                    log.info(f"{nickname} has not changed. Using the page from the cache.")
+                    metrics.count(site_name = site_name, counter = "not_modified")
+                    response_cache.touch(url = url)
+                    
+                    if archive != None:
+                        archive.record(url = url,
+                                       nickname = nickname,
+                                       status_code = 200,
+                                       reason = "OK",
+                                       headers = request.headers,
+                                       body = cache_entry["body"],
+                                       encoding = cache_entry["encoding"],
+                                       from_cache = True)
+                    
+                    # -- Hand the connection back to the pool before waiting
+                    # -- for room in the memory budget:
+                    if memory_budget != None:
+                        request.close()
+                        memory_budget.acquire(key = budget_key, 
+                                              nbytes = len(cache_entry["body"]))
+                    
+                    # -- Parse and return the cached page:
+                    return parse_page(markup = cache_entry["body"].decode(cache_entry["encoding"], errors = "replace"), 
+                                      url = url,
+                                      nickname = nickname,
+                                      site_name = site_name,
+                                      log = log,
+                                      parser = parser,
+                                      target = target,
+                                      fingerprints = fingerprints,
+                                      dedupe_mode = dedupe_mode,
+                                      markup_callback = markup_callback)
+                elif request.status_code in allowed_http_responses:
+                    log.info(f"The response code for {nickname} is ok.")
+                    
+                    try:
+                        body = download_page(request = request,
+                                             nickname = nickname,
+                                             log = log,
+                                             target = target,
+                                             max_body_bytes = max_body_bytes,
+                                             allowed_content_types = allowed_content_types)
+                    except RequestException as e:
+                        # -- The connection was lost while the body was being
+                        # -- downloaded, so try again as for any other failed
+                        # -- request:
+                        failure = "connection"
+                        reason = f"The download for {nickname} failed: {e!r}."
+                        metrics.count(site_name = site_name, counter = "request_errors")
+                    else:
+                        if "seconds" in body:
+                            metrics.record(site_name = site_name, stage = "download", seconds = body["seconds"])
+                            metrics.count(site_name = site_name, counter = "bytes_downloaded", value = len(body["body"]))
+                        
+                        if body["reason"] != None:
+                            # -- The page can't be used and trying again won't 
+                            # -- change that:
+                            print(f"Error: {body['reason']} Unable to continue processing {nickname}.")
+                            log.error(f"Error: {body['reason']} Unable to continue processing {nickname}.")
+                        
+                            if dead_letter_file != None:
+                                write_dead_letter(dead_letter_file = dead_letter_file,
+                                                  url = url,
+                                                  nickname = nickname,
+                                                  site_name = site_name,
+                                                  attempts = attempt,
+                                                  reason = body["reason"])
+                            return
+                        
+                        text, encoding = decode_body(body = body["body"], 
+                                                     encoding = request.encoding)
+                        
+                        # -- Only whole pages are cached:
+                        if response_cache != None and body["stopped_early"] == False:
+                            response_cache.store(url = url,
+                                                 body = body["body"],
+                                                 etag = request.headers.get("ETag"),
+                                                 last_modified = request.headers.get("Last-Modified"),
+                                                 encoding = encoding)
+                        
+                        if archive != None:
+                            archive.record(url = url,
+                                           nickname = nickname,
+                                           status_code = request.status_code,
+                                           reason = request.reason,
+                                           headers = request.headers,
+                                           body = body["body"],
+                                           encoding = encoding,
+                                           truncated = body["stopped_early"])
+                        
+                        # -- Hand the connection back to the pool before waiting
+                        # -- for room in the memory budget:
+                        if memory_budget != None:
+                            request.close()
+                            memory_budget.acquire(key = budget_key, 
+                                                  nbytes = len(body["body"]))
+                        
+                        # -- Parse and return the response:
+                        return parse_page(markup = text, 
+                                          url = url,
+                                          nickname = nickname,
+                                          site_name = site_name,
+                                          log = log,
+                                          parser = parser,
+                                          target = target,
+                                          fingerprints = fingerprints,
+                                          dedupe_mode = dedupe_mode,
+                                          markup_callback = markup_callback)
+            finally:
+                # -- Hand the connection back to the pool:
+                request.close()
+        
+        # -- Work out if the request should be tried again:
+        policy = retry_policy(failure = failure, 
+                              retry_policies = retry_policies)
+        
+        if policy == None or attempt >= policy["max_attempts"]:
+            print(f"Error: {reason} Unable to continue processing {nickname}.")
+            log.error(f"Error: {reason} Unable to continue processing {nickname} after {attempt} attempt(s).")
+            
+            if dead_letter_file != None:
+                write_dead_letter(dead_letter_file = dead_letter_file,
+                                  url = url,
+                                  nickname = nickname,
+                                  site_name = site_name,
+                                  attempts = attempt,
+                                  reason = reason)
+            return
+        
+        delay = backoff_delay(attempt = attempt, 
+                              base_delay = policy["base_delay"],
+                              max_delay = policy["max_delay"])
+        
+        # -- Don't retry before the time the host asked for. If there is a
+        # -- scheduler, it waits for that time itself:
+        if retry_after_seconds != None and scheduler == None:
+            delay = max(delay, retry_after_seconds)
+        
+        log.warning(f"{reason} Retrying {nickname} in {delay:.2f} seconds (attempt {attempt} of {policy['max_attempts']}).")
+        time.sleep(delay)
+        
+
+def row_value(row: tuple,
+              column: str,
+              default = None):
+    """
+    ### Summary:
+        This function will get the value of an optional column for a row from
+        the pages.xlsx file.
+
+    ### Args:
+        row (PageRow): 
+            The row from the pages.xlsx file.
+        column (str): 
+            The name of the column.
+        default (optional): 
+            The value to use if the row doesn't have the column or it is 
+            empty. Defaults to None.
+
+    ### Returns:
+        The value for the column or the default.
+    """
+    
+    value = getattr(row, column, None)
+    
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return default
+    
+    return value
+
+
+def row_parse_target(row: tuple,
+                     site_settings: dict):
+    """
+    ### Summary:
+        This function will work out the part of a page that needs to be 
+        parsed for a row from the pages.xlsx file. The parse_only_selector and
+        parse_only_tag columns are used if the row has them, otherwise the 
+        settings for the site are used. A tag is matched using the html_id_1
+        and html_class_1 columns for the row.
+
+    ### Args:
+        row (PageRow): 
+            The row from the pages.xlsx file.
+        site_settings (dict): 
+            The settings for the site.
+
+    ### Returns:
+        dict: The parse target from parse_target or None if the whole page 
+        should be parsed.
+    """
+    
+    selector = row_value(row = row, 
+                         column = "parse_only_selector", 
+                         default = site_settings["parse_only_selector"])
+    
+    if selector:
+        return parse_target(selector = str(selector))
+    
+    tag = row_value(row = row, 
+                    column = "parse_only_tag", 
+                    default = site_settings["parse_only_tag"])
+    
+    if not tag:
         return
+    
+    attrs = {}
+    
+    for name, column in (("id", "html_id_1"), ("class", "html_class_1")):
+        value = row_value(row = row, column = column)
+        
+        if value != None:
+            attrs[name] = str(value)
+    
+    return parse_target(tag = str(tag), 
+                        attrs = attrs)
+
+
+# -- The processor modules that have been loaded, keyed by site folder:
+_processor_modules = {}
+_processor_modules_lock = Lock()
+
+
+def load_site_processor(site_folder: str):
+    """
+    ### Summary:
+        This function will import the processor.py file in a site folder. The
+        file is only imported the first time it is needed, after which the
+        same module is returned.
+
+    ### Args:
+        site_folder (str): 
+            The full path for the site folder.
+
+    ### Returns:
+        Module: The processor module for the site.
+    """
+    
+    site_folder = str(Path(site_folder).resolve())
+    
+    with _processor_modules_lock:
+        if site_folder in _processor_modules:
+            return _processor_modules[site_folder]
+        
+        site_name = replace_chars(text_to_check = Path(site_folder).name)
+        
+        # -- Initialise logging:
+        log = get_logger(__name__, "load_site_processor", site_name)
+        
+        log.info(f"Importing {site_folder}/processor.py.")
+        
+        # -- Import processor module from the site folder. Each site gets its 
+        # -- own module name so that they don't replace each other:
+        module_name = f"processor_{site_name}"
+        module_spec = util.spec_from_file_location(module_name, 
+                                                  f"{site_folder}/processor.py")
+        processor_module = util.module_from_spec(module_spec)
+        modules[module_name] = processor_module
         
+        try:
+            module_spec.loader.exec_module(processor_module)
+        except BaseException:
+            del modules[module_name]
+            raise
+        
+        _processor_modules[site_folder] = processor_module
+    
+    return processor_module
 
-def processor(allowed_http_responses: pd.DataFrame,
-              browser_headers_os: pd.DataFrame,
-              site_folder: str):
+
+def load_all_site_processors(site_folders: list):
+    """
+    ### Summary:
+        This function will import the processor.py file for every site folder
+        up front, so that the cost of importing them is paid once at the start
+        of the run. A folder whose processor.py can't be imported is logged
+        and skipped here; the error is raised again when the site is processed.
+
+    ### Args:
+        site_folders (list): 
+            A list of the full paths for the site folders.
+
+    ### Returns:
+        dict: The number of seconds it took to import each processor.py file,
+        keyed by site folder.
+    """
+    
+    # -- Initialise logging:
+    log = get_logger(__name__, "load_all_site_processors")
+    
+    import_seconds = {}
+    
+    for site_folder in site_folders:
+        start_time = time.perf_counter()
+        
+        try:
+            load_site_processor(site_folder = site_folder)
+        except Exception as e:
+            log.error(f"Unable to import {site_folder}/processor.py: {e!r}.")
+            print(f"Error: Unable to import {site_folder}/processor.py: {e!r}.")
+            continue
+        
+        import_seconds[str(site_folder)] = round(time.perf_counter() - start_time, 4)
+        log.info(f"Imported {site_folder}/processor.py in {import_seconds[str(site_folder)]} seconds.")
+    
+    return import_seconds
+
+
+def load_page_rows(site_folder: str,
+                   site_name: str):
+    """
+    ### Summary:
+        This function will load the rows in the pages.xlsx file for a site as
+        named tuples (PageRow) with a field for each column, reordered so that
+        the hosts take it in turns.
+
+    ### Args:
+        site_folder (str): 
+            The full path for the site folder.
+        site_name (str):
+            The name of the site folder that is used.
+
+    ### Returns:
+        list: The rows in the pages.xlsx file.
+    
+    ### Raises:
+        FileNotFoundError: If the site doesn't have a pages.xlsx file.
+    """
+    
+    # -- Initialise logging:
+    log = get_logger(__name__, "load_page_rows", site_name)
+    
+    log.info(f"Loading the list of sites to scrape in {site_folder}/pages.xlsx.")
+    
+    sites_to_scrape_df = read_spreadsheet(io = f"{site_folder}/pages.xlsx", 
+                                          engine = 'openpyxl')
+    
+    return interleave_by_host(rows = list(sites_to_scrape_df.itertuples(index = False, 
+                                                                        name = "PageRow")))
+
+
+def download_page(request,
+                  nickname: str,
+                  log: logging.Logger,
+                  target: dict = None,
+                  max_body_bytes: int = MAX_BODY_BYTES,
+                  allowed_content_types: tuple = ALLOWED_CONTENT_TYPES):
+    """
+    ### Summary:
+        This function will check the content type and size of a response and 
+        download its body. The download is stopped early if the body is too
+        big or the tag for the parse target has been closed, and the time and
+        bytes that stopping early saved are logged.
+
+    ### Args:
+        request (requests.Response): 
+            The response, requested with stream = True.
+        nickname (str):
+            The nickname of the page.
+        log (logging.Logger): 
+            The logger for the page.
+        target (dict, optional): 
+            The parse target for the page. Defaults to None.
+        max_body_bytes (int, optional): 
+            The biggest page that can be downloaded, in bytes.
+            Defaults to MAX_BODY_BYTES.
+        allowed_content_types (tuple, optional): 
+            The content types that pages can have.
+            Defaults to ALLOWED_CONTENT_TYPES.
+
+    ### Returns:
+        dict: The result of download_body with an extra key, reason, which is
+        why the page can't be used (or None if it can).
+    """
+    
+    page_content_type = content_type(response = request)
+    
+    if page_content_type != "" and page_content_type not in allowed_content_types:
+        return {"body": b"", "stopped_early": False, 
+                "reason": f"The content type {page_content_type} is not in the allowed list."}
+    
+    content_length = request.headers.get("Content-Length", "")
+    
+    if content_length.isdigit() and int(content_length) > max_body_bytes:
+        return {"body": b"", "stopped_early": False, 
+                "reason": f"The page is {content_length} bytes, which is bigger than the limit of {max_body_bytes} bytes."}
+    
+    body = download_body(response = request,
+                         max_bytes = max_body_bytes,
+                         target = target)
+    body["reason"] = None
+    
+    if body["too_large"] == True:
+        body["reason"] = f"The page is bigger than the limit of {max_body_bytes} bytes."
+        return body
+    
+    log.info(f"Downloaded {len(body['body'])} bytes for {nickname} in {body['seconds']:.3f} seconds.")
+    
+    if body["stopped_early"] == True:
+        if body["expected_bytes"] != None:
+            bytes_saved = body["expected_bytes"] - len(body["body"])
+            seconds_saved = bytes_saved * body["seconds"] / max(len(body["body"]), 1)
+            log.info(f"Stopped downloading {nickname} once its target was found, saving {bytes_saved} bytes "
+                     f"and about {seconds_saved:.3f} seconds.")
+        else:
+            log.info(f"Stopped downloading {nickname} once its target was found. The size of the rest of the page is not known.")
+    
+    return body
+
+
+def fetch_pages(rows: list,
+                fetch_page,
+                fetch_workers: int = FETCH_WORKERS,
+                max_in_flight_pages: int = 0):
+    """
+    ### Summary:
+        This generator will fetch the pages for a list of rows from the
+        pages.xlsx file and yield each row along with its soup as soon as the
+        page has been fetched. When fetch_workers is more than 1, the pages are
+        fetched at the same time using a pool of threads. Only a limited number
+        of pages are requested ahead of the ones that have been yielded so that
+        a large pages.xlsx file does not end up fully held in memory. As the
+        next page is only requested once a page has been yielded, a slow
+        process_soup holds back the fetching.
+        
+        The rows can be a generator that yields ROWS_PENDING when it has no
+        rows right now but may have more once the pages in flight are done
+        (e.g. a crawl), in which case no more pages are requested until one 
+        of them has been yielded.
+
+    ### Args:
+        rows (list): 
+            A list of rows from the pages.xlsx file.
+        fetch_page (function): 
+            A function that takes a row and returns the soup for it (or None).
+        fetch_workers (int, optional): 
+            The number of pages to fetch at the same time.
+            Defaults to FETCH_WORKERS.
+        max_in_flight_pages (int, optional): 
+            The most pages that can be fetched (or waiting to be yielded) at
+            once. Defaults to 0 (two for each worker).
+
+    ### Yields:
+        Tuple: The row and the soup for the row (or None if it failed).
+    """
+    
+    # -- Fetch the pages one after another:
+    if fetch_workers <= 1:
+        for row in rows:
+            # -- Each page is done before the next row is asked for, so there
+            # -- is never anything to wait for:
+            if row is ROWS_PENDING:
+                continue
+            
+            yield row, fetch_page(row)
+        return
+    
+    # -- Fetch the pages at the same time, keeping at most max_in_flight_pages
+    # -- (or two pages per worker) in flight:
+    rows_to_fetch = iter(rows)
+    max_in_flight = max_in_flight_pages if max_in_flight_pages > 0 else fetch_workers * 2
+    
+    with ThreadPoolExecutor(max_workers = fetch_workers, 
+                            thread_name_prefix = "fetch") as executor:
+        in_flight = {}
+        
+        try:
+            while True:
+                for row in rows_to_fetch:
+                    if row is ROWS_PENDING:
+                        break
+                    
+                    in_flight[executor.submit(fetch_page, row)] = row
+                    
+                    if len(in_flight) >= max_in_flight:
+                        break
+                
+                if in_flight == {}:
+                    return
+                
+                done, _ = wait(in_flight, return_when = FIRST_COMPLETED)
+                
+                for future in done:
+                    yield in_flight.pop(future), future.result()
+        finally:
+            # -- Stop any pages that have not been started yet if the
+            # -- caller stops early:
+            for future in in_flight:
+                future.cancel()
+
+
+def processor(allowed_http_responses: frozenset,
+              browser_headers: dict,
+              site_folder: str,
+              fetch_workers: int = FETCH_WORKERS,
+              output_dir: str = OUTPUT_DIR,
+              use_http_cache: bool = HTTP_CACHE_ENABLED,
+              skip_unchanged: bool = True,
+              resume: bool = False,
+              rows = None,
+              row_callback = None,
+              export_file_tag: str = None,
+              archive_mode: str = None,
+              archive_date: str = None):
     """
     ### Summary:
         This function will:
         - process the files that are in the site_folder.
         - create a folder for the site in the output folder.
+        - load the settings for the site from its settings.xlsx file.
         - Cycle through each row in the pages.xlsx file and pass the output 
-          over to the url_scraper function.
+          over to the url_scraper function. When fetch_workers is more than 1,
+          the pages are fetched at the same time. The rows are interleaved
+          by host and the requests to each host are rate limited using the
+          settings for the site.
         - Finally, it will then pass the scraped page (as a beautiful soup object)
-          to the process_soup function in the processor file.
+          to the process_soup function in the processor file. Pages that could
+          not be scraped are recorded in the dead letter file for the site and
+          skipped. If the site has a dedupe_mode, pages that haven't changed
+          since they were last processed are skipped too. Each soup is taken
+          apart once it has been processed, so its memory is freed straight
+          away. If process_soup returns a generator, the records it yields 
+          are pushed into the export buffer for the site as they are made.
+        - Limit the memory used by the pages that have been fetched but not 
+          yet processed, using the max_in_flight_pages and 
+          max_in_flight_bytes settings for the site. The memory used by the
+          process after each page is recorded.
+        - Record each row that has been done in the checkpoint journal for the
+          site. When resuming, the rows that were done by the run that was
+          interrupted are skipped.
+        
+        If the site has crawl turned on in its settings, the rows in the 
+        pages.xlsx file (and the pages in its sitemap) are where a crawl of 
+        the site starts. The links on each page that can be followed are 
+        added to the crawl frontier for the site, which gives out the pages 
+        to process. The frontier is used in place of the checkpoint journal
+        to resume a crawl.
+        
+        Rather than the rows in the pages.xlsx file, the rows to process can be
+        given, e.g. by a work queue worker. They are processed in the order
+        they are given, can be a generator that produces rows as they are 
+        needed and are not recorded in the checkpoint journal.
+        
+        With the record archive_mode, the responses for the pages are saved to
+        an archive for the site as they are downloaded. With the replay
+        archive_mode, the pages are read from the archive for archive_date
+        instead of being downloaded and every page is processed, whether it 
+        has changed or not. Replayed rows are not recorded in the checkpoint
+        journal.
 
     ### Args:
-        allowed_http_responses (pd.DataFrame): 
-            A dataframe containing the HTTP responses that are used to allow 
-            the processing to continue.
-        browser_headers_os (pd.DataFrame): 
-            A filtered dataframe of browsers and
-            headings for the operating system the program is running on.
+        allowed_http_responses (frozenset): 
+            The HTTP response codes that are used to allow the processing to
+            continue, from compile_allowed_http_responses.
+        browser_headers (dict): 
+            The headers to send for each browser on the operating system the
+            program is running on, from compile_browser_headers.
         site_folder (str): 
             The full path for the site folder that is being processed.
+        fetch_workers (int, optional): 
+            The number of pages to fetch at the same time.
+            Defaults to FETCH_WORKERS.
+        output_dir (str, optional): 
+            The folder that the output folder for the site is created in.
+            Defaults to OUTPUT_DIR.
+        use_http_cache (bool, optional): 
+            Whether to use the HTTP cache so that pages are only downloaded
+            again if they have changed. Defaults to HTTP_CACHE_ENABLED.
+        skip_unchanged (bool, optional): 
+            Whether to skip pages that haven't changed, for sites with a
+            dedupe_mode. Defaults to True.
+        resume (bool, optional): 
+            Whether to skip the rows that are in the checkpoint journal for 
+            the site. Defaults to False.
+        rows (iterable, optional): 
+            The rows to process instead of the rows in the pages.xlsx file. 
+            Defaults to None.
+        row_callback (function, optional): 
+            A function that is called with each row and its status 
+            (succeeded, unchanged or failed) once the row is done.
+            Defaults to None.
+        export_file_tag (str, optional): 
+            Added to the name of the export buffer file (and archive) for the
+            site. Defaults to None.
+        archive_mode (str, optional): 
+            record or replay. Defaults to None (pages are downloaded and not
+            saved).
+        archive_date (str, optional): 
+            The day to replay the archive for, as YYYY-MM-DD.
+            Defaults to None (today).
     
     ### Returns:
-        None
+        dict: 
+            rows (int): 
+                The number of rows in the pages.xlsx file (or that were given).
+            succeeded (int): 
+                The number of rows that were scraped and processed.
+            failed (int): 
+                The number of rows that could not be scraped.
+            unchanged (int): 
+                The number of rows that were skipped as they hadn't changed.
+            resumed (int): 
+                The number of rows that were skipped as they had been done
+                before the run was resumed.
+        None is returned if the pages.xlsx file could not be loaded or there
+        is no archive to replay.
     """
     
     # -- Get the site name from the site_folder:
@@ -100,70 +903,395 @@ def processor(allowed_http_responses: pd.DataFrame,
     site_name = replace_chars(text_to_check = site_name)
     
     # -- Initialise logging:
-    log = logging.getLogger(f"{os.getenv('SCRAPER_APP_NAME')}.{__name__}.{inspect.stack()[0][3]}.{site_name}")
+    log = get_logger(__name__, "processor", site_name)
     
-    # -- Load the contents of the pages.xlsx file to a pd dataframe:
-    log.info(f"Loading the list of sites to scrape in {site_folder}/pages.xlsx.")
-    sites_to_scrape_file = f"{site_folder}/pages.xlsx"
+    # -- Timings made by the site processor (e.g. exports) are recorded for
+    # -- this site:
+    set_current_site(site_name = site_name)
     
-    try:
-        sites_to_scrape_df = pd.read_excel(io = sites_to_scrape_file, 
-                                           engine='openpyxl')
-    except (FileNotFoundError, IOError) as e:
-        log.error(f"Could not find pages.xlsx file in {site_folder}. Skipping site.")
-        print(f"Error: Could not find pages.xlsx file in {site_folder}. Skipping site.")
-        return
+    # -- Load the contents of the pages.xlsx file:
+    rows_given = rows != None
+    
+    if rows == None:
+        try:
+            rows = load_page_rows(site_folder = site_folder,
+                                  site_name = site_name)
+        except (FileNotFoundError, IOError) as e:
+            log.error(f"Could not find pages.xlsx file in {site_folder}. Skipping site.")
+            print(f"Error: Could not find pages.xlsx file in {site_folder}. Skipping site.")
+            return
+        
+        use_journal = True
+    else:
+        use_journal = False
     
     # -- Set the name of the folder to save files to:
-    site_output_folder = Path(f"{OUTPUT_DIR}{site_name}")
+    site_output_folder = Path(f"{output_dir}/{site_name}")
     
     # -- Check to see if there is a folder in the output directory for the
     # -- site. If not, create it. If so, carry on:
     try:
-        site_output_folder.mkdir()
+        site_output_folder.mkdir(parents = True)
     except FileExistsError:
         pass
     
     
     log.info(f"Folder to save files to has been created. Location is {site_output_folder}.")
     
-    # -- Process the URL's in the pages.xlsx file:
-    for index, row in sites_to_scrape_df.iterrows():
+    # -- Load the settings for the site and set up the rate limits:
+    site_settings = load_site_settings(site_folder = site_folder,
+                                       site_name = site_name)
+    
+    response_cache = get_response_cache() if use_http_cache == True else None
+    dead_letter_file = f"{site_output_folder}/{DEAD_LETTER_FILE}"
+    scheduler = HostScheduler(rate = site_settings["requests_per_second"],
+                              burst = site_settings["burst"],
+                              site_name = site_name)
+    
+    # -- Set up the checks for pages that haven't changed:
+    dedupe_mode = site_settings["dedupe_mode"]
+    
+    if dedupe_mode not in DEDUPE_MODES:
+        log.error(f"The dedupe_mode {dedupe_mode!r} is not one of {DEDUPE_MODES}. Using off.")
+        print(f"Error: The dedupe_mode {dedupe_mode!r} is not one of {DEDUPE_MODES}. Using off.")
+        dedupe_mode = "off"
+    
+    fingerprints = get_fingerprint_index() if dedupe_mode != "off" and skip_unchanged == True else None
+    
+    # -- Set up the limit on the memory used by the pages that are held:
+    memory_budget = MemoryBudget(site_name = site_name,
+                                 max_bytes = site_settings["max_in_flight_bytes"])
+    
+    # -- Set up the archive to save the responses to or read them from:
+    if archive_mode not in (None, *ARCHIVE_MODES):
+        log.error(f"The archive mode {archive_mode!r} is not one of {ARCHIVE_MODES}. Downloading the pages without saving them.")
+        print(f"Error: The archive mode {archive_mode!r} is not one of {ARCHIVE_MODES}. Downloading the pages without saving them.")
+        archive_mode = None
+    
+    archive_writer = None
+    archive_reader = None
+    
+    if archive_mode == "record":
+        archive_writer = ArchiveWriter(archive_path = archive_file(site_name = site_name,
+                                                                   file_tag = export_file_tag),
+                                       site_name = site_name)
+    elif archive_mode == "replay":
+        replay_files = archive_files(site_name = site_name,
+                                     archive_date = archive_date)
+        
+        if replay_files == []:
+            log.error(f"There is no archive for {site_name} for {archive_date or 'today'}. Skipping site.")
+            print(f"Error: There is no archive for {site_name} for {archive_date or 'today'}. Skipping site.")
+            return
+        
+        archive_reader = ArchiveReader(archive_paths = replay_files,
+                                       site_name = site_name)
+        fingerprints = None
+        use_journal = False
+    
+    # -- Set up the crawl, starting from the rows in the pages.xlsx file and
+    # -- the pages in the sitemap for the site. Replayed crawls start again,
+    # -- in a database of their own so the live crawl is left as it is:
+    frontier = None
+    
+    if site_settings["crawl"] == True and rows_given == False:
+        crawl_hosts = None
+        
+        if site_settings["crawl_same_host"] == True:
+            crawl_hosts = {urlsplit(url).hostname for url in [str(row.url) for row in rows] + [site_settings["crawl_sitemap"]] if url}
+        
+        frontier = CrawlFrontier(db_path = crawl_file(site_name = site_name,
+                                                      replay = archive_reader != None),
+                                 site_name = site_name,
+                                 allowed_hosts = crawl_hosts,
+                                 include = site_settings["crawl_include"],
+                                 exclude = site_settings["crawl_exclude"],
+                                 max_depth = site_settings["crawl_max_depth"],
+                                 max_pages = site_settings["crawl_max_pages"],
+                                 resume = resume == True and archive_reader == None)
+        
+        if frontier.counts() == {"queued": 0, "leased": 0, "done": 0, "failed": 0}:
+            frontier.seed_rows(rows = rows)
+            
+            if site_settings["crawl_sitemap"] and rows != []:
+                frontier.seed_urls(urls = sitemap_urls(sitemap_url = site_settings["crawl_sitemap"],
+                                                       headers = browser_headers.get(rows[0].browser_to_use, {}),
+                                                       site_name = site_name))
+        
+        rows = frontier.rows()
+        use_journal = False
+    
+    def fetch_page(row: tuple):
         # -- Initialise logging:
-        log = logging.getLogger(f"{os.getenv('SCRAPER_APP_NAME')}.{__name__}.{inspect.stack()[0][3]}.{site_name}.{row.nickname}")
+        log = get_logger(__name__, "processor", site_name, row.nickname)
         
         # -- Setup the settings to use for the scraping:
-        browser = row.browser_to_use
-        browser_settings = browser_headers_os.loc[(browser_headers_os.browser \
-                                                  == browser)].iloc[0]
+        headers = browser_headers.get(row.browser_to_use)
         
-        headers = {"User-Agent": browser_settings.values[2]}
+        if headers == None:
+            log.error(f"There are no headers for the browser {row.browser_to_use} in headers.xlsx. Skipping {row.nickname}.")
+            print(f"Error: There are no headers for the browser {row.browser_to_use} in headers.xlsx. Skipping {row.nickname}.")
+            return
         
-        # -- Make a request to the site and process the response with bs:
-        log.info(f"Processing scraping of {row.nickname}.")
+        # -- Make a request to the site and process the response with bs. The
+        # -- page is added to every log record made while it is scraped:
+        with log_context(site = site_name, nickname = row.nickname, url = str(row.url), stage = "fetch"), \
+             timer(site_name = site_name, stage = "fetch"):
+            log.info(f"Processing scraping of {row.nickname}.")
+            
+            return url_scraper(url = str(row.url), 
+                               allowed_http_responses = allowed_http_responses,
+                               headers = headers, 
+                               parser = row_value(row = row, 
+                                                  column = "parser", 
+                                                  default = site_settings["parser"]),
+                               nickname = row.nickname,
+                               site_name = site_name,
+                               response_cache = response_cache,
+                               scheduler = scheduler,
+                               dead_letter_file = dead_letter_file,
+                               target = row_parse_target(row = row, 
+                                                         site_settings = site_settings),
+                               fingerprints = fingerprints,
+                               dedupe_mode = dedupe_mode,
+                               archive = archive_writer,
+                               memory_budget = memory_budget,
+                               budget_key = id(row),
+                               markup_callback = frontier.link_finder(row = row) if frontier != None else None)
+    
+    def replay_page(row: tuple):
+        # -- Initialise logging:
+        log = get_logger(__name__, "processor", site_name, row.nickname)
+        
+        # -- Read the page from the archive and parse it:
+        with log_context(site = site_name, nickname = row.nickname, url = str(row.url), stage = "replay"):
+            response = archive_reader.read(url = str(row.url))
+            
+            if response == None:
+                log.warning(f"{row.nickname} is not in the archive. Skipping it.")
+                print(f"Warning: {row.nickname} is not in the archive. Skipping it.")
+                return
+            
+            log.info(f"Replaying {row.nickname} from the archive.")
+            memory_budget.acquire(key = id(row), 
+                                  nbytes = len(response["body"]))
+            text, _ = decode_body(body = response["body"], 
+                                  encoding = response["encoding"])
+            
+            return parse_page(markup = text, 
+                              url = str(row.url),
+                              nickname = row.nickname,
+                              site_name = site_name,
+                              log = log,
+                              parser = row_value(row = row, 
+                                                 column = "parser", 
+                                                 default = site_settings["parser"]),
+                              target = row_parse_target(row = row, 
+                                                        site_settings = site_settings),
+                              markup_callback = frontier.link_finder(row = row) if frontier != None else None)
+    
+    # -- Import processor module from the current site folder:
+    processor_module = load_site_processor(site_folder = site_folder)
+    
+    log.info(f"Fetching pages using {fetch_workers} worker(s).")
+    
+    # -- Process the URL's in the pages.xlsx file:
+    site_stats = {"rows": len(rows) if use_journal == True else 0, 
+                  "succeeded": 0, "failed": 0, "unchanged": 0, 
+                  "resumed": frontier.resumed if frontier != None else 0}
+    
+    # -- Skip the rows that were done before the run was resumed:
+    journal = CheckpointJournal(journal_file = checkpoint_file(site_name = site_name),
+                                site_name = site_name,
+                                resume = resume) if use_journal == True else None
+    
+    if journal != None and resume == True:
+        rows_to_do = [row for row in rows if journal.is_done(nickname = row.nickname, url = str(row.url)) == False]
+        site_stats["resumed"] = len(rows) - len(rows_to_do)
+        rows = rows_to_do
+        log.info(f"Skipping {site_stats['resumed']} row(s) that were done before the run was resumed.")
+    
+    # -- Set up the export buffer that the site processor can push its 
+    # -- dataframes into:
+    configure_export_buffer(site_name = site_name,
+                            site_output_folder = site_output_folder,
+                            file_format = site_settings["export_buffer_format"],
+                            file_tag = export_file_tag)
+    
+    def finish_row(row: tuple, 
+                   status: str):
+        # -- Count the row and record that it has been done:
+        site_stats[status] += 1
         
-        soup = url_scraper(url = str(row.url), 
-                           allowed_http_responses = allowed_http_responses,
-                           headers = headers, 
-                           parser = "html.parser",
-                           nickname = row.nickname,
-                           site_name = site_name)
+        if use_journal == False:
+            site_stats["rows"] += 1
         
-        if soup == None:
-            return
+        if journal != None:
+            journal.record(nickname = row.nickname, url = str(row.url), status = status)
         
-        # -- Import processor module from the current site folder:        
-        module_spec = util.spec_from_file_location("processor", 
-                                                  f"{site_folder}/processor.py")
-        processor_module = util.module_from_spec(module_spec)
-        modules["processor"] = processor_module
-        module_spec.loader.exec_module(processor_module)
+        if frontier != None:
+            frontier.finish(row = row, status = status)
+        
+        if row_callback != None:
+            row_callback(row, status)
+    
+    try:
+        for row, soup in fetch_pages(rows = rows, 
+                                     fetch_page = replay_page if archive_reader != None else fetch_page, 
+                                     fetch_workers = fetch_workers,
+                                     max_in_flight_pages = site_settings["max_in_flight_pages"]):
+            # -- Initialise logging:
+            log = get_logger(__name__, "processor", site_name, row.nickname)
+            
+            try:
+                # -- Move on to the next row if the page hasn't changed since 
+                # -- it was last processed:
+                if soup is PAGE_UNCHANGED:
+                    finish_row(row = row, status = "unchanged")
+                    continue
+                
+                # -- Move on to the next row if the page could not be scraped.
+                # -- It has been recorded in the dead letter file:
+                if soup == None:
+                    log.warning(f"Skipping {row.nickname} as the page could not be scraped.")
+                    finish_row(row = row, status = "failed")
+                    continue
+                
+                log.info(f"Passing soup for {row.nickname} to it's processor.")
+                # -- Run the soup processor for the page. A generator of 
+                # -- records is run here, while the soup is still in one piece:
+                with log_context(site = site_name, nickname = row.nickname, url = str(row.url), stage = "process_soup"), \
+                     timer(site_name = site_name, stage = "process_soup"):
+                    records = processor_module.process_soup(soup = soup, 
+                                                            row_details = row,
+                                                            site_name = site_name,
+                                                            site_output_folder = site_output_folder)
+                    
+                    if inspect.isgenerator(records):
+                        get_export_buffer(site_name = site_name).push_records(records = records,
+                                                                             nickname = row.nickname)
+                
+                # -- Only save the fingerprint for the page once it has been 
+                # -- processed, so that a page that failed is processed next 
+                # -- time:
+                if fingerprints != None:
+                    fingerprints.commit(url = str(row.url),
+                                        site_name = site_name)
+                
+                finish_row(row = row, status = "succeeded")
+            finally:
+                # -- Free the soup and let more pages be fetched:
+                release_soup(soup = soup)
+                memory_budget.release(key = id(row))
+                soup = None
+                
+                rss_mb = current_rss_bytes() / 1024 / 1024
+                metrics.sample(site_name = site_name, 
+                               name = "page_rss_mb", 
+                               value = rss_mb)
+                log.info(f"The process is using {rss_mb:.1f} MB of memory after {row.nickname}.")
+    finally:
+        if journal != None:
+            journal.close()
+        
+        if archive_writer != None:
+            archive_writer.close()
+        
+        if archive_reader != None:
+            archive_reader.close()
+        
+        if frontier != None:
+            log.info(f"The crawl frontier for {site_name} has {frontier.counts()}.")
+            frontier.close()
+        
+        # -- Write anything that is left in the export buffer for the site,
+        # -- even if the site has crashed:
+        close_export_buffer(site_name = site_name)
+        
+        # -- Combine the dataset files that export_to_parquet / 
+        # -- export_to_feather wrote for each page into one per partition:
+        compact_dataset_parts(site_name = site_name)
+        
+        log.info(f"The most memory the process has used is {peak_rss_bytes() / 1024 / 1024:.1f} MB. "
+                 f"The most bytes of pages held at once was {memory_budget.peak}, with {memory_budget.waits} wait(s) for room.")
+    
+    return site_stats
 
-        log.info(f"Passing soup for {row.nickname} to it's processor.")
-        # -- Run the soup processor for the page:
-        processor_module.process_soup(soup = soup, 
-                                      row_details = row,
-                                      site_name = site_name,
-                                      site_output_folder = site_output_folder)
+
+def run_site(site_folder: str,
+             **processor_settings):
+    """
+    ### Summary:
+        This function will run the processor for a site folder and time it. 
+        The site gets its own log file in the logs folder for today and any
+        error raised while processing the site is caught and logged, so that
+        one site crashing does not stop the other sites from being processed.
+        It can be run in a separate process for each site.
+
+    ### Args:
+        site_folder (str): 
+            The full path for the site folder that is being processed.
+        **processor_settings: 
+            The other arguments to pass to the processor function, such as
+            allowed_http_responses and browser_headers.
+
+    ### Returns:
+        dict: 
+            site_name (str): 
+                The name of the site folder that is used.
+            status (str): 
+                completed, skipped or crashed.
+            rows (int): 
+                The number of rows in the pages.xlsx file.
+            succeeded (int): 
+                The number of rows that were scraped and processed.
+            failed (int): 
+                The number of rows that could not be scraped.
+            unchanged (int): 
+                The number of rows that were skipped as they hadn't changed.
+            resumed (int): 
+                The number of rows that were skipped as they had been done
+                before the run was resumed.
+            seconds (float): 
+                How long the site took to process.
+            error (str): 
+                The error that the site crashed with (if any).
+            metrics (dict): 
+                The timings and counters for the site (see 
+                modules.metrics.MetricsRecorder.take).
+    """
+    
+    # -- Get the site name from the site_folder:
+    site_name = replace_chars(text_to_check = Path(site_folder).name)
+    
+    # -- Initialise logging:
+    log = get_logger(__name__, "run_site", site_name)
+    site_log_handler = add_site_log_handler(site_name = site_name, 
+                                            log_file = f"{os.getenv('TODAYS_LOGS_DIR')}/{site_name}.log")
+    
+    site_summary = {"site_name": site_name, "status": "completed", "rows": 0, 
+                    "succeeded": 0, "failed": 0, "unchanged": 0, "resumed": 0, "seconds": 0.0, "error": None}
+    
+    log.info(f"Starting processing of {site_folder} in process {os.getpid()}.")
+    start_time = time.perf_counter()
+    
+    try:
+        site_stats = processor(site_folder = site_folder,
+                               **processor_settings)
+        
+        if site_stats == None:
+            site_summary["status"] = "skipped"
+        else:
+            site_summary.update(site_stats)
+    except Exception as e:
+        log.exception(f"Processing of {site_folder} crashed: {e!r}.")
+        print(f"Error: Processing of {site_folder} crashed: {e!r}.")
+        site_summary["status"] = "crashed"
+        site_summary["error"] = repr(e)
+    finally:
+        site_summary["seconds"] = round(time.perf_counter() - start_time, 3)
+        site_summary["metrics"] = metrics.take(site_name = site_name)
+        log.info(f"Completed processing of {site_folder} in {site_summary['seconds']} seconds.")
+        remove_site_log_handler(handler = site_log_handler)
     
-    return
\ No newline at end of file
+    return site_summary
\ No newline at end of file
@@ -0,0 +1,93 @@
+# -- Import required libraries / modules:
+from pathlib import Path
+
+from modules.config import SITE_SETTINGS_DEFAULTS, SITE_SETTINGS_FILE
+from modules.log_setup import get_logger
+from modules.spreadsheets import read_spreadsheet
+
+import pandas as pd
+
+
+def convert_setting(value, default):
+    """
+    ### Summary:
+        This function will convert a value from a settings.xlsx file to the 
+        same type as the default value for the setting.
+
+    ### Args:
+        value: 
+            The value from the settings.xlsx file.
+        default: 
+            The default value for the setting.
+
+    ### Returns:
+        The converted value.
+    """
+    
+    if isinstance(default, bool):
+        return str(value).strip().lower() in ("true", "yes", "1", "1.0")
+    
+    if default == None:
+        return value
+    
+    return type(default)(value)
+
+
+def load_site_settings(site_folder: str, 
+                       site_name: str):
+    """
+    ### Summary:
+        This function will load the settings for a site from the optional 
+        settings.xlsx file in the site folder. The file has two columns,
+        setting and value, with one row for each setting to change. Any 
+        setting that is not in the file uses its default value from
+        SITE_SETTINGS_DEFAULTS.
+
+    ### Args:
+        site_folder (str): 
+            The full path for the site folder that is being processed.
+        site_name (str):
+            The name of the site folder that is used.
+
+    ### Returns:
+        dict: The settings for the site.
+    """
+    
+    # -- Initialise logging:
+    log = get_logger(__name__, "load_site_settings", site_name)
+    
+    site_settings = dict(SITE_SETTINGS_DEFAULTS)
+    site_settings_file = Path(f"{site_folder}/{SITE_SETTINGS_FILE}")
+    
+    if site_settings_file.is_file() == False:
+        log.info(f"No {SITE_SETTINGS_FILE} file in {site_folder}. Using the default settings.")
+        return site_settings
+    
+    log.info(f"Loading the site settings in {site_settings_file}.")
+    
+    try:
+        site_settings_df = read_spreadsheet(io = site_settings_file, 
+                                            engine = 'openpyxl')
+    except (FileNotFoundError, IOError) as e:
+        log.error(f"Could not load {site_settings_file}. Using the default settings.")
+        print(f"Error: Could not load {site_settings_file}. Using the default settings.")
+        return site_settings
+    
+    for setting, value in zip(site_settings_df.setting, site_settings_df.value):
+        if setting not in SITE_SETTINGS_DEFAULTS:
+            log.warning(f"Ignoring unknown setting {setting} in {site_settings_file}.")
+            continue
+        
+        if pd.isna(value):
+            continue
+        
+        try:
+            site_settings[setting] = convert_setting(value = value, 
+                                                     default = SITE_SETTINGS_DEFAULTS[setting])
+        except ValueError:
+            log.error(f"The value {value!r} for {setting} in {site_settings_file} is not valid. Using the default value.")
+            print(f"Error: The value {value!r} for {setting} in {site_settings_file} is not valid. Using the default value.")
+    
+    log.info(f"Site settings for {site_name}: {site_settings}.")
+    
+    return site_settings
@@ -0,0 +1,152 @@
+# -- Import required libraries / modules:
+from pathlib import Path
+
+from modules.config import SPREADSHEET_CACHE_DIR, SPREADSHEET_CACHE_ENABLED
+from modules.log_setup import get_logger
+
+import hashlib
+import os
+import pandas as pd
+import pickle
+import tempfile
+
+
+def file_sha256(path: str):
+    """
+    ### Summary:
+        This function will create a SHA-256 hash of the contents of a file.
+
+    ### Args:
+        path (str):
+            The path to the file.
+
+    ### Returns:
+        String (str): The hash as hex.
+    """
+
+    sha256 = hashlib.sha256()
+
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b""):
+            sha256.update(chunk)
+
+    return sha256.hexdigest()
+
+
+def cache_file(path: Path,
+               read_options: dict,
+               cache_dir: str = SPREADSHEET_CACHE_DIR):
+    """
+    ### Summary:
+        This function will work out the file in the cache for a spreadsheet.
+        The same spreadsheet read with different options (e.g. a different
+        sheet) gets a different file.
+
+    ### Args:
+        path (Path):
+            The path to the spreadsheet.
+        read_options (dict):
+            The options that are passed to pd.read_excel.
+        cache_dir (str, optional):
+            The folder for the cache. Defaults to SPREADSHEET_CACHE_DIR.
+
+    ### Returns:
+        Path: The path to the file in the cache.
+    """
+
+    key = f"{path.resolve()}|{sorted(read_options.items())!r}"
+
+    return Path(cache_dir) / f"{path.stem}-{hashlib.sha256(key.encode('utf-8')).hexdigest()[:16]}.pickle"
+
+
+def read_spreadsheet(io,
+                     use_cache: bool = SPREADSHEET_CACHE_ENABLED,
+                     cache_dir: str = SPREADSHEET_CACHE_DIR,
+                     **read_options):
+    """
+    ### Summary:
+        This function will read a spreadsheet into a dataframe, the same as
+        pd.read_excel, but keeps a copy of the dataframe in a pickle file in
+        the cache. The next time the spreadsheet is read, the copy is used
+        instead as long as the spreadsheet hasn't changed, which is much
+        quicker than parsing it again.
+
+        A spreadsheet is treated as unchanged if its modified time and size
+        are the same as when it was cached. If they are different, its
+        contents are hashed and compared, so a spreadsheet that has only been
+        touched or copied is not read again.
+
+    ### Args:
+        io (str):
+            The path to the spreadsheet.
+        use_cache (bool, optional):
+            Whether to use the cache. Defaults to SPREADSHEET_CACHE_ENABLED.
+        cache_dir (str, optional):
+            The folder for the cache. Defaults to SPREADSHEET_CACHE_DIR.
+        **read_options:
+            Any other options to pass to pd.read_excel, e.g. engine.
+
+    ### Returns:
+        pd.DataFrame: The contents of the spreadsheet.
+
+    ### Raises:
+        FileNotFoundError: If the spreadsheet does not exist.
+    """
+
+    path = Path(io)
+
+    if use_cache == False:
+        return pd.read_excel(io = path, **read_options)
+
+    # -- Initialise logging:
+    log = get_logger(__name__, "read_spreadsheet")
+
+    stat = path.stat()
+    cached_file = cache_file(path = path,
+                             read_options = read_options,
+                             cache_dir = cache_dir)
+    cached = None
+
+    try:
+        with open(cached_file, "rb") as file:
+            cached = pickle.load(file)
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        log.warning(f"Unable to load {cached_file} from the cache for {path}: {e!r}. Reading the spreadsheet again.")
+
+    if cached != None:
+        if cached["mtime_ns"] == stat.st_mtime_ns and cached["size"] == stat.st_size:
+            log.debug(f"Using the cached copy of {path}.")
+            return cached["df"]
+
+    sha256 = file_sha256(path = path)
+
+    if cached != None and cached["sha256"] == sha256:
+        log.debug(f"{path} has been touched but not changed. Using the cached copy.")
+        df = cached["df"]
+    else:
+        log.info(f"Reading {path} and saving a copy to the cache.")
+        df = pd.read_excel(io = path, **read_options)
+
+    # -- Write to a temporary file first, so that another process never sees
+    # -- half of the file:
+    cached_file.parent.mkdir(parents = True, exist_ok = True)
+    file_handle, temporary_file = tempfile.mkstemp(dir = cached_file.parent,
+                                                   suffix = ".tmp")
+
+    try:
+        with os.fdopen(file_handle, "wb") as file:
+            pickle.dump({"mtime_ns": stat.st_mtime_ns,
+                         "size": stat.st_size,
+                         "sha256": sha256,
+                         "df": df},
+                        file,
+                        protocol = pickle.HIGHEST_PROTOCOL)
+
+        os.replace(temporary_file, cached_file)
+    except OSError as e:
+        log.warning(f"Unable to save {path} to the cache: {e!r}.")
+        Path(temporary_file).unlink(missing_ok = True)
+
+    return df
@@ -0,0 +1,320 @@
+# -- Import required libraries / modules:
+from bs4.element import Tag
+
+import pandas as pd
+import re
+
+
+# -- Characters that are removed from a value before trying to turn it into a
+# -- number, e.g. 1,234 or £5.99:
+NUMBER_NOISE = re.compile(r"[,\s£$€%]")
+
+
+def _span(value):
+    # -- Turn a rowspan / colspan attribute into a number of at least 1:
+    try:
+        return max(1, int(value))
+    except (TypeError, ValueError):
+        return 1
+
+
+def _closest_table(node, is_selectolax: bool):
+    # -- Find the table that a row belongs to:
+    parent = node.parent
+
+    while parent is not None:
+        if (parent.tag if is_selectolax else parent.name) == "table":
+            return parent
+
+        parent = parent.parent
+
+    return
+
+
+def table_rows(table):
+    """
+    ### Summary:
+        This function will read the rows of an HTML table. Rows of any tables
+        inside the table are skipped. It works with both a BeautifulSoup tag
+        and a selectolax node.
+
+    ### Args:
+        table (bs4.element.Tag or selectolax node):
+            The table to read.
+
+    ### Yields:
+        Tuple: Whether the row is a header row and a list of the cells in the
+        row, where each cell is a tuple of its text, rowspan and colspan.
+    """
+
+    is_selectolax = isinstance(table, Tag) == False
+
+    if is_selectolax:
+        rows = table.css("tr")
+    else:
+        rows = table.find_all("tr")
+
+    for row in rows:
+        # -- Compare the ids of the tables, as the same selectolax node can be
+        # -- returned as a different object:
+        closest_table = _closest_table(node = row, is_selectolax = is_selectolax)
+
+        if is_selectolax:
+            if closest_table == None or closest_table.mem_id != table.mem_id:
+                continue
+
+            cells = [cell for cell in row.iter() if cell.tag in ("td", "th")]
+            in_head = row.parent != None and row.parent.tag == "thead"
+            row_cells = [(cell.text(separator = " ", strip = True),
+                          _span(cell.attributes.get("rowspan")),
+                          _span(cell.attributes.get("colspan"))) for cell in cells]
+            all_headers = cells != [] and all(cell.tag == "th" for cell in cells)
+        else:
+            if closest_table is not table:
+                continue
+
+            cells = row.find_all(["td", "th"], recursive = False)
+            in_head = row.parent != None and row.parent.name == "thead"
+            row_cells = [(cell.get_text(" ", strip = True),
+                          _span(cell.get("rowspan")),
+                          _span(cell.get("colspan"))) for cell in cells]
+            all_headers = cells != [] and all(cell.name == "th" for cell in cells)
+
+        yield in_head or all_headers, row_cells
+
+
+def grid_rows(table):
+    """
+    ### Summary:
+        This function will lay out the cells of an HTML table in a grid one row
+        at a time, with cells that span more than one row or column copied
+        into each position they cover. Empty rows are skipped.
+
+    ### Args:
+        table (bs4.element.Tag or selectolax node):
+            The table to read.
+
+    ### Yields:
+        Tuple: Whether the row is a header row and a list of the text in each
+        column of the row.
+    """
+
+    # -- The cells from earlier rows that still span into the rows below,
+    # -- keyed by column number, as (rows left, text):
+    spanning = {}
+
+    for is_header, row_cells in table_rows(table = table):
+        if row_cells == [] and spanning == {}:
+            continue
+
+        grid_row = []
+        column = 0
+        cells = iter(row_cells)
+
+        while True:
+            if column in spanning:
+                rows_left, text = spanning[column]
+                grid_row.append(text)
+
+                if rows_left == 1:
+                    del spanning[column]
+                else:
+                    spanning[column] = (rows_left - 1, text)
+
+                column += 1
+                continue
+
+            cell = next(cells, None)
+
+            if cell == None:
+                # -- Carry on through any later columns that are still being
+                # -- spanned from the rows above:
+                if spanning != {} and max(spanning) > column:
+                    grid_row.append("")
+                    column += 1
+                    continue
+
+                break
+
+            text, rowspan, colspan = cell
+
+            for _ in range(colspan):
+                grid_row.append(text)
+
+                if rowspan > 1:
+                    spanning[column] = (rowspan - 1, text)
+
+                column += 1
+
+        yield is_header, grid_row
+
+
+def table_grid(table):
+    """
+    ### Summary:
+        This function will lay out the cells of an HTML table in a grid (see
+        grid_rows) and split it into its header rows and body rows.
+
+    ### Args:
+        table (bs4.element.Tag or selectolax node):
+            The table to read.
+
+    ### Returns:
+        Tuple: A list of the header rows and a list of the body rows, where
+        each row is a list of the text in each column.
+    """
+
+    header_rows = []
+    body_rows = []
+
+    for is_header, grid_row in grid_rows(table = table):
+        if is_header:
+            header_rows.append(grid_row)
+        else:
+            body_rows.append(grid_row)
+
+    return header_rows, body_rows
+
+
+def column_names(header_rows: list,
+                 width: int):
+    """
+    ### Summary:
+        This function will create the column names for a table from its
+        header rows. When there is more than one header row, the names for
+        each column are joined with a space. Columns without a name are named
+        after their number and repeated names have a number added to them.
+
+    ### Args:
+        header_rows (list):
+            The header rows from table_grid.
+        width (int):
+            The number of columns in the table.
+
+    ### Returns:
+        list: The name for each column.
+    """
+
+    names = []
+    seen = {}
+
+    for column in range(width):
+        parts = []
+
+        for header_row in header_rows:
+            if column < len(header_row) and header_row[column] != "" \
+                    and (parts == [] or parts[-1] != header_row[column]):
+                parts.append(header_row[column])
+
+        name = " ".join(parts) if parts != [] else str(column)
+
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}_{seen[name]}"
+        else:
+            seen[name] = 1
+
+        names.append(name)
+
+    return names
+
+
+def convert_column(values: list):
+    """
+    ### Summary:
+        This function will turn a column of text into numbers if every value
+        in it that isn't empty is a number (allowing for thousands separators,
+        currency symbols and percentages). Empty values become NaN.
+
+    ### Args:
+        values (list):
+            The text for each row in the column.
+
+    ### Returns:
+        pd.Series: The converted column, or the text if it isn't all numbers.
+    """
+
+    column = pd.Series(values, dtype = "object")
+    cleaned = column.str.replace(NUMBER_NOISE, "", regex = True)
+    cleaned = cleaned.where(cleaned != "")
+    numbers = pd.to_numeric(cleaned, errors = "coerce")
+
+    # -- Only use the numbers if nothing was lost converting them:
+    if numbers.notna().sum() == cleaned.notna().sum() and numbers.notna().any():
+        return numbers
+
+    return column
+
+
+def table_to_dataframe(table,
+                       convert_types: bool = True):
+    """
+    ### Summary:
+        This function will turn an HTML table into a pandas dataframe. It
+        handles thead / tbody sections, cells that span more than one row or
+        column and tables without any header rows. The dataframe is built a
+        column at a time in one go, rather than a row at a time.
+
+    ### Args:
+        table (bs4.element.Tag or selectolax node):
+            The table to turn into a dataframe.
+        convert_types (bool, optional):
+            Whether to turn columns that only contain numbers into numbers.
+            Defaults to True.
+
+    ### Returns:
+        pd.DataFrame: The table as a dataframe.
+    """
+
+    header_rows, body_rows = table_grid(table = table)
+    width = max([len(row) for row in header_rows + body_rows], default = 0)
+    names = column_names(header_rows = header_rows,
+                         width = width)
+
+    # -- Build each column from the rows, padding any short rows:
+    columns = {}
+
+    for column, name in enumerate(names):
+        values = [row[column] if column < len(row) else "" for row in body_rows]
+        columns[name] = convert_column(values = values) if convert_types == True else values
+
+    return pd.DataFrame(columns, columns = names)
+
+
+def table_records(table):
+    """
+    ### Summary:
+        This function will read the body rows of an HTML table one at a time
+        as records, without building the whole table first, so that a
+        processor can yield them to the export buffer for its site. The
+        column names come from the header rows above the first body row and
+        any columns after the named ones are named after their number. As the
+        whole of a column is never seen at once, the values are left as text.
+
+    ### Args:
+        table (bs4.element.Tag or selectolax node):
+            The table to read.
+
+    ### Yields:
+        dict: The text in each column of a body row, keyed by column name.
+    """
+
+    header_rows = []
+    names = None
+
+    for is_header, grid_row in grid_rows(table = table):
+        if names == None and is_header:
+            header_rows.append(grid_row)
+            continue
+
+        if is_header:
+            # -- Header rows further down the table (e.g. a repeated header)
+            # -- are not records:
+            continue
+
+        if names == None or len(grid_row) > len(names):
+            width = max([len(row) for row in header_rows + [grid_row]] + [len(names or [])])
+            names = column_names(header_rows = header_rows,
+                                 width = width)
+
+        yield {name: grid_row[column] if column < len(grid_row) else "" for column, name in enumerate(names)}
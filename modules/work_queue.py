@@ -0,0 +1,601 @@
+# -- Import required libraries / modules:
+from collections import namedtuple
+from datetime import datetime
+from pathlib import Path
+from threading import Event, Lock, Thread
+
+from modules.config import ALL_SITES_DIR, WORK_QUEUE_FILE, WORK_QUEUE_MAX_ATTEMPTS, WORK_QUEUE_POLL_SECONDS, WORK_QUEUE_VISIBILITY_TIMEOUT
+from modules.log_setup import get_logger
+from modules.metrics import MetricsRecorder
+from modules.replace import replace_chars
+from modules.scraper import load_page_rows, run_site
+
+import json
+import os
+import pandas as pd
+import socket
+import sqlite3
+import time
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY,
+    batch TEXT NOT NULL,
+    site_dir TEXT NOT NULL,
+    site_name TEXT NOT NULL,
+    row_index INTEGER NOT NULL,
+    nickname TEXT,
+    url TEXT,
+    row_data TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    lease_owner TEXT,
+    lease_expires REAL,
+    enqueued_at TEXT NOT NULL,
+    finished_at TEXT,
+    error TEXT,
+    UNIQUE (batch, site_name, row_index)
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks (status, site_name, id);
+"""
+
+
+def worker_name():
+    """
+    ### Summary:
+        This function will create a name for a worker that is unique across
+        hosts, from the host name and process id.
+
+    ### Args:
+        None.
+
+    ### Returns:
+        String (str): The name of the worker.
+    """
+
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class WorkQueue:
+    """
+    ### Summary:
+        A queue of the rows from the pages.xlsx files that need to be done,
+        kept in a SQLite database so that it doesn't need any other service.
+        Any number of workers, in other processes or on other hosts that can
+        reach the database file, can lease rows from the queue, process them
+        and acknowledge (ack) them.
+
+        A leased row is hidden from the other workers until its lease expires
+        (the visibility timeout). If a worker dies, its rows are leased to
+        another worker once their leases expire. A row is tried at most
+        max_attempts times and is then marked as failed. Rows can be done
+        more than once if a worker is slower than the visibility timeout, so
+        site processors should be safe to run again for a page.
+
+        Each lease is made in its own write transaction, so two workers never
+        lease the same row at the same time. The database does not use
+        write-ahead logging, so that its locks also work when the file is on
+        a shared (network) file system.
+
+    ### Args:
+        db_path (str, optional):
+            The path to the database file. Defaults to WORK_QUEUE_FILE.
+        max_attempts (int, optional):
+            The most times a row is leased. Defaults to WORK_QUEUE_MAX_ATTEMPTS.
+    """
+
+    def __init__(self,
+                 db_path: str = WORK_QUEUE_FILE,
+                 max_attempts: int = WORK_QUEUE_MAX_ATTEMPTS):
+        Path(db_path).parent.mkdir(parents = True, exist_ok = True)
+
+        self.db_path = str(db_path)
+        self.max_attempts = max_attempts
+        self.lock = Lock()
+        self.connection = sqlite3.connect(self.db_path,
+                                          timeout = 60,
+                                          isolation_level = None,
+                                          check_same_thread = False)
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        """
+        ### Summary:
+            This will close the connection to the database.
+
+        ### Args:
+            None.
+
+        ### Returns:
+            None
+        """
+
+        with self.lock:
+            self.connection.close()
+
+        return
+
+    def enqueue(self,
+                site_dir: str,
+                site_name: str,
+                rows: list,
+                batch: str):
+        """
+        ### Summary:
+            This will add the rows for a site to the queue. Adding the same
+            rows to the same batch again does nothing.
+
+        ### Args:
+            site_dir (str):
+                The name of the site folder in the sites folder.
+            site_name (str):
+                The name of the site folder that is used.
+            rows (list):
+                The rows from the pages.xlsx file for the site (PageRow).
+            batch (str):
+                The name of the batch the rows belong to, e.g. the time the
+                rows were added.
+
+        ### Returns:
+            int: The number of rows that were added.
+        """
+
+        enqueued_at = datetime.now().isoformat(timespec = "seconds")
+        tasks = []
+
+        for row_index, row in enumerate(rows):
+            # -- Empty cells are stored as null:
+            row_data = {field: None if not isinstance(value, str) and pd.isna(value) else value
+                        for field, value in row._asdict().items()}
+            tasks.append((batch, site_dir, site_name, row_index, str(row.nickname), str(row.url),
+                          json.dumps(row_data, default = str), enqueued_at))
+
+        with self.lock:
+            self.connection.execute("BEGIN IMMEDIATE")
+
+            try:
+                before = self.connection.total_changes
+                self.connection.executemany(
+                    """INSERT OR IGNORE INTO tasks (batch, site_dir, site_name, row_index, nickname, url, row_data, enqueued_at)
+                       VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+                    tasks)
+                added = self.connection.total_changes - before
+                self.connection.execute("COMMIT")
+            except BaseException:
+                self.connection.execute("ROLLBACK")
+                raise
+
+        return added
+
+    def lease(self,
+              worker: str,
+              limit: int = 1,
+              site_name: str = None,
+              visibility_timeout: float = WORK_QUEUE_VISIBILITY_TIMEOUT):
+        """
+        ### Summary:
+            This will lease rows from the queue to a worker. Rows that are
+            queued or whose lease has expired can be leased, oldest first.
+            Rows whose lease has expired and that have been tried max_attempts
+            times are marked as failed instead.
+
+        ### Args:
+            worker (str):
+                The name of the worker.
+            limit (int, optional):
+                The most rows to lease. Defaults to 1.
+            site_name (str, optional):
+                Only lease rows for this site. Defaults to None (any site).
+            visibility_timeout (float, optional):
+                The number of seconds until the lease expires.
+                Defaults to WORK_QUEUE_VISIBILITY_TIMEOUT.
+
+        ### Returns:
+            list: A dictionary for each row that was leased, with the id,
+            site_dir, site_name and row (PageRow) for the row.
+        """
+
+        now = time.time()
+        site_filter = "" if site_name == None else " AND site_name = ?"
+        site_parameters = [] if site_name == None else [site_name]
+
+        with self.lock:
+            self.connection.execute("BEGIN IMMEDIATE")
+
+            try:
+                self.connection.execute(
+                    f"""UPDATE tasks SET status = 'failed', lease_owner = NULL, error = COALESCE(error, 'The lease expired.'),
+                            finished_at = ?
+                        WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?{site_filter}""",
+                    [datetime.now().isoformat(timespec = "seconds"), now, self.max_attempts] + site_parameters)
+
+                leased = self.connection.execute(
+                    f"""SELECT id, site_dir, site_name, row_data FROM tasks
+                        WHERE (status = 'queued' OR (status = 'leased' AND lease_expires < ?)){site_filter}
+                        ORDER BY id LIMIT ?""",
+                    [now] + site_parameters + [limit]).fetchall()
+
+                self.connection.executemany(
+                    """UPDATE tasks SET status = 'leased', lease_owner = ?, lease_expires = ?, attempts = attempts + 1
+                       WHERE id = ?""",
+                    [(worker, now + visibility_timeout, task_id) for task_id, _, _, _ in leased])
+                self.connection.execute("COMMIT")
+            except BaseException:
+                self.connection.execute("ROLLBACK")
+                raise
+
+        tasks = []
+
+        for task_id, site_dir, task_site_name, row_data in leased:
+            row_data = json.loads(row_data)
+            tasks.append({"id": task_id,
+                          "site_dir": site_dir,
+                          "site_name": task_site_name,
+                          "row": namedtuple("PageRow", row_data.keys(), rename = True)(*row_data.values())})
+
+        return tasks
+
+    def ack(self,
+            task_id: int,
+            worker: str,
+            status: str = "done",
+            error: str = None):
+        """
+        ### Summary:
+            This will mark a leased row as finished. Nothing is changed if the
+            lease has moved to another worker.
+
+        ### Args:
+            task_id (int):
+                The id of the row.
+            worker (str):
+                The name of the worker that leased the row.
+            status (str, optional):
+                done, or failed if the row can't be done. Defaults to "done".
+            error (str, optional):
+                Why the row failed. Defaults to None.
+
+        ### Returns:
+            bool: True if the row was marked as finished, otherwise False.
+        """
+
+        with self.lock:
+            cursor = self.connection.execute(
+                """UPDATE tasks SET status = ?, error = ?, finished_at = ?, lease_owner = NULL, lease_expires = NULL
+                   WHERE id = ? AND status = 'leased' AND lease_owner = ?""",
+                (status, error, datetime.now().isoformat(timespec = "seconds"), task_id, worker))
+
+        return cursor.rowcount == 1
+
+    def renew(self,
+              task_ids: list,
+              worker: str,
+              visibility_timeout: float = WORK_QUEUE_VISIBILITY_TIMEOUT):
+        """
+        ### Summary:
+            This will extend the leases on rows that a worker is still doing,
+            so that they don't expire and get leased to another worker.
+            Nothing is changed for rows whose lease has moved to another
+            worker.
+
+        ### Args:
+            task_ids (list):
+                The ids of the rows.
+            worker (str):
+                The name of the worker that leased the rows.
+            visibility_timeout (float, optional):
+                The number of seconds from now until the leases expire.
+                Defaults to WORK_QUEUE_VISIBILITY_TIMEOUT.
+
+        ### Returns:
+            int: The number of leases that were extended.
+        """
+
+        lease_expires = time.time() + visibility_timeout
+
+        with self.lock:
+            cursor = self.connection.executemany(
+                """UPDATE tasks SET lease_expires = ?
+                   WHERE id = ? AND status = 'leased' AND lease_owner = ?""",
+                [(lease_expires, task_id, worker) for task_id in task_ids])
+
+        return cursor.rowcount
+
+    def release(self,
+                task_ids: list,
+                worker: str,
+                error: str = None):
+        """
+        ### Summary:
+            This will hand leased rows back to the queue straight away, e.g.
+            when the site crashed, so that they don't have to wait for their
+            leases to expire.
+
+        ### Args:
+            task_ids (list):
+                The ids of the rows.
+            worker (str):
+                The name of the worker that leased the rows.
+            error (str, optional):
+                Why the rows were handed back. Defaults to None.
+
+        ### Returns:
+            None
+        """
+
+        with self.lock:
+            self.connection.executemany(
+                """UPDATE tasks SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'queued' END,
+                       error = ?, lease_owner = NULL, lease_expires = NULL
+                   WHERE id = ? AND status = 'leased' AND lease_owner = ?""",
+                [(self.max_attempts, error, task_id, worker) for task_id in task_ids])
+
+        return
+
+    def counts(self):
+        """
+        ### Summary:
+            This will count the rows in the queue by their status.
+
+        ### Args:
+            None.
+
+        ### Returns:
+            dict: The number of rows for each status.
+        """
+
+        with self.lock:
+            counts = dict(self.connection.execute("SELECT status, COUNT(*) FROM tasks GROUP BY status").fetchall())
+
+        return {status: counts.get(status, 0) for status in ("queued", "leased", "done", "failed")}
+
+
+def enqueue_sites(queue: WorkQueue,
+                  site_folders: list):
+    """
+    ### Summary:
+        This function will add the rows in the pages.xlsx file of each site
+        folder to the queue, as a new batch. The rows for each site are
+        reordered so that the hosts take it in turns.
+
+    ### Args:
+        queue (WorkQueue):
+            The queue to add the rows to.
+        site_folders (list):
+            A list of the full paths for the site folders.
+
+    ### Returns:
+        dict: The number of rows that were added for each site.
+    """
+
+    # -- Initialise logging:
+    log = get_logger(__name__, "enqueue_sites")
+
+    batch = datetime.now().isoformat(timespec = "seconds")
+    added = {}
+
+    for site_folder in site_folders:
+        site_name = replace_chars(text_to_check = Path(site_folder).name)
+
+        try:
+            rows = load_page_rows(site_folder = site_folder,
+                                  site_name = site_name)
+        except (FileNotFoundError, IOError) as e:
+            log.error(f"Could not find pages.xlsx file in {site_folder}. Skipping site.")
+            print(f"Error: Could not find pages.xlsx file in {site_folder}. Skipping site.")
+            continue
+
+        added[site_name] = queue.enqueue(site_dir = Path(site_folder).name,
+                                         site_name = site_name,
+                                         rows = rows,
+                                         batch = batch)
+        log.info(f"Added {added[site_name]} row(s) for {site_name} to the work queue in batch {batch}.")
+
+    return added
+
+
+def merge_site_summaries(site_summaries: list):
+    """
+    ### Summary:
+        This function will merge the summaries from run_site for the same
+        site into one, as a worker runs a site once for each batch of rows it
+        leases and several workers can run the same site. The counts, seconds
+        and metrics are added up. A site is crashed if any of its summaries
+        are, otherwise completed if any of them are, otherwise skipped.
+
+    ### Args:
+        site_summaries (list):
+            The summaries from run_site.
+
+    ### Returns:
+        list: One summary for each site, in the order the sites were first
+        seen.
+    """
+
+    merged = {}
+    site_metrics = MetricsRecorder()
+
+    for site_summary in site_summaries:
+        site_name = site_summary["site_name"]
+        site_metrics.merge(site_name = site_name,
+                           site_metrics = site_summary.get("metrics", {}))
+
+        if site_name not in merged:
+            merged[site_name] = {**site_summary, "errors": [site_summary["error"]] if site_summary.get("error") else []}
+            continue
+
+        summary = merged[site_name]
+
+        for key in ("rows", "succeeded", "failed", "unchanged", "resumed", "seconds"):
+            summary[key] = summary.get(key, 0) + site_summary.get(key, 0)
+
+        if "crashed" in (summary["status"], site_summary["status"]):
+            summary["status"] = "crashed"
+        elif "completed" in (summary["status"], site_summary["status"]):
+            summary["status"] = "completed"
+
+        if site_summary.get("error") and site_summary["error"] not in summary["errors"]:
+            summary["errors"].append(site_summary["error"])
+
+    for site_name, summary in merged.items():
+        summary["seconds"] = round(summary["seconds"], 3)
+        summary["error"] = "; ".join(summary.pop("errors")) or None
+        summary["metrics"] = site_metrics.take(site_name = site_name)
+
+    return list(merged.values())
+
+
+def run_worker(queue_file: str = WORK_QUEUE_FILE,
+               sites_dir: str = ALL_SITES_DIR,
+               visibility_timeout: float = WORK_QUEUE_VISIBILITY_TIMEOUT,
+               poll_seconds: float = WORK_QUEUE_POLL_SECONDS,
+               **processor_settings):
+    """
+    ### Summary:
+        This function will lease rows from the work queue and process them
+        until there are none left. The rows are leased one site at a time and
+        only as the processor needs them, so that leases don't expire while
+        the rows are waiting. Each row is acked once it is done. While a site
+        is being processed, the leases on its rows that haven't been acked are
+        renewed a few times per visibility timeout. If the site crashes, the
+        rows that were leased but not done are handed back.
+
+        While other workers still have rows leased, the worker waits in case
+        their leases expire and the rows need to be done again.
+
+    ### Args:
+        queue_file (str, optional):
+            The path to the work queue database. Defaults to WORK_QUEUE_FILE.
+        sites_dir (str, optional):
+            The folder that holds the site folders. Defaults to ALL_SITES_DIR.
+        visibility_timeout (float, optional):
+            The number of seconds until a lease expires.
+            Defaults to WORK_QUEUE_VISIBILITY_TIMEOUT.
+        poll_seconds (float, optional):
+            The number of seconds to wait before checking for rows again.
+            Defaults to WORK_QUEUE_POLL_SECONDS.
+        **processor_settings:
+            The other arguments to pass to the processor function, such as
+            allowed_http_responses and browser_headers.
+
+    ### Returns:
+        list: The summary for each site the worker processed, with the
+        summaries from run_site for each batch of rows merged (see
+        merge_site_summaries).
+    """
+
+    worker = worker_name()
+
+    # -- Initialise logging:
+    log = get_logger(__name__, "run_worker", worker)
+
+    queue = WorkQueue(db_path = queue_file)
+    batch_size = max(1, processor_settings.get("fetch_workers", 1))
+    site_summaries = []
+
+    log.info(f"Worker {worker} started, using the work queue {queue_file}.")
+
+    try:
+        while True:
+            first_tasks = queue.lease(worker = worker,
+                                      limit = batch_size,
+                                      visibility_timeout = visibility_timeout)
+
+            if first_tasks == []:
+                counts = queue.counts()
+
+                if counts["queued"] == 0 and counts["leased"] == 0:
+                    break
+
+                time.sleep(poll_seconds)
+                continue
+
+            site_name = first_tasks[0]["site_name"]
+            site_dir = first_tasks[0]["site_dir"]
+            # -- The rows that have been leased but not acked, keyed by the id
+            # -- of the row object that is passed to the processor:
+            outstanding = {}
+            outstanding_lock = Lock()
+
+            def hold_rows(tasks: list):
+                with outstanding_lock:
+                    for task in tasks:
+                        outstanding[id(task["row"])] = (task["id"], task["row"])
+
+            def leased_rows(tasks: list):
+                # -- Yield the rows for the site, leasing more as they are
+                # -- needed:
+                while tasks != []:
+                    for task in tasks:
+                        yield task["row"]
+
+                    tasks = queue.lease(worker = worker,
+                                        limit = batch_size,
+                                        site_name = site_name,
+                                        visibility_timeout = visibility_timeout)
+                    hold_rows(tasks = tasks)
+
+            # -- The first rows are held before the site starts, so that they
+            # -- are handed back if it stops before it asks for any rows (e.g.
+            # -- its processor.py can't be loaded):
+            hold_rows(tasks = first_tasks)
+
+            def row_done(row: tuple,
+                         status: str):
+                with outstanding_lock:
+                    task_id, _ = outstanding.pop(id(row))
+
+                queue.ack(task_id = task_id,
+                          worker = worker,
+                          status = "failed" if status == "failed" else "done",
+                          error = "The page could not be scraped." if status == "failed" else None)
+
+            def renew_leases(stopped: Event):
+                # -- Extend the leases on the rows that haven't been acked
+                # -- yet, a few times per visibility timeout, so that a slow
+                # -- batch isn't leased to another worker part way through:
+                while stopped.wait(timeout = visibility_timeout / 3) == False:
+                    with outstanding_lock:
+                        task_ids = [task_id for task_id, _ in outstanding.values()]
+
+                    if task_ids != []:
+                        try:
+                            queue.renew(task_ids = task_ids,
+                                        worker = worker,
+                                        visibility_timeout = visibility_timeout)
+                        except sqlite3.Error as e:
+                            log.error(f"Unable to renew the leases for {site_name}: {e!r}.")
+
+            heartbeat_stopped = Event()
+            heartbeat = Thread(target = renew_leases,
+                               args = (heartbeat_stopped,),
+                               name = f"lease-heartbeat-{site_name}",
+                               daemon = True)
+            heartbeat.start()
+
+            log.info(f"Processing rows for {site_name} from the work queue.")
+
+            try:
+                site_summary = run_site(site_folder = f"{Path(sites_dir)}/{site_dir}",
+                                        rows = leased_rows(tasks = first_tasks),
+                                        row_callback = row_done,
+                                        export_file_tag = worker,
+                                        **processor_settings)
+            finally:
+                heartbeat_stopped.set()
+                heartbeat.join()
+
+            site_summaries.append(site_summary)
+
+            if outstanding != {}:
+                log.warning(f"Handing {len(outstanding)} row(s) for {site_name} back to the work queue.")
+                queue.release(task_ids = [task_id for task_id, _ in outstanding.values()],
+                              worker = worker,
+                              error = site_summary["error"] or f"The site finished with the status {site_summary['status']}.")
+    finally:
+        queue.close()
+
+    log.info(f"Worker {worker} finished. There are no rows left in the work queue.")
+
+    return merge_site_summaries(site_summaries = site_summaries)
@@ -1,14 +1,11 @@
 # -- Import required libraries / modules:
 from pathlib import Path
 
-import inspect
-import logging
-import os
-import pandas as pd
+from modules.log_setup import get_logger
 
 
 def process_soup(soup: str, 
-                 row_details: pd.DataFrame, 
+                 row_details: tuple, 
                  site_name: str,
                  site_output_folder: str):
     """
@@ -19,8 +16,9 @@ def process_soup(soup: str,
     ### Args:
         soup (str): 
             A beautiful soup object that needs to be processed.
-        row_details (dataframe): 
-            The row that the page is on. Mainly used for the html id and class tags.
+        row_details (PageRow): 
+            The row that the page is on, as a named tuple with a field for each
+            column in pages.xlsx. Mainly used for the html id and class tags.
         site_name (str):
             The name of the folder that the site is named after.
         site_output_folder (str): 
@@ -30,7 +28,7 @@ def process_soup(soup: str,
     """
    
     # -- Initialise logging:
-    log = logging.getLogger(f"{os.getenv('SCRAPER_APP_NAME')}.sites.{site_name}.{__name__}.{inspect.stack()[0][3]}.{row_details.nickname}")
+    log = get_logger("sites", site_name, __name__, "process_soup", row_details.nickname)
    
     # ==================================================================== #
     # -- Place your code below to process the page into whatever format(s)
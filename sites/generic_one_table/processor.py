@@ -2,16 +2,37 @@
 from datetime import datetime
 from pathlib import Path
 
-from modules.export_files import export_to_excel
+from modules.export_files import dataset_folder, export_to_excel, export_to_feather, export_to_parquet, export_to_sqlite, results_db_file
+from modules.export_sink import get_export_buffer
+from modules.log_setup import get_logger
+from modules.tables import table_records, table_to_dataframe
 
-import inspect
-import logging
-import os
 import pandas as pd
 
 
+# -- The format to save each table in. Either:
+# -- - xlsx: A new Excel file for each page, in a folder for the day.
+# -- - parquet / feather: Added to a dataset that is partitioned by site and
+# --   day, which can be read back in one go with 
+# --   modules.export_files.read_dataset. Needs the pyarrow package.
+# -- - buffer: Pushed into the export buffer for the site, which writes the
+# --   tables for every page to one file for the run. The format of the file
+# --   is set by export_buffer_format in the site's settings.xlsx.
+# -- - stream: The same as buffer, but the rows of the table are yielded to
+# --   the export buffer one at a time rather than being built into a 
+# --   dataframe first, which uses less memory for very big tables. The values
+# --   are saved as text.
+# -- - sqlite: Stored in the results database (output/results.sqlite), where
+# --   only the rows that have changed since the last run are written.
+EXPORT_FORMAT = "xlsx"
+
+# -- The columns that identify a row of the table when saving to sqlite. If
+# -- empty, the position of the row in the table is used:
+SQLITE_KEY_COLUMNS = []
+
+
 def process_soup(soup: str, 
-                 row_details: pd.DataFrame,
+                 row_details: tuple,
                  site_name: str, 
                  site_output_folder: str):
     """
@@ -22,18 +43,20 @@ def process_soup(soup: str,
     ### Args:
         soup (str): 
             A beautiful soup object that needs to be processed.
-        row_details (dataframe): 
-            The row that the page is on. Mainly used for the html id and class tags.
+        row_details (PageRow): 
+            The row that the page is on, as a named tuple with a field for each
+            column in pages.xlsx. Mainly used for the html id and class tags.
         site_name (str):
             The name of the folder that the site is named after.
         site_output_folder (str): 
             The path to the output folder for the site.
     ### Returns:
-        None
+        None, or a generator of the rows of the table (as dicts) for the
+        stream EXPORT_FORMAT.
     """
     
     # -- Initialise logging:
-    log = logging.getLogger(f"{os.getenv('SCRAPER_APP_NAME')}.sites.{site_name}.{__name__}.{inspect.stack()[0][3]}.{row_details.nickname}")
+    log = get_logger("sites", site_name, __name__, "process_soup", row_details.nickname)
     
     # ==================================================================== #
     # -- Place your code below to process the page into whatever format(s)
@@ -63,39 +86,55 @@ def process_soup(soup: str,
         print(f"Nothing to do for {row_details.nickname} as no id and / or class tags have been supplied.")
         return
     else:
-        column_names = []
-        table_data = []
-
         table = soup.find("table", attrs = table_attributes)
         
-        log.info(f"Processing table data from scraped HTML.")
-        # -- Look for rows in the HTML table:
-        for item in table.find_all('tr'):
-            
-            # -- Get the column headers:
-            for cell in item.find_all('th'):
-                column_names.append(cell.text)
-            
-            # -- Get the data from the rows:
-            row_data = []
-            
-            for cell in item.find_all('td'):
-                row_data.append(cell.text)
-                    
-            table_data.append(row_data)        
-
-        log.info(f"Completed processing table data from scraped HTML.")
+        if table == None:
+            log.error(f"No table with {table_attributes} could be found for {row_details.nickname}.")
+            print(f"No table with {table_attributes} could be found for {row_details.nickname}.")
+            return
         
-        # -- Check and remove any blank lists from the table_data list:
-        log.info(f"Checking for empty rows and removing them.")
-        for index, item in enumerate(table_data):
-            if item == []:
-                table_data.pop(index)
+        # -- Hand the rows of the table to the export buffer for the run as
+        # -- they are read:
+        if EXPORT_FORMAT == "stream":
+            log.info(f"Streaming the rows of the scraped table to the export buffer.")
+            return table_records(table = table)
         
-        # -- Create a dataframe from the column_names and table_data lists:
+        # -- Create a dataframe from the table. Header rows become the column
+        # -- names and empty rows are skipped:
         log.info(f"Creating pandas dataframe from scraped table.")
-        df = pd.DataFrame(table_data, 
-                          columns = column_names)
+        df = table_to_dataframe(table = table)
+        
+        # -- Add the df to the file for the run:
+        if EXPORT_FORMAT == "buffer":
+            get_export_buffer(site_name = site_name).push(df = df, 
+                                                          nickname = row_details.nickname)
+            return
+        
+        # -- Store the df in the results database:
+        if EXPORT_FORMAT == "sqlite":
+            export_to_sqlite(df = df,
+                             db_path = results_db_file(site_output_folder = site_output_folder),
+                             nickname = row_details.nickname,
+                             site_name = site_name,
+                             key_columns = SQLITE_KEY_COLUMNS)
+            return
+        
+        # -- Add the df to a dataset:
+        if EXPORT_FORMAT == "parquet":
+            export_to_parquet(df = df,
+                              dataset_dir = dataset_folder(site_output_folder = site_output_folder, 
+                                                           file_format = "parquet"),
+                              nickname = row_details.nickname,
+                              site_name = site_name)
+            return
+        
+        if EXPORT_FORMAT == "feather":
+            export_to_feather(df = df,
+                              dataset_dir = dataset_folder(site_output_folder = site_output_folder, 
+                                                           file_format = "feather"),
+                              nickname = row_details.nickname,
+                              site_name = site_name)
+            return
         
         # -- Create the output folder(s) as needed and then save the df to an
         # -- Excel file:
@@ -0,0 +1,7 @@
+# -- Keep the logs, output and cache that the tests make out of the repo. This
+# -- has to be set before modules.config is imported:
+import os
+import tempfile
+
+os.environ.setdefault("SCRAPER_DATA_DIR", tempfile.mkdtemp(prefix = "scraper-tests-"))
+os.environ.setdefault("TODAYS_LOGS_DIR", os.environ["SCRAPER_DATA_DIR"])
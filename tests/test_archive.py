@@ -0,0 +1,139 @@
+# -- Import required libraries / modules:
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from threading import Thread
+
+from modules.archive import ArchiveReader, ArchiveWriter, archive_file, archive_files, index_file
+from modules.scraper import url_scraper
+
+import gzip
+import os
+import unittest
+
+
+PAGE = "<html><body><p id='price'>£10.00</p></body></html>".encode("utf-8")
+
+
+class ArchiveTests(unittest.TestCase):
+    def setUp(self):
+        folder = TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        self.archive_dir = folder.name
+
+    def writer(self, archive_date: str, file_tag: str = None):
+        writer = ArchiveWriter(archive_path = archive_file(site_name = "site",
+                                                           archive_date = archive_date,
+                                                           file_tag = file_tag,
+                                                           archive_dir = self.archive_dir),
+                               site_name = "site")
+        self.addCleanup(writer.close)
+        return writer
+
+    def reader(self, archive_date: str):
+        reader = ArchiveReader(archive_paths = archive_files(site_name = "site",
+                                                             archive_date = archive_date,
+                                                             archive_dir = self.archive_dir),
+                               site_name = "site")
+        self.addCleanup(reader.close)
+        return reader
+
+    def test_responses_are_read_back_as_they_were_recorded(self):
+        writer = self.writer(archive_date = "2026-01-01")
+        writer.record(url = "http://a", nickname = "a", status_code = 200, reason = "OK",
+                      headers = {"Content-Type": "text/html; charset=utf-8", "Content-Encoding": "br", "Content-Length": "9"},
+                      body = PAGE, encoding = "utf-8")
+        writer.record(url = "http://b", nickname = "b", status_code = 200, reason = "OK",
+                      headers = {}, body = b"<p>\r\n\r\n</p>", truncated = True)
+        writer.close()
+
+        reader = self.reader(archive_date = "2026-01-01")
+        response = reader.read(url = "http://a")
+
+        self.assertEqual(len(reader), 2)
+        self.assertEqual((response["status_code"], response["body"], response["encoding"]), (200, PAGE, "utf-8"))
+
+        # -- The body was saved decompressed, so its encoding and length are not:
+        self.assertEqual(response["headers"], {"Content-Type": "text/html; charset=utf-8"})
+        self.assertEqual(reader.read(url = "http://b")["body"], b"<p>\r\n\r\n</p>")
+        self.assertTrue(reader.read(url = "http://b")["truncated"])
+        self.assertIsNone(reader.read(url = "http://c"))
+
+        # -- The whole archive can be read as one gzip stream of WARC records:
+        records = gzip.decompress(archive_file(site_name = "site", archive_date = "2026-01-01",
+                                               archive_dir = self.archive_dir).read_bytes())
+
+        self.assertEqual(records.count(b"WARC/1.1\r\nWARC-Type: response\r\n"), 2)
+        self.assertIn(b"WARC-Truncated: length", records)
+
+    def test_the_latest_record_for_a_url_is_used(self):
+        first = self.writer(archive_date = "2026-01-02")
+        first.record(url = "http://a", nickname = "a", status_code = 200, reason = "OK", headers = {}, body = b"old")
+        first.close()
+        archive_path = first.archive_path
+        os.utime(archive_path, (1, 1))
+
+        second = self.writer(archive_date = "2026-01-02", file_tag = "worker")
+        second.record(url = "http://a", nickname = "a", status_code = 200, reason = "OK", headers = {}, body = b"new")
+        second.close()
+
+        self.assertEqual(self.reader(archive_date = "2026-01-02").read(url = "http://a")["body"], b"new")
+
+    def test_a_record_that_was_only_partly_indexed_is_skipped(self):
+        writer = self.writer(archive_date = "2026-01-03")
+        writer.record(url = "http://a", nickname = "a", status_code = 200, reason = "OK", headers = {}, body = b"a")
+        writer.close()
+
+        with open(index_file(archive_path = writer.archive_path), "a", encoding = "utf-8") as file:
+            file.write('{"url": "http://b", "off')
+
+        reader = self.reader(archive_date = "2026-01-03")
+
+        self.assertEqual(len(reader), 1)
+        self.assertEqual(reader.read(url = "http://a")["body"], b"a")
+
+
+class PageHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(PAGE)))
+        self.end_headers()
+        self.wfile.write(PAGE)
+
+    def log_message(self, *args):
+        pass
+
+
+class RecordTests(unittest.TestCase):
+    def test_a_scraped_page_is_recorded(self):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), PageHandler)
+        Thread(target = server.serve_forever, daemon = True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        url = f"http://127.0.0.1:{server.server_address[1]}/page"
+
+        with TemporaryDirectory() as folder:
+            archive_path = Path(folder) / "site" / "2026-01-04.warc.gz"
+            writer = ArchiveWriter(archive_path = archive_path,
+                                   site_name = "tests")
+            soup = url_scraper(url = url,
+                               allowed_http_responses = frozenset({200}),
+                               headers = {},
+                               nickname = "recorded",
+                               site_name = "tests",
+                               timeout = (2, 2),
+                               archive = writer)
+            writer.close()
+
+            reader = ArchiveReader(archive_paths = [archive_path],
+                                   site_name = "tests")
+            response = reader.read(url = url)
+            reader.close()
+
+        self.assertEqual(soup.find("p", attrs = {"id": "price"}).text, "£10.00")
+        self.assertEqual((response["status_code"], response["body"], response["encoding"]), (200, PAGE, "utf-8"))
+
+
+if __name__ == "__main__":
+    unittest.main()
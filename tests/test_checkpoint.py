@@ -0,0 +1,97 @@
+# -- Import required libraries / modules:
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from modules.checkpoint import CheckpointJournal, checkpoint_file, clear_checkpoints, finish_checkpoints
+
+import unittest
+
+
+class CheckpointJournalTests(unittest.TestCase):
+    def setUp(self):
+        folder = TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        self.checkpoint_dir = folder.name
+        self.journal_file = checkpoint_file(site_name = "site",
+                                            checkpoint_dir = self.checkpoint_dir)
+
+    def journal(self, resume: bool):
+        journal = CheckpointJournal(journal_file = self.journal_file,
+                                    site_name = "site",
+                                    resume = resume)
+        self.addCleanup(journal.close)
+        return journal
+
+    def test_resume_skips_the_rows_that_were_done(self):
+        journal = self.journal(resume = False)
+        journal.record(nickname = "a", url = "http://a", status = "succeeded")
+        journal.record(nickname = "b", url = "http://b", status = "unchanged")
+        journal.record(nickname = "c", url = "http://c", status = "failed")
+        journal.close()
+
+        # -- A line that was only partly written when the program stopped:
+        with open(self.journal_file, "a", encoding = "utf-8") as file:
+            file.write('{"nickname": "d", "url": ')
+
+        journal = self.journal(resume = True)
+
+        self.assertTrue(journal.is_done(nickname = "a", url = "http://a"))
+        self.assertTrue(journal.is_done(nickname = "b", url = "http://b"))
+        self.assertFalse(journal.is_done(nickname = "c", url = "http://c"))
+        self.assertFalse(journal.is_done(nickname = "d", url = "http://d"))
+
+    def test_a_row_that_fails_after_it_was_done_is_done_again(self):
+        journal = self.journal(resume = False)
+        journal.record(nickname = "a", url = "http://a", status = "succeeded")
+        journal.record(nickname = "a", url = "http://a", status = "failed")
+        journal.close()
+
+        self.assertFalse(self.journal(resume = True).is_done(nickname = "a", url = "http://a"))
+
+    def test_a_run_that_is_not_resumed_starts_again(self):
+        journal = self.journal(resume = False)
+        journal.record(nickname = "a", url = "http://a", status = "succeeded")
+        journal.close()
+
+        self.assertFalse(self.journal(resume = False).is_done(nickname = "a", url = "http://a"))
+
+
+class FinishCheckpointsTests(unittest.TestCase):
+    def setUp(self):
+        folder = TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        self.checkpoint_dir = folder.name
+
+        for site_name in ("one", "two"):
+            journal = CheckpointJournal(journal_file = checkpoint_file(site_name = site_name,
+                                                                       checkpoint_dir = self.checkpoint_dir),
+                                        site_name = site_name)
+            journal.record(nickname = "a", url = "http://a", status = "succeeded")
+            journal.close()
+
+    def journal_names(self):
+        return sorted(journal_file.stem for journal_file in Path(self.checkpoint_dir).glob("*.jsonl"))
+
+    def test_every_journal_is_kept_if_a_site_crashed(self):
+        removed = finish_checkpoints(site_summaries = [{"site_name": "one", "status": "completed"},
+                                                       {"site_name": "two", "status": "crashed"}],
+                                     checkpoint_dir = self.checkpoint_dir)
+
+        self.assertFalse(removed)
+        self.assertEqual(self.journal_names(), ["one", "two"])
+
+        # -- The next run that is not resumed removes them:
+        self.assertEqual(clear_checkpoints(checkpoint_dir = self.checkpoint_dir), 2)
+        self.assertEqual(self.journal_names(), [])
+
+    def test_journals_are_removed_if_no_site_crashed(self):
+        removed = finish_checkpoints(site_summaries = [{"site_name": "one", "status": "completed"},
+                                                       {"site_name": "two", "status": "skipped"}],
+                                     checkpoint_dir = self.checkpoint_dir)
+
+        self.assertTrue(removed)
+        self.assertEqual(self.journal_names(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
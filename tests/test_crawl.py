@@ -0,0 +1,136 @@
+# -- Import required libraries / modules:
+from collections import namedtuple
+from tempfile import TemporaryDirectory
+
+from modules.crawl import ROWS_PENDING, BloomFilter, CrawlFrontier, crawl_file, extract_links, normalize_url
+
+import unittest
+
+
+PageRow = namedtuple("PageRow", ["nickname", "url", "browser_to_use"])
+
+
+class NormalizeUrlTests(unittest.TestCase):
+    def test_urls_are_put_in_one_form(self):
+        self.assertEqual(normalize_url(url = " HTTP://Example.COM:80#top "), "http://example.com/")
+        self.assertEqual(normalize_url(url = "../b?x=1#frag", base_url = "https://example.com/a/c"),
+                         "https://example.com/b?x=1")
+        self.assertEqual(normalize_url(url = "https://example.com:8443/a"), "https://example.com:8443/a")
+
+    def test_links_that_are_not_http_are_skipped(self):
+        self.assertIsNone(normalize_url(url = "mailto:someone@example.com"))
+        self.assertIsNone(normalize_url(url = "javascript:void(0)"))
+        self.assertIsNone(normalize_url(url = "http://example.com:bad/"))
+
+    def test_links_are_found_once_and_files_are_skipped(self):
+        markup = """<html><head><base href="https://example.com/shop/"></head><body>
+                    <a href="item?id=1">1</a><a href="item?id=1#reviews">1 again</a>
+                    <a href="/logo.PNG">logo</a><a href="mailto:a@example.com">mail</a>
+                    <a href="https://other.com/">other</a></body></html>"""
+
+        self.assertEqual(extract_links(markup = markup, base_url = "https://example.com/"),
+                         ["https://example.com/shop/item?id=1", "https://other.com/"])
+
+
+class BloomFilterTests(unittest.TestCase):
+    def test_added_strings_are_always_found(self):
+        seen = BloomFilter(capacity = 1000,
+                           error_rate = 0.01)
+        urls = [f"https://example.com/{number}" for number in range(1000)]
+
+        self.assertTrue(all(seen.add(url) for url in urls[:10]))
+        self.assertFalse(seen.add(urls[0]))
+
+        for url in urls:
+            seen.add(url)
+
+        self.assertTrue(all(url in seen for url in urls))
+
+        # -- Strings that were never added are only rarely said to have been:
+        false_positives = sum(f"https://other.com/{number}" in seen for number in range(10000))
+        self.assertLess(false_positives, 300)
+
+
+class CrawlFrontierTests(unittest.TestCase):
+    def setUp(self):
+        folder = TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        self.db_path = crawl_file(site_name = "site",
+                                  crawl_dir = folder.name)
+
+    def frontier(self, **settings):
+        frontier = CrawlFrontier(db_path = self.db_path,
+                                 site_name = "site",
+                                 allowed_hosts = {"example.com"},
+                                 **settings)
+        self.addCleanup(frontier.close)
+        return frontier
+
+    def test_pages_are_crawled_a_level_at_a_time_without_repeats(self):
+        frontier = self.frontier(max_depth = 1)
+        frontier.seed_rows(rows = [PageRow("home", "https://example.com/", "chrome")])
+        rows = frontier.rows()
+
+        home = next(rows)
+        self.assertEqual((home.nickname, home.crawl_depth, home.browser_to_use), ("home", 0, "chrome"))
+
+        # -- The page is still being processed, so more links may be found:
+        self.assertIs(next(rows), ROWS_PENDING)
+
+        added = frontier.add_links(row = home,
+                                   links = ["https://example.com/a", "https://example.com/a",
+                                            "https://example.com/", "https://other.com/b"])
+        frontier.finish(row = home, status = "succeeded")
+
+        self.assertEqual(added, 1)
+
+        page = next(rows)
+        self.assertEqual((page.url, page.crawl_depth, page.browser_to_use), ("https://example.com/a", 1, "chrome"))
+
+        # -- Pages at the most depth don't have their links followed:
+        self.assertEqual(frontier.add_links(row = page, links = ["https://example.com/c"]), 0)
+        self.assertIsNone(frontier.link_finder(row = page))
+
+        frontier.finish(row = page, status = "failed")
+
+        self.assertEqual(list(rows), [])
+        self.assertEqual(frontier.counts(), {"queued": 0, "leased": 0, "done": 1, "failed": 1})
+
+    def test_max_pages_stops_the_crawl(self):
+        frontier = self.frontier(max_pages = 2)
+        frontier.seed_rows(rows = [PageRow("home", "https://example.com/", "chrome")])
+
+        # -- The sitemap URLs take their columns from the first row:
+        self.assertEqual(frontier.seed_urls(urls = [f"https://example.com/{number}" for number in range(5)] + 
+                                                   ["https://other.com/"]), 5)
+
+        rows = [row for row in frontier.rows() if row is not ROWS_PENDING]
+
+        self.assertEqual([row.browser_to_use for row in rows], ["chrome", "chrome"])
+        self.assertEqual(frontier.counts()["queued"], 4)
+
+    def test_resume_carries_on_with_the_pages_that_were_not_done(self):
+        frontier = self.frontier()
+        frontier.seed_rows(rows = [PageRow("home", "https://example.com/", "chrome")])
+        home = next(frontier.rows())
+        frontier.add_links(row = home, links = ["https://example.com/a", "https://example.com/b"])
+        frontier.finish(row = home, status = "succeeded")
+        next(frontier.rows())
+        frontier.close()
+
+        # -- The page that was leased when the crawl stopped is queued again
+        # -- and the pages that were found are still seen:
+        frontier = self.frontier(resume = True)
+
+        self.assertEqual(frontier.counts(), {"queued": 2, "leased": 0, "done": 1, "failed": 0})
+        self.assertEqual(frontier.resumed, 1)
+        self.assertIn("https://example.com/a", frontier.seen)
+
+        # -- A crawl that is not resumed starts again:
+        frontier.close()
+
+        self.assertEqual(self.frontier().counts(), {"queued": 0, "leased": 0, "done": 0, "failed": 0})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+# -- Import required libraries / modules:
+from importlib import util
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from modules.export_files import compact_dataset_parts, export_to_feather, export_to_parquet, read_dataset
+
+import pandas as pd
+import unittest
+
+
+@unittest.skipIf(util.find_spec("pyarrow") == None, "pyarrow is not installed")
+class DatasetTests(unittest.TestCase):
+    def setUp(self):
+        folder = TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        self.dataset_dir = folder.name
+
+    def dataset_files(self, file_format: str, dataset_dir: str = None):
+        return sorted(Path(dataset_dir or self.dataset_dir).rglob(f"*.{file_format}"))
+
+    def test_columns_whose_type_changes_are_read_as_strings(self):
+        export_to_parquet(df = pd.DataFrame({"price": [1, 2]}),
+                          dataset_dir = self.dataset_dir,
+                          nickname = "a",
+                          site_name = "types")
+        export_to_parquet(df = pd.DataFrame({"price": ["n/a"], "stock": [5]}),
+                          dataset_dir = self.dataset_dir,
+                          nickname = "b",
+                          site_name = "types")
+
+        df = read_dataset(dataset_dir = self.dataset_dir).sort_values("nickname")
+
+        self.assertEqual(df["price"].tolist(), ["1", "2", "n/a"])
+        self.assertEqual(df["stock"].isna().tolist(), [True, True, False])
+        self.assertEqual(set(df["site"]), {"types"})
+
+    def test_files_for_a_run_are_combined(self):
+        for file_format, export in (("parquet", export_to_parquet), ("feather", export_to_feather)):
+            with self.subTest(file_format = file_format):
+                dataset_dir = f"{self.dataset_dir}/{file_format}"
+                export(df = pd.DataFrame({"price": [1]}),
+                       dataset_dir = dataset_dir,
+                       nickname = "a",
+                       site_name = file_format)
+                export(df = pd.DataFrame({"price": ["x"], "stock": [5]}),
+                       dataset_dir = dataset_dir,
+                       nickname = "b",
+                       site_name = file_format)
+
+                self.assertEqual(len(self.dataset_files(file_format = file_format, dataset_dir = dataset_dir)), 2)
+
+                combined_files = compact_dataset_parts(site_name = file_format)
+
+                self.assertEqual(self.dataset_files(file_format = file_format, dataset_dir = dataset_dir), combined_files)
+                self.assertTrue(combined_files[0].name.startswith("run-"))
+
+                df = read_dataset(dataset_dir = dataset_dir,
+                                  file_format = file_format).sort_values("nickname")
+
+                self.assertEqual(df["price"].tolist(), ["1", "x"])
+                self.assertEqual(df["stock"].isna().tolist(), [True, False])
+
+                # -- There is nothing left to combine for the site:
+                self.assertEqual(compact_dataset_parts(site_name = file_format), [])
+
+    def test_a_single_file_is_left_as_it_is(self):
+        export_to_parquet(df = pd.DataFrame({"price": [1]}),
+                          dataset_dir = self.dataset_dir,
+                          nickname = "a",
+                          site_name = "site")
+        files = self.dataset_files(file_format = "parquet")
+
+        self.assertEqual(compact_dataset_parts(site_name = "site"), [])
+        self.assertEqual(self.dataset_files(file_format = "parquet"), files)
+
+
+if __name__ == "__main__":
+    unittest.main()
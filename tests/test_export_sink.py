@@ -0,0 +1,91 @@
+# -- Import required libraries / modules:
+from importlib import util
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+from modules.export_sink import ExportBuffer
+
+import pandas as pd
+import unittest
+
+
+class ExportBufferTests(unittest.TestCase):
+    def setUp(self):
+        folder = TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        self.folder = folder.name
+
+    def buffer(self, **settings):
+        return ExportBuffer(site_name = "site",
+                            site_output_folder = self.folder,
+                            **settings)
+
+    def test_rows_are_held_until_the_buffer_is_full(self):
+        export_buffer = self.buffer(max_rows = 3)
+        export_buffer.push(df = pd.DataFrame({"price": [1, 2]}), nickname = "a")
+
+        self.assertEqual(export_buffer.files, [])
+
+        export_buffer.push(df = pd.DataFrame({"price": [3]}), nickname = "b")
+
+        self.assertEqual(len(export_buffer.files), 1)
+        self.assertEqual(pd.read_csv(export_buffer.files[0])["price"].tolist(), [1, 2, 3])
+        self.assertEqual((export_buffer.rows, export_buffer.bytes), (0, 0))
+
+    def test_close_flushes_the_rest_and_can_be_called_again(self):
+        export_buffer = self.buffer()
+        export_buffer.push(df = pd.DataFrame({"price": [1]}), nickname = "a")
+
+        files = export_buffer.close()
+
+        self.assertEqual(pd.read_csv(files[0])[["price", "nickname"]].values.tolist(), [[1, "a"]])
+        self.assertEqual(export_buffer.close(), files)
+
+        with self.assertRaises(ValueError):
+            export_buffer.push(df = pd.DataFrame({"price": [2]}), nickname = "b")
+
+    def test_new_columns_start_a_new_part_file(self):
+        export_buffer = self.buffer(max_rows = 1)
+        export_buffer.push(df = pd.DataFrame({"price": [1]}), nickname = "a")
+        export_buffer.push(df = pd.DataFrame({"price": [2], "stock": [5]}), nickname = "b")
+        files = export_buffer.close()
+
+        self.assertEqual(len(files), 2)
+        self.assertTrue(files[1].name.endswith("-part2.csv"))
+        self.assertEqual(pd.read_csv(files[1])["stock"].tolist(), [5])
+
+    def test_rows_that_fail_to_write_are_kept(self):
+        export_buffer = self.buffer(max_rows = 10)
+        export_buffer.push(df = pd.DataFrame({"price": [1]}), nickname = "a")
+        export_buffer.push(df = pd.DataFrame({"price": [2]}), nickname = "b")
+        write = export_buffer._write
+
+        with mock.patch.object(export_buffer, "_write", side_effect = [None, OSError("disk full")]):
+            with self.assertRaises(OSError):
+                export_buffer.flush()
+
+        # -- The first dataframe was written, the second is still held:
+        self.assertEqual(export_buffer.rows, 1)
+        self.assertEqual(export_buffer.frames[0][0]["nickname"].tolist(), ["b"])
+
+        export_buffer._write = write
+        files = export_buffer.close()
+
+        self.assertEqual(pd.read_csv(files[0])["nickname"].tolist(), ["b"])
+
+    @unittest.skipIf(util.find_spec("pyarrow") == None, "pyarrow is not installed")
+    def test_parquet_column_types_that_change_start_a_new_part_file(self):
+        export_buffer = self.buffer(file_format = "parquet",
+                                    max_rows = 1)
+        export_buffer.push(df = pd.DataFrame({"price": [1, 2]}), nickname = "a")
+        export_buffer.push(df = pd.DataFrame({"price": ["n/a", "3"]}), nickname = "b")
+        export_buffer.push(df = pd.DataFrame({"price": ["4"]}), nickname = "c")
+        files = export_buffer.close()
+
+        self.assertEqual(len(files), 2)
+        self.assertEqual(pd.read_parquet(files[0])["price"].tolist(), [1, 2])
+        self.assertEqual(pd.read_parquet(files[1])["price"].tolist(), ["n/a", "3", "4"])
+
+
+if __name__ == "__main__":
+    unittest.main()
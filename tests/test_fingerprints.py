@@ -0,0 +1,85 @@
+# -- Import required libraries / modules:
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from bs4 import BeautifulSoup
+
+from modules.fingerprints import FingerprintIndex, content_hash, normalize_html, soup_fingerprint
+
+import unittest
+
+
+class NormalizeHtmlTests(unittest.TestCase):
+    def test_scripts_comments_and_whitespace_do_not_change_the_hash(self):
+        first = "<html><script>var token = 1;</script><body>\n  <p>Price</p><!-- built at 10:00 --></body></html>"
+        second = "<html><SCRIPT type='x'>var token = 2;</SCRIPT><body>\n\n<p>Price</p><style>p {}</style></body></html>"
+
+        self.assertEqual(normalize_html(markup = first), "<html><body> <p>Price</p></body></html>")
+        self.assertEqual(content_hash(content = normalize_html(markup = first)),
+                         content_hash(content = normalize_html(markup = second)))
+        self.assertNotEqual(content_hash(content = "<p>Price</p>"), content_hash(content = "<p>Prices</p>"))
+
+    def test_the_region_hash_only_covers_the_parsed_part(self):
+        first = BeautifulSoup("<div id='price'>10.00</div><div id='advert'>a</div>", "html.parser")
+        second = BeautifulSoup("<div id='price'>10.00</div><div id='advert'>b</div>", "html.parser")
+
+        self.assertEqual(soup_fingerprint(soup = first.find(id = "price")),
+                         soup_fingerprint(soup = second.find(id = "price")))
+
+
+class FingerprintIndexTests(unittest.TestCase):
+    def setUp(self):
+        folder = TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        self.index = FingerprintIndex(db_path = Path(folder.name) / "fingerprints.sqlite")
+        self.addCleanup(self.index.connection.close)
+
+    def check(self, site_name: str = "site", fingerprint: str = "one", mode: str = "html"):
+        return self.index.check(url = "http://a",
+                                site_name = site_name,
+                                nickname = "a",
+                                mode = mode,
+                                fingerprint = fingerprint)
+
+    def skip_count(self, site_name: str = "site"):
+        return self.index.connection.execute("SELECT skip_count FROM fingerprints WHERE site = ? AND url = ?",
+                                             (site_name, "http://a")).fetchone()[0]
+
+    def test_a_page_is_only_skipped_once_it_has_been_committed(self):
+        self.assertFalse(self.check())
+
+        # -- The page failed, so it wasn't committed and is processed again:
+        self.assertFalse(self.check())
+
+        self.index.commit(url = "http://a", site_name = "site")
+
+        self.assertTrue(self.check())
+        self.assertTrue(self.check())
+        self.assertEqual(self.skip_count(), 2)
+
+    def test_a_changed_page_is_processed_and_the_skips_start_again(self):
+        self.check()
+        self.index.commit(url = "http://a", site_name = "site")
+        self.check()
+
+        self.assertFalse(self.check(fingerprint = "two"))
+        self.assertFalse(self.check(mode = "region"))
+
+        self.index.commit(url = "http://a", site_name = "site")
+
+        self.assertEqual(self.skip_count(), 0)
+        self.assertTrue(self.check(mode = "region"))
+
+    def test_sites_that_share_a_url_are_kept_apart(self):
+        self.check(site_name = "one")
+        self.index.commit(url = "http://a", site_name = "one")
+        self.check(site_name = "two", fingerprint = "two")
+        self.index.commit(url = "http://a", site_name = "two")
+
+        self.assertTrue(self.check(site_name = "one"))
+        self.assertTrue(self.check(site_name = "two", fingerprint = "two"))
+        self.assertFalse(self.check(site_name = "one", fingerprint = "two"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+# -- Import required libraries / modules:
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from tempfile import TemporaryDirectory
+from threading import Thread
+
+from modules.http_cache import ResponseCache
+from modules.scraper import url_scraper
+
+import time
+import unittest
+
+
+PAGE = b"<html><body><p id='price'>10.00</p></body></html>"
+
+
+class ResponseCacheTests(unittest.TestCase):
+    def setUp(self):
+        folder = TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        self.cache_dir = folder.name
+
+    def test_pages_are_saved_with_their_validators(self):
+        cache = ResponseCache(cache_dir = self.cache_dir)
+        cache.store(url = "http://a", body = PAGE, etag = '"v1"', last_modified = None, encoding = "utf-8")
+
+        entry = cache.lookup(url = "http://a")
+
+        self.assertEqual(entry["body"], PAGE)
+        self.assertEqual(cache.conditional_headers(entry = entry), {"If-None-Match": '"v1"'})
+
+        # -- A new cache for the same folder reads the pages from disk:
+        self.assertEqual(ResponseCache(cache_dir = self.cache_dir).lookup(url = "http://a")["etag"], '"v1"')
+
+    def test_pages_without_validators_are_not_saved(self):
+        cache = ResponseCache(cache_dir = self.cache_dir)
+        cache.store(url = "http://a", body = PAGE, etag = None, last_modified = None, encoding = "utf-8")
+
+        self.assertIsNone(cache.lookup(url = "http://a"))
+
+    def test_the_least_recently_used_pages_are_removed(self):
+        cache = ResponseCache(cache_dir = self.cache_dir,
+                              max_bytes = 10)
+
+        for url in ("http://a", "http://b"):
+            cache.store(url = url, body = b"1234", etag = '"v1"', last_modified = None, encoding = "utf-8")
+            time.sleep(0.01)
+
+        cache.touch(url = "http://a")
+        cache.store(url = "http://c", body = b"1234", etag = '"v1"', last_modified = None, encoding = "utf-8")
+
+        self.assertIsNone(cache.lookup(url = "http://b"))
+        self.assertIsNotNone(cache.lookup(url = "http://a"))
+        self.assertIsNotNone(cache.lookup(url = "http://c"))
+        self.assertEqual(cache.total_bytes, 8)
+
+        # -- A page bigger than the whole cache is never saved:
+        cache.store(url = "http://d", body = b"x" * 11, etag = '"v1"', last_modified = None, encoding = "utf-8")
+
+        self.assertIsNone(cache.lookup(url = "http://d"))
+
+
+class ConditionalGetHandler(BaseHTTPRequestHandler):
+    # -- Sends the page with an ETag, or a 304 if the request has the ETag:
+    def do_GET(self):
+        self.server.requests.append(self.headers.get("If-None-Match"))
+
+        if self.headers.get("If-None-Match") == '"v1"':
+            self.send_response(304)
+            self.send_header("ETag", '"v1"')
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(PAGE)))
+        self.send_header("ETag", '"v1"')
+        self.end_headers()
+        self.wfile.write(PAGE)
+
+    def log_message(self, *args):
+        pass
+
+
+class ConditionalGetTests(unittest.TestCase):
+    def test_a_304_uses_the_page_from_the_cache(self):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), ConditionalGetHandler)
+        server.requests = []
+        Thread(target = server.serve_forever, daemon = True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+
+        with TemporaryDirectory() as folder:
+            cache = ResponseCache(cache_dir = folder)
+            url = f"http://127.0.0.1:{server.server_address[1]}/page"
+
+            for _ in range(2):
+                soup = url_scraper(url = url,
+                                   allowed_http_responses = frozenset({200}),
+                                   headers = {},
+                                   nickname = "cached",
+                                   site_name = "tests",
+                                   timeout = (2, 2),
+                                   response_cache = cache)
+
+                self.assertEqual(soup.find("p", attrs = {"id": "price"}).text, "10.00")
+
+            self.assertEqual(server.requests, [None, '"v1"'])
+
+
+if __name__ == "__main__":
+    unittest.main()
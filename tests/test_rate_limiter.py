@@ -0,0 +1,88 @@
+# -- Import required libraries / modules:
+from collections import namedtuple
+from email.utils import format_datetime
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+from modules.rate_limiter import HostScheduler, TokenBucket, interleave_by_host, parse_retry_after
+
+import unittest
+
+
+PageRow = namedtuple("PageRow", ["nickname", "url"])
+
+
+class TokenBucketTests(unittest.TestCase):
+    def test_requests_wait_once_the_burst_is_used(self):
+        with mock.patch("modules.rate_limiter.time.monotonic", return_value = 100.0):
+            bucket = TokenBucket(rate = 2.0,
+                                 burst = 2)
+            waits = [bucket.reserve() for _ in range(4)]
+
+        # -- Each request after the burst waits half a second more:
+        self.assertEqual(waits, [0.0, 0.0, 0.5, 1.0])
+
+    def test_the_bucket_is_topped_up_over_time(self):
+        with mock.patch("modules.rate_limiter.time.monotonic", side_effect = [100.0, 100.0, 100.0, 101.0]):
+            bucket = TokenBucket(rate = 1.0,
+                                 burst = 1)
+
+            self.assertEqual(bucket.reserve(), 0.0)
+            self.assertEqual(bucket.reserve(), 1.0)
+            self.assertEqual(bucket.reserve(), 1.0)
+
+    def test_a_pause_holds_back_requests_even_without_a_limit(self):
+        with mock.patch("modules.rate_limiter.time.monotonic", return_value = 100.0):
+            bucket = TokenBucket(rate = 0,
+                                 burst = 1)
+            bucket.pause(seconds = 5)
+            bucket.pause(seconds = 2)
+
+            self.assertEqual(bucket.reserve(), 5.0)
+
+
+class HostSchedulerTests(unittest.TestCase):
+    def test_each_host_has_its_own_bucket(self):
+        scheduler = HostScheduler(rate = 1.0,
+                                  burst = 1,
+                                  site_name = "tests")
+
+        with mock.patch("modules.rate_limiter.time.sleep") as sleep:
+            scheduler.wait(url = "http://a.com/1")
+            scheduler.wait(url = "http://B.com/1")
+            scheduler.wait(url = "http://a.com/2")
+
+        self.assertEqual(sleep.call_count, 1)
+        self.assertEqual(set(scheduler.buckets), {"a.com", "b.com"})
+
+    def test_retry_after_pauses_the_host(self):
+        scheduler = HostScheduler(rate = 0,
+                                  burst = 1,
+                                  site_name = "tests")
+
+        self.assertEqual(scheduler.retry_after(url = "http://a.com/1", value = "3"), 3.0)
+        self.assertIsNone(scheduler.retry_after(url = "http://a.com/1", value = "soon"))
+        self.assertGreater(scheduler.bucket(host = "a.com").reserve(), 2.0)
+        self.assertEqual(scheduler.bucket(host = "b.com").reserve(), 0.0)
+
+
+class RetryAfterTests(unittest.TestCase):
+    def test_seconds_and_dates_are_read(self):
+        retry_at = datetime.now(timezone.utc) + timedelta(seconds = 30)
+
+        self.assertEqual(parse_retry_after(value = "120"), 120.0)
+        self.assertEqual(parse_retry_after(value = "-5"), 0.0)
+        self.assertAlmostEqual(parse_retry_after(value = format_datetime(retry_at, usegmt = True)), 30, delta = 2)
+        self.assertIsNone(parse_retry_after(value = "soon"))
+
+
+class InterleaveByHostTests(unittest.TestCase):
+    def test_hosts_take_it_in_turns(self):
+        rows = [PageRow("a1", "http://a.com/1"), PageRow("a2", "http://a.com/2"),
+                PageRow("a3", "http://a.com/3"), PageRow("b1", "http://b.com/1")]
+
+        self.assertEqual([row.nickname for row in interleave_by_host(rows = rows)], ["a1", "b1", "a2", "a3"])
+
+
+if __name__ == "__main__":
+    unittest.main()
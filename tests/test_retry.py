@@ -0,0 +1,118 @@
+# -- Import required libraries / modules:
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from threading import Thread
+from unittest import mock
+
+from modules.retry import backoff_delay, retry_policy, write_dead_letter
+from modules.scraper import url_scraper
+
+import csv
+import unittest
+
+
+PAGE = b"<html><body><p id='price'>10.00</p></body></html>"
+
+# -- Retry quickly so that the tests don't wait for the backoff:
+FAST_RETRIES = {"503": {"max_attempts": 3, "base_delay": 0.0, "max_delay": 0.0},
+                "5xx": {"max_attempts": 2, "base_delay": 0.0, "max_delay": 0.0}}
+
+
+class RetryPolicyTests(unittest.TestCase):
+    def test_the_exact_status_code_is_used_before_its_class(self):
+        self.assertEqual(retry_policy(failure = 503, retry_policies = FAST_RETRIES)["max_attempts"], 3)
+        self.assertEqual(retry_policy(failure = 500, retry_policies = FAST_RETRIES)["max_attempts"], 2)
+        self.assertIsNone(retry_policy(failure = 404, retry_policies = FAST_RETRIES))
+        self.assertIsNone(retry_policy(failure = "connection", retry_policies = FAST_RETRIES))
+
+    def test_the_backoff_is_capped_and_jittered(self):
+        with mock.patch("modules.retry.random.uniform", side_effect = lambda low, high: high):
+            delays = [backoff_delay(attempt = attempt, base_delay = 1.0, max_delay = 5.0) for attempt in range(1, 6)]
+
+        self.assertEqual(delays, [1.0, 2.0, 4.0, 5.0, 5.0])
+        self.assertTrue(all(0 <= backoff_delay(attempt = 3, base_delay = 1.0, max_delay = 5.0) <= 4.0 for _ in range(100)))
+
+    def test_dead_letters_are_added_to_one_file(self):
+        with TemporaryDirectory() as folder:
+            dead_letter_file = Path(folder) / "dead_letters.csv"
+
+            for nickname in ("a", "b"):
+                write_dead_letter(dead_letter_file = dead_letter_file,
+                                  url = f"http://{nickname}",
+                                  nickname = nickname,
+                                  site_name = "tests",
+                                  attempts = 3,
+                                  reason = "gone")
+
+            with open(dead_letter_file, newline = "", encoding = "utf-8") as file:
+                rows = list(csv.DictReader(file))
+
+        self.assertEqual([(row["nickname"], row["attempts"], row["reason"]) for row in rows],
+                         [("a", "3", "gone"), ("b", "3", "gone")])
+
+
+class StatusHandler(BaseHTTPRequestHandler):
+    # -- Sends the status codes in server.statuses in turn, then the page:
+    def do_GET(self):
+        self.server.requests += 1
+        status = self.server.statuses.pop(0) if self.server.statuses != [] else 200
+
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(PAGE)))
+        self.end_headers()
+        self.wfile.write(PAGE)
+
+    def log_message(self, *args):
+        pass
+
+
+class RetryTests(unittest.TestCase):
+    def scrape(self, statuses: list, dead_letter_file: str):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), StatusHandler)
+        server.statuses = list(statuses)
+        server.requests = 0
+        Thread(target = server.serve_forever, daemon = True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+
+        soup = url_scraper(url = f"http://127.0.0.1:{server.server_address[1]}/page",
+                           allowed_http_responses = frozenset({200}),
+                           headers = {},
+                           nickname = "retried",
+                           site_name = "tests",
+                           timeout = (2, 2),
+                           retry_policies = FAST_RETRIES,
+                           dead_letter_file = dead_letter_file)
+
+        return soup, server.requests
+
+    def test_a_server_error_is_retried(self):
+        with TemporaryDirectory() as folder:
+            dead_letter_file = Path(folder) / "dead_letters.csv"
+            soup, requests = self.scrape(statuses = [503, 503],
+                                         dead_letter_file = dead_letter_file)
+
+            self.assertEqual(requests, 3)
+            self.assertEqual(soup.find("p", attrs = {"id": "price"}).text, "10.00")
+            self.assertFalse(dead_letter_file.is_file())
+
+    def test_failures_are_dead_lettered_once_the_retries_run_out(self):
+        for statuses, expected_requests in (([404], 1), ([500, 500, 500], 2)):
+            with self.subTest(statuses = statuses), TemporaryDirectory() as folder:
+                dead_letter_file = Path(folder) / "dead_letters.csv"
+                soup, requests = self.scrape(statuses = statuses,
+                                             dead_letter_file = dead_letter_file)
+
+                self.assertIsNone(soup)
+                self.assertEqual(requests, expected_requests)
+
+                with open(dead_letter_file, newline = "", encoding = "utf-8") as file:
+                    rows = list(csv.DictReader(file))
+
+                self.assertEqual([(row["nickname"], row["attempts"]) for row in rows], [("retried", str(expected_requests))])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+# -- Import required libraries / modules:
+from importlib import util
+
+from bs4 import BeautifulSoup
+
+from modules.tables import column_names, convert_column, table_grid, table_records, table_to_dataframe
+
+import unittest
+
+
+SPANNING_TABLE = """
+<table>
+  <thead>
+    <tr><th rowspan="2">Item</th><th colspan="2">Price</th></tr>
+    <tr><th>Now</th><th>Was</th></tr>
+  </thead>
+  <tbody>
+    <tr><td rowspan="2">Kettle</td><td>£1,299.00</td><td>£1,499.00</td></tr>
+    <tr><td colspan="2">20.00</td></tr>
+    <tr><td>Toaster</td><td>n/a</td><td></td></tr>
+  </tbody>
+</table>
+"""
+
+NESTED_TABLE = """
+<table id="outer">
+  <tr><td>a</td><td><table><tr><td>inner</td></tr></table></td></tr>
+  <tr><td>b</td><td>c</td></tr>
+</table>
+"""
+
+
+def soup_table(markup: str):
+    return BeautifulSoup(markup, "html.parser").find("table")
+
+
+class TableGridTests(unittest.TestCase):
+    def test_spanning_cells_are_copied_into_each_position(self):
+        header_rows, body_rows = table_grid(table = soup_table(SPANNING_TABLE))
+
+        self.assertEqual(header_rows, [["Item", "Price", "Price"], ["Item", "Now", "Was"]])
+        self.assertEqual(body_rows, [["Kettle", "£1,299.00", "£1,499.00"],
+                                     ["Kettle", "20.00", "20.00"],
+                                     ["Toaster", "n/a", ""]])
+
+    def test_rows_of_nested_tables_are_skipped(self):
+        _, body_rows = table_grid(table = soup_table(NESTED_TABLE))
+
+        self.assertEqual(body_rows, [["a", "inner"], ["b", "c"]])
+
+    def test_a_rowspan_past_the_last_cell_is_carried_on(self):
+        header_rows, body_rows = table_grid(table = soup_table(
+            "<table><tr><td>a</td><td rowspan='2'>b</td></tr><tr></tr></table>"))
+
+        self.assertEqual(body_rows, [["a", "b"], ["", "b"]])
+
+    @unittest.skipIf(util.find_spec("selectolax") == None, "selectolax is not installed")
+    def test_selectolax_nodes_give_the_same_grid(self):
+        from selectolax.lexbor import LexborHTMLParser
+
+        for markup in (SPANNING_TABLE, NESTED_TABLE):
+            with self.subTest(markup = markup[:30]):
+                self.assertEqual(table_grid(table = LexborHTMLParser(markup).css_first("table")),
+                                 table_grid(table = soup_table(markup)))
+
+
+class TableToDataframeTests(unittest.TestCase):
+    def test_header_rows_are_joined_into_column_names(self):
+        df = table_to_dataframe(table = soup_table(SPANNING_TABLE))
+
+        self.assertEqual(list(df.columns), ["Item", "Price Now", "Price Was"])
+        self.assertEqual(df["Price Was"].tolist()[:2], [1499.0, 20.0])
+
+        # -- A column with text that isn't a number is left as text:
+        self.assertEqual(df["Price Now"].tolist(), ["£1,299.00", "20.00", "n/a"])
+
+    def test_names_are_made_for_missing_and_repeated_headers(self):
+        self.assertEqual(column_names(header_rows = [["Price", "Price", ""]], width = 4),
+                         ["Price", "Price_2", "2", "3"])
+
+    def test_empty_values_become_nan(self):
+        self.assertEqual(convert_column(values = ["1", "", "2%"]).isna().tolist(), [False, True, False])
+
+    def test_records_are_read_a_row_at_a_time(self):
+        records = list(table_records(table = soup_table(SPANNING_TABLE)))
+
+        self.assertEqual(records[1], {"Item": "Kettle", "Price Now": "20.00", "Price Was": "20.00"})
+        self.assertEqual(len(records), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
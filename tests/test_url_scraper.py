@@ -0,0 +1,106 @@
+# -- Import required libraries / modules:
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from threading import Thread
+
+from modules.scraper import url_scraper
+
+import csv
+import socket
+import unittest
+
+
+# -- Retry quickly so that the tests don't wait for the backoff:
+FAST_RETRIES = {"connection": {"max_attempts": 3, "base_delay": 0.0, "max_delay": 0.0}}
+
+PAGE = b"<html><body><p id='price'>10.00</p></body></html>"
+
+
+class DroppingServer:
+    """
+    ### Summary:
+        A local HTTP server that sends the headers and half of the body for
+        the first drops requests and then closes the connection. Any requests
+        after that get the whole page.
+
+    ### Args:
+        drops (int):
+            The number of requests to drop part way through the body.
+    """
+
+    def __init__(self, drops: int):
+        self.drops = drops
+        self.requests = 0
+        self.listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.listener.bind(("127.0.0.1", 0))
+        self.listener.listen()
+        self.url = f"http://127.0.0.1:{self.listener.getsockname()[1]}/page"
+        self.thread = Thread(target = self._serve, daemon = True)
+        self.thread.start()
+
+    def _serve(self):
+        while True:
+            try:
+                connection, _ = self.listener.accept()
+            except OSError:
+                return
+
+            with connection:
+                connection.recv(65536)
+                self.requests += 1
+                body = PAGE[:len(PAGE) // 2] if self.requests <= self.drops else PAGE
+                connection.sendall(b"HTTP/1.1 200 OK\r\n"
+                                   b"Content-Type: text/html; charset=utf-8\r\n"
+                                   + f"Content-Length: {len(PAGE)}\r\n".encode("ascii")
+                                   + b"Connection: close\r\n\r\n"
+                                   + body)
+
+    def close(self):
+        self.listener.close()
+
+
+class DroppedConnectionTests(unittest.TestCase):
+    def scrape(self, server, dead_letter_file):
+        return url_scraper(url = server.url,
+                           allowed_http_responses = frozenset({200}),
+                           headers = {},
+                           nickname = "dropped",
+                           site_name = "tests",
+                           timeout = (2, 2),
+                           retry_policies = FAST_RETRIES,
+                           dead_letter_file = dead_letter_file)
+
+    def test_dropped_body_is_retried(self):
+        server = DroppingServer(drops = 1)
+        self.addCleanup(server.close)
+
+        with TemporaryDirectory() as folder:
+            dead_letter_file = Path(folder) / "dead_letters.csv"
+            soup = self.scrape(server = server,
+                               dead_letter_file = dead_letter_file)
+
+            self.assertEqual(server.requests, 2)
+            self.assertEqual(soup.find("p", attrs = {"id": "price"}).text, "10.00")
+            self.assertFalse(dead_letter_file.is_file())
+
+    def test_dropped_body_is_dead_lettered(self):
+        server = DroppingServer(drops = 3)
+        self.addCleanup(server.close)
+
+        with TemporaryDirectory() as folder:
+            dead_letter_file = Path(folder) / "dead_letters.csv"
+            soup = self.scrape(server = server,
+                               dead_letter_file = dead_letter_file)
+
+            self.assertIsNone(soup)
+            self.assertEqual(server.requests, 3)
+
+            with open(dead_letter_file, newline = "", encoding = "utf-8") as file:
+                rows = list(csv.DictReader(file))
+
+            self.assertEqual(len(rows), 1)
+            self.assertEqual(rows[0]["nickname"], "dropped")
+
+
+if __name__ == "__main__":
+    unittest.main()
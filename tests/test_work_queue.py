@@ -0,0 +1,142 @@
+# -- Import required libraries / modules:
+from collections import namedtuple
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from modules.work_queue import WorkQueue, merge_site_summaries, run_worker
+
+import sqlite3
+import time
+import unittest
+
+
+PageRow = namedtuple("PageRow", ["nickname", "url", "browser_to_use"])
+
+
+def page_rows(count: int):
+    return [PageRow(f"page_{number}", f"http://127.0.0.1:9/page/{number}", "chrome") for number in range(count)]
+
+
+class WorkQueueTests(unittest.TestCase):
+    def setUp(self):
+        folder = TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        self.db_path = Path(folder.name) / "queue.sqlite"
+        self.queue = WorkQueue(db_path = self.db_path,
+                               max_attempts = 2)
+        self.addCleanup(self.queue.close)
+        self.queue.enqueue(site_dir = "site",
+                           site_name = "site",
+                           rows = page_rows(count = 3),
+                           batch = "batch")
+
+    def test_enqueue_ignores_rows_already_in_the_batch(self):
+        added = self.queue.enqueue(site_dir = "site",
+                                   site_name = "site",
+                                   rows = page_rows(count = 3),
+                                   batch = "batch")
+
+        self.assertEqual(added, 0)
+        self.assertEqual(self.queue.counts()["queued"], 3)
+
+    def test_leased_rows_are_hidden_from_other_workers(self):
+        tasks = self.queue.lease(worker = "one", limit = 2)
+
+        self.assertEqual([task["row"].nickname for task in tasks], ["page_0", "page_1"])
+        self.assertEqual([task["row"].nickname for task in self.queue.lease(worker = "two", limit = 5)], ["page_2"])
+        self.assertEqual(self.queue.lease(worker = "three", limit = 5), [])
+
+    def test_ack_only_works_for_the_worker_with_the_lease(self):
+        task = self.queue.lease(worker = "one")[0]
+
+        self.assertFalse(self.queue.ack(task_id = task["id"], worker = "two"))
+        self.assertTrue(self.queue.ack(task_id = task["id"], worker = "one"))
+        self.assertEqual(self.queue.counts(), {"queued": 2, "leased": 0, "done": 1, "failed": 0})
+
+    def test_expired_leases_are_leased_again_until_max_attempts(self):
+        task = self.queue.lease(worker = "one", limit = 1, visibility_timeout = 0.01)[0]
+        time.sleep(0.05)
+
+        retried = self.queue.lease(worker = "two", limit = 1, visibility_timeout = 0.01)[0]
+        self.assertEqual(retried["id"], task["id"])
+        time.sleep(0.05)
+
+        # -- The row has now been leased max_attempts times, so it fails:
+        self.assertNotIn(task["id"], [task["id"] for task in self.queue.lease(worker = "three", limit = 5)])
+        self.assertEqual(self.queue.counts()["failed"], 1)
+
+    def test_renew_keeps_a_lease_from_expiring(self):
+        task = self.queue.lease(worker = "one", limit = 1, visibility_timeout = 0.05)[0]
+
+        self.assertEqual(self.queue.renew(task_ids = [task["id"]], worker = "two", visibility_timeout = 60), 0)
+        self.assertEqual(self.queue.renew(task_ids = [task["id"]], worker = "one", visibility_timeout = 60), 1)
+        time.sleep(0.1)
+
+        self.assertNotIn(task["id"], [task["id"] for task in self.queue.lease(worker = "two", limit = 5)])
+
+    def test_release_hands_rows_back_straight_away(self):
+        task = self.queue.lease(worker = "one", limit = 1)[0]
+        self.queue.release(task_ids = [task["id"]], worker = "one", error = "stopped")
+
+        self.assertIn(task["id"], [task["id"] for task in self.queue.lease(worker = "two", limit = 5)])
+
+
+class MergeSiteSummariesTests(unittest.TestCase):
+    def test_summaries_for_a_site_are_added_up(self):
+        summaries = [{"site_name": "a", "status": "completed", "rows": 2, "succeeded": 2, "failed": 0,
+                      "unchanged": 0, "resumed": 0, "seconds": 1.0, "error": None,
+                      "metrics": {"counters": {"requests": 2}}},
+                     {"site_name": "b", "status": "skipped", "rows": 0, "succeeded": 0, "failed": 0,
+                      "unchanged": 0, "resumed": 0, "seconds": 0.0, "error": None},
+                     {"site_name": "a", "status": "crashed", "rows": 1, "succeeded": 0, "failed": 1,
+                      "unchanged": 0, "resumed": 0, "seconds": 0.5, "error": "boom",
+                      "metrics": {"counters": {"requests": 1}}}]
+
+        merged = merge_site_summaries(site_summaries = summaries)
+
+        self.assertEqual([summary["site_name"] for summary in merged], ["a", "b"])
+        self.assertEqual(merged[0]["status"], "crashed")
+        self.assertEqual((merged[0]["rows"], merged[0]["succeeded"], merged[0]["failed"]), (3, 2, 1))
+        self.assertEqual(merged[0]["error"], "boom")
+        self.assertEqual(merged[0]["metrics"]["counters"], {"requests": 3})
+
+
+class RunWorkerTests(unittest.TestCase):
+    def test_rows_are_handed_back_when_the_processor_cannot_be_loaded(self):
+        with TemporaryDirectory() as folder:
+            sites_dir = Path(folder) / "sites"
+            (sites_dir / "broken_site").mkdir(parents = True)
+            (sites_dir / "broken_site" / "processor.py").write_text("raise ImportError('broken processor')\n")
+            db_path = Path(folder) / "queue.sqlite"
+
+            queue = WorkQueue(db_path = db_path)
+            queue.enqueue(site_dir = "broken_site",
+                          site_name = "broken_site",
+                          rows = page_rows(count = 2),
+                          batch = "batch")
+            queue.close()
+
+            start_time = time.perf_counter()
+            summaries = run_worker(queue_file = db_path,
+                                   sites_dir = sites_dir,
+                                   visibility_timeout = 300,
+                                   poll_seconds = 0.01,
+                                   allowed_http_responses = frozenset({200}),
+                                   browser_headers = {},
+                                   output_dir = f"{folder}/output/")
+
+            # -- The rows were handed back after each crash rather than
+            # -- waiting for their leases to expire:
+            self.assertLess(time.perf_counter() - start_time, 60)
+            self.assertEqual([(summary["site_name"], summary["status"]) for summary in summaries],
+                             [("broken_site", "crashed")])
+
+            with sqlite3.connect(db_path) as connection:
+                rows = connection.execute("SELECT status, attempts, error FROM tasks ORDER BY id").fetchall()
+
+            self.assertEqual([(status, attempts) for status, attempts, _ in rows], [("failed", 3), ("failed", 3)])
+            self.assertTrue(all("broken processor" in error for _, _, error in rows))
+
+
+if __name__ == "__main__":
+    unittest.main()